@@ -0,0 +1,96 @@
+"""
+Benchmark of the AssociativeChaining grading: time of grading one answer of 100 words
+against a payload of 100 Polish words, exactly and with fuzzy matching, for a few kinds
+of answers. The index of the payload is built once, as in the game, and timed apart.
+
+The target is a p50 under 1 ms for every kind of answer with max distance 1, the worst
+case being an answer with a typo in every word at another position; the benchmark checks
+it and exits with 1 when it's missed. With max distance 2 an answer has quadratically
+many deletions to look up, so answers full of typos take a few ms.
+
+Usage:
+    python -m benchmarks.associative_grading [--max-distance 1] [--repeat 2000]
+"""
+import argparse
+import random
+import sys
+import time
+
+from src.games.mnemonic.associative_chaining import DATA_PATH
+from src.games.mnemonic.corpus import load_corpus
+from src.games.mnemonic.fuzzy import fold
+from src.games.mnemonic.grading import AnswerKey
+
+from .engine_profiles import percentile
+
+# p50 (us) of grading any answer with max distance 1
+TARGET_US = 1000
+
+
+def typo(word, rng):
+    position = rng.randrange(len(word))
+    return (
+        word[:position] + rng.choice("abcdefghijklmnoprstuwyz") + word[position + 1 :]
+    )
+
+
+def answers(payload, rng):
+    """Answers of 100 words by kind"""
+    shuffled = rng.sample(payload, len(payload))
+    return {
+        "exact": list(payload),
+        "shuffled": shuffled,
+        "no diacritics": [fold(word) for word in payload],
+        "10% typos": [
+            typo(word, rng) if rng.random() < 0.1 else word for word in shuffled
+        ],
+        "all typos": [typo(word, rng) for word in shuffled],
+        "all unknown": ["".join(rng.choices("qxvz", k=len(word))) for word in payload],
+    }
+
+
+def timings(answer_key, answers, repeat):
+    """Microseconds of every grading"""
+    result = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        answer_key.grade(answers)
+        result.append((time.perf_counter() - begin) * 1_000_000)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-distance", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    payload = load_corpus(DATA_PATH / "pl_noun").sample(100, rng)
+    slowest = 0.0
+    for max_distance in sorted({0, args.max_distance}):
+        begin = time.perf_counter()
+        answer_key = AnswerKey(payload, max_distance)
+        build = (time.perf_counter() - begin) * 1_000_000
+        print(f"max distance {max_distance}, index built in {build:.0f} us")
+        print(f"{'answer':>14} {'p50 us':>8} {'p99 us':>8}")
+        for name, submission in answers(payload, rng).items():
+            result = timings(answer_key, submission, args.repeat)
+            print(
+                f"{name:>14} {percentile(result, 50):>8.1f} "
+                f"{percentile(result, 99):>8.1f}"
+            )
+            if max_distance <= 1:
+                slowest = max(slowest, percentile(result, 50))
+
+    passed = slowest < TARGET_US
+    print(
+        f"{'PASS' if passed else 'FAIL'}: slowest p50 with max distance up to 1 "
+        f"{slowest:.0f} us, target {TARGET_US} us"
+    )
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark of the bcrypt cost: login (password verification) latency at each cost,
+and the cost the calibration picks for the budget.
+
+Usage:
+    python -m benchmarks.bcrypt_cost [--min-rounds 10] [--max-rounds 14] [--logins 20] [--budget-ms 250]
+
+Run it on the target machine, every round doubles the time.
+"""
+import argparse
+import statistics
+import time
+
+import bcrypt
+
+from src.user.session import calibrate_rounds
+
+from .engine_profiles import percentile
+
+
+def benchmark_rounds(rounds, logins):
+    password = b"benchmark"
+    stored_hash = bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+    latencies = []
+    for _ in range(logins):
+        start = time.perf_counter()
+        bcrypt.checkpw(password, stored_hash)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "rounds": rounds,
+        "login_p50_ms": statistics.median(latencies),
+        "login_p99_ms": percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--budget-ms", type=int, default=250)
+    args = parser.parse_args()
+
+    print(f"{'rounds':>6} {'login p50 ms':>13} {'login p99 ms':>13}")
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        result = benchmark_rounds(rounds, args.logins)
+        print(
+            f"{result['rounds']:>6} {result['login_p50_ms']:>13.1f} "
+            f"{result['login_p99_ms']:>13.1f}"
+        )
+    print(
+        f"Calibrated cost for {args.budget_ms} ms: "
+        f"{calibrate_rounds(args.budget_ms / 1000, min_rounds=args.min_rounds)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
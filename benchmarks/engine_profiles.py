@@ -0,0 +1,101 @@
+"""
+Benchmark of the engine profiles: commit latency and read throughput.
+
+Usage:
+    python -m benchmarks.engine_profiles [--commits 200] [--reads 5000] [--dir /path/on/target/disk]
+
+Run it on the target machine, results depend mostly on the storage.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from src.db.db import engine
+from src.db.profiles import PROFILES, EngineProfile, describe_engine
+from src.models import ModelBase
+from src.models.user import PointsModel, User
+
+# SQLite defaults, as used before the profiles were introduced
+BASELINE = EngineProfile(
+    name="baseline",
+    journal_mode="DELETE",
+    synchronous="FULL",
+    cache_size=-2000,
+    busy_timeout=0,
+)
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def benchmark_profile(profile, directory, commits, reads):
+    path = Path(directory) / f"{profile.name}.sqlite"
+    db_engine = engine(f"sqlite:///{path}", profile)
+    ModelBase.metadata.create_all(db_engine)
+
+    with Session(db_engine) as session:
+        user = User(username="benchmark", password="benchmark")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+
+        # commit latency of a single points record (the write of every game)
+        latencies = []
+        for _ in range(commits):
+            start = time.perf_counter()
+            session.add(PointsModel(user_id=user_id, point=1, category="Game"))
+            session.commit()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    # read throughput: lookups by primary key
+    ids = [random.randint(1, commits) for _ in range(reads)]
+    stmt = select(PointsModel.point).where(PointsModel.id == bindparam("point_id"))
+    with db_engine.connect() as connection:
+        start = time.perf_counter()
+        for point_id in ids:
+            connection.execute(stmt, {"point_id": point_id}).scalar()
+        reads_per_second = reads / (time.perf_counter() - start)
+
+    settings = describe_engine(db_engine)
+    db_engine.dispose()
+    return {
+        "profile": profile.name,
+        "journal_mode": settings["journal_mode"],
+        "synchronous": settings["synchronous"],
+        "commit_p50_ms": statistics.median(latencies),
+        "commit_p99_ms": percentile(latencies, 99),
+        "reads_per_s": reads_per_second,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commits", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=5000)
+    parser.add_argument("--dir", default=None, help="directory for the test databases")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        print(
+            f"{'profile':<12} {'journal':<8} {'sync':>4} "
+            f"{'commit p50 ms':>14} {'commit p99 ms':>14} {'reads/s':>10}"
+        )
+        for profile in [BASELINE, *PROFILES.values()]:
+            result = benchmark_profile(profile, directory, args.commits, args.reads)
+            print(
+                f"{result['profile']:<12} {result['journal_mode']:<8} "
+                f"{result['synchronous']:>4} {result['commit_p50_ms']:>14.3f} "
+                f"{result['commit_p99_ms']:>14.3f} {result['reads_per_s']:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark of the login path after the password is verified: number of statements and
+latency of the previous path (find_record, add_record(Login), load_session with lazy
+loaded games) compared with GameManager.login.
+
+Usage:
+    python -m benchmarks.login_path [--logins 200]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src.db.instrumentation import QueryInstrumentation
+from src.db.session import GameManager, GameStatistic, UserSession
+from src.models import ModelBase
+from src.models.enum_types import GameName
+from src.models.user import Login, User
+from src.user.session import MIN_ROUNDS, hash_password
+
+from .engine_profiles import percentile
+
+
+def previous_login(game_manager, username):
+    db = game_manager.db
+    user = db.find_record(User, username=username)
+    db.add_record(Login, user_id=user.id)
+    user = db.find_record(User, id=user.id)
+    stats = {}
+    for game in GameName:
+        game_stat = getattr(user, game.lower().replace(" ", "_"))
+        stats[game.value] = GameStatistic(
+            id=game_stat.id, game=game.value, level=game_stat.level
+        )
+    game_manager.current_session = UserSession(
+        id=user.id,
+        language=user.language,
+        username=user.username,
+        point=user.point,
+        stats=stats,
+    )
+
+
+def new_login(game_manager, username):
+    user = game_manager.db.users.get(username)
+    game_manager.login(user.id)
+
+
+def benchmark_path(login, directory, logins):
+    game_manager = GameManager(f"sqlite:///{Path(directory) / login.__name__}.sqlite")
+    ModelBase.metadata.create_all(game_manager.db.engine)
+    game_manager.db.create_account_with_hash(
+        "benchmark", hash_password("benchmark", MIN_ROUNDS)
+    )
+
+    instrumentation = QueryInstrumentation()
+    for engine in (game_manager.db.engine, game_manager.db.read_engine):
+        instrumentation.install(engine)
+    latencies = []
+    for _ in range(logins):
+        # every login starts with a fresh session, as after the app is started
+        game_manager.db.session.remove()
+        game_manager.db.users.clear()
+        start = time.perf_counter()
+        login(game_manager, "benchmark")
+        latencies.append((time.perf_counter() - start) * 1000)
+    statements = sum(stats.count for stats in instrumentation.stats())
+    game_manager.db.close()
+    return {
+        "path": login.__name__,
+        "statements": statements / logins,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'path':<16} {'statements':>10} {'p50 ms':>8} {'p99 ms':>8}")
+        for login in (previous_login, new_login):
+            result = benchmark_path(login, directory, args.logins)
+            print(
+                f"{result['path']:<16} {result['statements']:>10.1f} "
+                f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark of the batch chain generator: chains per second of 'generate_chains' against
+a loop over 'generate_chain', for a few levels. Tables of a level are built before the
+timing.
+
+Usage:
+    python -m benchmarks.result_keeper_batch [--chains 100000] [--loop-chains 10000]
+"""
+import argparse
+import random
+import time
+
+from src.games.math.batch import generate_chains
+from src.games.math.chain import generate_chain, range_size
+
+LEVELS = (1, 10, 50, 200)
+
+
+def loop_rate(level, chains):
+    size = range_size(level)
+    generate_chain(0, size)
+    begin = time.perf_counter()
+    for _ in range(chains):
+        generate_chain(random.randint(0, size), size)
+    return chains / (time.perf_counter() - begin)
+
+
+def batch_rate(level, chains, repeat=5):
+    generate_chains(level, 1000)
+    best = float("inf")
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        generate_chains(level, chains)
+        best = min(best, time.perf_counter() - begin)
+    return chains / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chains", type=int, default=100_000)
+    parser.add_argument("--loop-chains", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{'level':>5} {'loop chains/s':>14} {'batch chains/s':>15} {'speedup':>8}")
+    for level in LEVELS:
+        loop = loop_rate(level, args.loop_chains)
+        batch = batch_rate(level, args.chains)
+        print(f"{level:>5} {loop:>14,.0f} {batch:>15,.0f} {batch / loop:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
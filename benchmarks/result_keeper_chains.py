@@ -0,0 +1,108 @@
+"""
+Benchmark of the ResultKeeper chain generator across levels: mean and worst-case time
+of generating one chain, for the previous retrying generator and the constructive one.
+Tables of a level are built before the timing, their build time is reported separately.
+
+Usage:
+    python -m benchmarks.result_keeper_chains [--levels 200] [--chains 200] [--step 10]
+"""
+import argparse
+import gc
+import random
+import statistics
+import time
+
+from src.games.math.chain import OPERATIONS, divisor_table, generate_chain
+
+
+def previous_chain(start, range_size):
+    """The generator used before: random operations, retried until one fits"""
+    payload = [start] + [random.randint(0, range_size) for _ in range(9)]
+    math_char = list(OPERATIONS)
+    chars = math_char[:]
+    r, i = payload[0], 1
+    while i < 10:
+        if not chars:
+            chars = math_char[:]
+            payload[i] = random.randint(1, range_size)
+            continue
+        char = random.choice(chars)
+        b = payload[i]
+        match char:
+            case "+":
+                temp_res = r + b
+            case "-":
+                temp_res = r - b
+            case "*":
+                temp_res = r * b
+            case "/":
+                temp_res = r // b if b and r % b == 0 else -1
+        if 0 <= temp_res <= range_size:
+            i += 1
+            r = temp_res
+            chars = math_char[:]
+        else:
+            chars.remove(char)
+    return payload
+
+
+def new_chain(start, range_size):
+    return generate_chain(start, range_size)
+
+
+def benchmark_level(generator, level, chains):
+    range_size = 5 + 5 * level
+    # the tables of the level are built once, before the first round
+    generator(0, range_size)
+    times = []
+    # collections of the garbage collector would dominate the worst case
+    gc.disable()
+    try:
+        for _ in range(chains):
+            start = random.randint(0, range_size)
+            begin = time.perf_counter()
+            generator(start, range_size)
+            times.append((time.perf_counter() - begin) * 1_000_000)
+    finally:
+        gc.enable()
+    return statistics.mean(times), max(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--levels", type=int, default=200)
+    parser.add_argument("--chains", type=int, default=200)
+    parser.add_argument("--step", type=int, default=10, help="print every n-th level")
+    args = parser.parse_args()
+
+    print(
+        f"{'level':>5} {'previous mean us':>17} {'previous max us':>16} "
+        f"{'new mean us':>12} {'new max us':>11}"
+    )
+    worst = {previous_chain: 0, new_chain: 0}
+    for level in range(1, args.levels + 1):
+        results = {}
+        for generator in worst:
+            results[generator] = benchmark_level(generator, level, args.chains)
+            worst[generator] = max(worst[generator], results[generator][1])
+        if level == 1 or level % args.step == 0:
+            (old_mean, old_max), (new_mean, new_max) = results.values()
+            print(
+                f"{level:>5} {old_mean:>17.1f} {old_max:>16.1f} "
+                f"{new_mean:>12.1f} {new_max:>11.1f}"
+            )
+    begin = time.perf_counter()
+    divisor_table.cache_clear()
+    divisor_table(5 + 5 * args.levels)
+    print(
+        f"divisor table of level {args.levels}: "
+        f"{(time.perf_counter() - begin) * 1000:.2f} ms (built once per level)"
+    )
+    print(
+        f"worst case over levels 1-{args.levels}: "
+        f"previous {worst[previous_chain]:.1f} us, new {worst[new_chain]:.1f} us"
+    )
+
+
+if __name__ == "__main__":
+    main()
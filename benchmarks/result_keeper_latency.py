@@ -0,0 +1,66 @@
+"""
+Benchmark of the ResultKeeper latency per answer as seen by the UI: time of sending the
+answer and getting the next question, for answers inside a round and for the last
+answer of a round (which starts the next one), with and without prefetching the next
+round. Every round is answered correctly, so the level goes up every round and the
+next round needs the tables of a new level.
+
+Usage:
+    python -m benchmarks.result_keeper_latency [--level 1000] [--rounds 20] [--think-ms 20]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.games.math import ResultKeeper
+from src.games.math.chain import apply, divisor_table
+
+from .engine_profiles import percentile
+
+
+def play(result_keeper, rounds, think):
+    """Latencies (ms) of the answers inside rounds and of the last answers of rounds"""
+    inside, last = [], []
+    game = result_keeper.run()
+    question, _ = next(game)
+    value = None
+    for step in range(rounds * 9):
+        tokens = question.split()
+        if len(tokens) == 4:
+            value, tokens = int(tokens[0]), tokens[1:]
+        value = apply(value, int(tokens[1]), tokens[0])
+        # the player thinks, the worker generates meanwhile
+        time.sleep(think)
+        begin = time.perf_counter()
+        game.send(value)
+        question, _ = next(game)
+        elapsed = (time.perf_counter() - begin) * 1000
+        (last if step % 9 == 8 else inside).append(elapsed)
+    return inside, last
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--level", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--think-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    print(
+        f"{'':>12} {'inside p50':>11} {'inside p99':>11} "
+        f"{'last p50':>9} {'last p99':>9} {'last max':>9}  (ms)"
+    )
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        for name, pool in (("no prefetch", None), ("prefetch", executor)):
+            divisor_table.cache_clear()
+            result_keeper = ResultKeeper(args.level, seed=1, executor=pool)
+            inside, last = play(result_keeper, args.rounds, args.think_ms / 1000)
+            print(
+                f"{name:>12} {percentile(inside, 50):>11.3f} "
+                f"{percentile(inside, 99):>11.3f} {percentile(last, 50):>9.3f} "
+                f"{percentile(last, 99):>9.3f} {max(last):>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from sqlalchemy import engine_from_config, pool
 from sqlmodel import SQLModel
 
 from src.models.games import ResultKeeperModel, ResultKeeperSessionModel, AssociativeChangingSessionModel, AssociativeChangingModel
+from src.models.journal import JournalGroupModel
 from src.models.user import Login, User, PointsModel
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,26 @@
+"""add max_distance to AssociativeChangingSessionModel
+
+Revision ID: 3f6a9d2b8c15
+Revises: e8b2c5f1a7d3
+Create Date: 2026-10-18 22:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6a9d2b8c15'
+down_revision: Union[str, None] = 'e8b2c5f1a7d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('associative_changing_session_table', sa.Column('max_distance', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('associative_changing_session_table', 'max_distance')
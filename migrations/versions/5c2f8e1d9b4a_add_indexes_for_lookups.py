@@ -0,0 +1,36 @@
+"""add indexes for lookups by user and history by date
+
+Revision ID: 5c2f8e1d9b4a
+Revises: a1b3a1fe8fe9
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2f8e1d9b4a'
+down_revision: Union[str, None] = 'a1b3a1fe8fe9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_result_keeper_table_user_id', 'result_keeper_table', ['user_id'], unique=False)
+    op.create_index('ix_associative_changing_table_user_id', 'associative_changing_table', ['user_id'], unique=False)
+    op.create_index('ix_login_table_user_id_login_date', 'login_table', ['user_id', 'login_date'], unique=False)
+    op.create_index('ix_points_table_user_id_saved_date', 'points_table', ['user_id', 'saved_date', 'point'], unique=False)
+    op.create_index('ix_result_keeper_session_table_game_finished', 'result_keeper_session_table', ['result_keeper_id', 'finished_datetime'], unique=False)
+    op.create_index('ix_associative_changing_session_table_game_finished', 'associative_changing_session_table', ['associative_changing_id', 'finished_datetime'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_associative_changing_session_table_game_finished', table_name='associative_changing_session_table')
+    op.drop_index('ix_result_keeper_session_table_game_finished', table_name='result_keeper_session_table')
+    op.drop_index('ix_points_table_user_id_saved_date', table_name='points_table')
+    op.drop_index('ix_login_table_user_id_login_date', table_name='login_table')
+    op.drop_index('ix_associative_changing_table_user_id', table_name='associative_changing_table')
+    op.drop_index('ix_result_keeper_table_user_id', table_name='result_keeper_table')
@@ -0,0 +1,31 @@
+"""add seed to the sessions and answers to ResultKeeperSessionModel
+
+Revision ID: 7d4e2a9c3f10
+Revises: 5c2f8e1d9b4a
+Create Date: 2026-10-18 18:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4e2a9c3f10'
+down_revision: Union[str, None] = '5c2f8e1d9b4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('result_keeper_session_table', sa.Column('seed', sa.Integer(), nullable=True))
+    op.add_column('result_keeper_session_table', sa.Column('answers', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.add_column('associative_changing_session_table', sa.Column('seed', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('associative_changing_session_table', 'seed')
+    op.drop_column('result_keeper_session_table', 'answers')
+    op.drop_column('result_keeper_session_table', 'seed')
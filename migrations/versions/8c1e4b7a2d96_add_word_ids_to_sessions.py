@@ -0,0 +1,27 @@
+"""add word_ids to AssociativeChangingSessionModel
+
+Revision ID: 8c1e4b7a2d96
+Revises: 3f6a9d2b8c15
+Create Date: 2026-10-18 22:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1e4b7a2d96'
+down_revision: Union[str, None] = '3f6a9d2b8c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('associative_changing_session_table', sa.Column('word_ids', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('associative_changing_session_table', 'word_ids')
@@ -0,0 +1,37 @@
+"""add the bitmap of the words seen in AssociativeChanging
+
+Revision ID: 9b6e3f2a1c84
+Revises: 7d4e2a9c3f10
+Create Date: 2026-10-18 19:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b6e3f2a1c84'
+down_revision: Union[str, None] = '7d4e2a9c3f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('associative_changing_seen_table',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('associative_changing_id', sa.Integer(), nullable=False),
+    sa.Column('corpus', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('fingerprint', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('chunk', sa.Integer(), nullable=False),
+    sa.Column('bits', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.ForeignKeyConstraint(['associative_changing_id'], ['associative_changing_table.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('associative_changing_id', 'corpus', 'chunk', name='uq_associative_changing_seen_table_chunk')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('associative_changing_seen_table')
@@ -0,0 +1,27 @@
+"""add due_words to AssociativeChangingSessionModel
+
+Revision ID: b5d7f3e9a412
+Revises: 8c1e4b7a2d96
+Create Date: 2026-10-18 23:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d7f3e9a412'
+down_revision: Union[str, None] = '8c1e4b7a2d96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('associative_changing_session_table', sa.Column('due_words', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('associative_changing_session_table', 'due_words')
@@ -0,0 +1,39 @@
+"""add the spaced repetition reviews of the AssociativeChanging words
+
+Revision ID: c4a7d1e8f253
+Revises: 9b6e3f2a1c84
+Create Date: 2026-10-18 20:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7d1e8f253'
+down_revision: Union[str, None] = '9b6e3f2a1c84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('associative_changing_review_table',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('associative_changing_id', sa.Integer(), nullable=False),
+    sa.Column('corpus', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('word', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('ease', sa.Float(), nullable=False),
+    sa.Column('interval', sa.Integer(), nullable=False),
+    sa.Column('repetitions', sa.Integer(), nullable=False),
+    sa.Column('due', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['associative_changing_id'], ['associative_changing_table.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('associative_changing_id', 'corpus', 'word', name='uq_associative_changing_review_table_word')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('associative_changing_review_table')
@@ -0,0 +1,31 @@
+"""add the groups of the write-behind journal committed to the database
+
+Revision ID: e8b2c5f1a7d3
+Revises: c4a7d1e8f253
+Create Date: 2026-10-18 21:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b2c5f1a7d3'
+down_revision: Union[str, None] = 'c4a7d1e8f253'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('journal_group_table',
+    sa.Column('id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('committed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('journal_group_table')
@@ -11,8 +11,9 @@ from kivy.uix.popup import Popup
 from kivy.uix.textinput import TextInput
 
 from ..db.session import GameManager
-from ..models.user import Login, User
-from ..user.session import verify_password
+from ..models.user import User
+from ..user.credentials import TooManyCredentialRequests
+from ..user.session import needs_rehash
 from .base_screen import BaseScreen
 
 PATH_CREDENTIALS = os.path.join(Path.cwd(), ".credentials")
@@ -139,33 +140,77 @@ class LoginScreen(BaseScreen):
         popup.open()
 
     def authorization(self, instance):
+        """Check the password in the background, the result is handled by 'on_verified'"""
+        if self.login_button.disabled:
+            # the previous attempt is being verified
+            return
         username = self.user_field.text.strip()
         password = self.password_field.text
-        user = self.session_manager.db.find_record(User, username=username)
-        if user and verify_password(user.password, password):
-            self.show_message(
-                title=self.get_message_with_variables("login", "success_login_title"),
-                message=self.get_message_with_variables(
-                    "login", "success_login_message"
+        user = self.session_manager.db.users.get(username)
+        if not user:
+            self.show_fail_message()
+            return
+
+        self.login_button.disabled = True
+        try:
+            self.session_manager.credentials.verify(
+                user.password,
+                password,
+                callback=lambda verified: self.on_verified(
+                    verified, user, username, password
+                ),
+                error_callback=lambda error: self.on_verified(
+                    False, user, username, password
                 ),
             )
-            self.password_field.text = ""
-            self.user_field.text = ""
-
-            # Save credentials if remember me is checked
-            if self.remember_me.active:
-                self.save_credentials(username, password)
-            # save login
-            self.session_manager.db.add_record(Login, user_id=user.id)
-            # load the current_session
-            self.session_manager.load_session(user.id)
-            # go to the 'menu' screen
-            self.manager.current = "menu"
-        else:
+        except TooManyCredentialRequests:
+            self.login_button.disabled = False
             self.show_message(
                 title=self.get_message_with_variables("login", "fail_login_title"),
-                message=self.get_message_with_variables("login", "fail_login_message"),
+                message=self.get_message_with_variables("login", "too_many_attempts"),
+            )
+
+    def on_verified(self, verified: bool, user, username: str, password: str):
+        self.login_button.disabled = False
+        if not verified:
+            self.show_fail_message()
+            return
+
+        self.show_message(
+            title=self.get_message_with_variables("login", "success_login_title"),
+            message=self.get_message_with_variables("login", "success_login_message"),
+        )
+        self.password_field.text = ""
+        self.user_field.text = ""
+
+        # Save credentials if remember me is checked
+        if self.remember_me.active:
+            self.save_credentials(username, password)
+        if needs_rehash(user.password):
+            self.upgrade_password_hash(user.id, password)
+        # load the current_session and save login
+        self.session_manager.login(user.id)
+        # go to the 'menu' screen
+        self.manager.current = "menu"
+
+    def upgrade_password_hash(self, user_id: int, password: str) -> None:
+        """Rehash the password with the current cost in the background"""
+        try:
+            self.session_manager.credentials.hash(
+                password,
+                callback=lambda password_hash: self.session_manager.db.update_record(
+                    User, user_id, {"password": password_hash}
+                ),
             )
+        except TooManyCredentialRequests:
+            # the hash is upgraded on one of the next logins
+            pass
+
+    def show_fail_message(self):
+        self.show_message(
+            title=self.get_message_with_variables("login", "fail_login_title"),
+            message=self.get_message_with_variables("login", "fail_login_message"),
+        )
 
     def save_credentials(self, username, password):
         credentials = {
@@ -280,6 +325,9 @@ class CreateAccountScreen(BaseScreen):
         return True
 
     def create_account(self, instance) -> None:
+        if self.create_button.disabled:
+            # the password is being hashed
+            return
         # Validate input
         username = self.user_field.text.strip()
         if not username:
@@ -288,7 +336,7 @@ class CreateAccountScreen(BaseScreen):
             )
             return
         # Check if username exists
-        elif self.session_manager.db.find_record(User, username=username):
+        elif self.session_manager.db.users.exists(username):
             self.info_label.text = self.get_message_with_variables(
                 "create_account", "user_exists"
             )
@@ -300,8 +348,27 @@ class CreateAccountScreen(BaseScreen):
         if not self.validation_password(password_one, password_two):
             return
 
-        # Create a new user with game levels
-        self.session_manager.db.create_account(username, password_one)
+        # Hash the password in the background, then create a new user with game levels
+        self.create_button.disabled = True
+        try:
+            self.session_manager.credentials.hash(
+                password_one,
+                callback=lambda password_hash: self.on_password_hashed(
+                    username, password_hash
+                ),
+                error_callback=lambda error: setattr(
+                    self.create_button, "disabled", False
+                ),
+            )
+        except TooManyCredentialRequests:
+            self.create_button.disabled = False
+            self.info_label.text = self.get_message_with_variables(
+                "create_account", "too_many_attempts"
+            )
+
+    def on_password_hashed(self, username: str, password_hash: str) -> None:
+        self.create_button.disabled = False
+        self.session_manager.db.create_account_with_hash(username, password_hash)
 
         self.info_label.text = self.get_message_with_variables(
             "create_account", "account_created"
@@ -3,7 +3,9 @@ from kivy.uix.screenmanager import ScreenManager
 
 from src.db.session import GameManager
 
-from ..db.db import DATABASE_URL
+from ..db.db import DATABASE_URL, JOURNAL_PATH
+from ..db.instrumentation import DUMP_PATH as QUERY_STATS_PATH
+from ..db.instrumentation import INSTRUMENTATION
 from .authorization import CreateAccountScreen, LoginScreen
 from .common.translator import Translator
 from .games.associative_changing import AssociativeChainingScreen
@@ -13,10 +15,12 @@ from .settings import SettingsScreen
 
 
 class BrainBoost(App):
-    def __init__(self, database_url=DATABASE_URL, **kwargs):
+    def __init__(self, database_url=DATABASE_URL, journal_path=JOURNAL_PATH, **kwargs):
         super(BrainBoost, self).__init__(**kwargs)
         # Initialize database
-        self.session_manager = GameManager(database_url)
+        self.session_manager = GameManager(database_url, journal_path)
+        # the first start calibrates the bcrypt cost of this machine
+        self.session_manager.credentials.configure_rounds()
         self.translation = Translator()
 
     def build(self):
@@ -67,9 +71,14 @@ class BrainBoost(App):
         return sm
 
     def on_stop(self):
-        # Clean up database session when app closes
-        if hasattr(self, "db_session"):
-            self.db_session.close()
+        # Release the chain bank, commit queued writes and clean up database
+        # session when app closes, statistics of the queries are saved when the profile collects them
+        self.root.get_screen(ResultKeeperScreen.NAME_SCREEN).close()
+        self.session_manager.credentials.close(wait=False)
+        self.session_manager.leaderboard.close()
+        self.session_manager.db.close()
+        if INSTRUMENTATION.stats():
+            INSTRUMENTATION.dump(QUERY_STATS_PATH)
 
 
 if __name__ == "__main__":
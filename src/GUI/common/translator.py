@@ -2,7 +2,7 @@ import json
 import os
 from typing import Dict, Optional
 
-from src.GUI.common.app_config import AppConfig
+from src.config.app_config import AppConfig
 
 
 class Translator:
@@ -6,14 +6,11 @@ from typing import List, Optional, Tuple
 from kivy.clock import Clock
 from kivy.lang import Builder
 
+from src.config.app_config import AppConfig
 from src.db.session import GameManager
 from src.games.mnemonic.associative_chaining import AssociativeChaining
 from src.models.enum_types import PointsCategory
-from src.models.games import (
-    AssociativeChangingModel,
-    AssociativeChangingSessionModel,
-    GameName,
-)
+from src.models.games import GameName
 
 from .base_game_screen import BaseGamaScreen
 
@@ -83,8 +80,16 @@ class AssociativeChainingScreen(BaseGamaScreen):
 
     def initialize_game_state(self):
         self.find_innit_level(PointsCategory.FIRST_ASSOCIATIVE_CHANGING.value[1])
+        language = self.session_manager.current_session.language
         self.associative_chaining = AssociativeChaining(
-            self.init_level, self.session_manager.current_session.language
+            self.init_level,
+            language,
+            # answers with typos get part of the points, see the settings
+            max_distance=int(AppConfig.get("Settings", "max_distance", 0)),
+            # avoid the words the user has seen lately
+            seen=self.session_manager.seen_words(language),
+            # and bring back the words due for a review
+            scheduler=self.session_manager.review_scheduler(language),
         )
         self.game = self.associative_chaining.run()
 
@@ -176,33 +181,12 @@ class AssociativeChainingScreen(BaseGamaScreen):
             )
 
     def save_stats(self):
-        user_session = self.session_manager.current_session
         game_stats = self.associative_chaining.get_stats()
-        started_level = game_stats.get("started_level")
-        finished_level = game_stats.get("finished_level")
-        earned_point = game_stats.get("points_earned")
-
-        game = user_session.stats.get(self.NAME_GAME.value)
-        # Save session stats
-        self.session_manager.db.add_record(
-            AssociativeChangingSessionModel,
-            associative_changing_id=game.id,
-            duration=self.time,
-            memorization_time=self.time_press_start,
-            **game_stats,
+        self.session_manager.record_result(
+            self.NAME_GAME,
+            {
+                **game_stats,
+                "duration": self.time,
+                "memorization_time": self.time_press_start,
+            },
         )
-
-        self.session_manager.db.add_points_for_game(
-            user_id=user_session.id,
-            point=earned_point,
-            category=PointsCategory.GAME_ASSOCIATIVE_CHANGING,
-        )
-        if started_level < finished_level:
-            # update level
-            self.session_manager.db.update_record(
-                AssociativeChangingModel, game.id, {"level": finished_level}
-            )
-            # update level in current session
-            self.session_manager.update_level_of_game(self.NAME_GAME, finished_level)
-        # update points in current session
-        self.session_manager.update_point(earned_point)
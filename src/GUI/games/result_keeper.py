@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 from kivy.clock import Clock
@@ -5,9 +6,9 @@ from kivy.lang import Builder
 
 from src.db.session import GameManager
 from src.games.math import ResultKeeper
+from src.games.math.bank import BankCursor, BankedChains, cursor_path, open_bank
 from src.models.enum_types import GameName, PointsCategory
 
-from ...models.games import ResultKeeperModel, ResultKeeperSessionModel
 from .base_game_screen import BaseGamaScreen
 
 # Load the kv file
@@ -29,6 +30,13 @@ class ResultKeeperScreen(BaseGamaScreen):
         super(ResultKeeperScreen, self).__init__(session_manager, translation, **kwargs)
 
         self.result_keeper = None
+        # chains generated offline, when the bank is built
+        self.bank = open_bank()
+        self.bank_cursor = None
+        # the chain of the next round is generated while the current one is played
+        self.prefetch = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="result-keeper"
+        )
         self.time_left = ResultKeeperScreen.TIME_LEFT  # 60 seconds for the game
         self.countdown = 3
 
@@ -63,7 +71,15 @@ class ResultKeeperScreen(BaseGamaScreen):
         """Initialize or reset the game state"""
         self.find_innit_level(PointsCategory.FIRST_RESULT_KEEPER.value[1])
 
-        self.result_keeper = ResultKeeper(self.init_level)
+        banked_chains = None
+        if self.bank:
+            self.bank_cursor = BankCursor(
+                self.session_manager.current_session.id, cursor_path(self.bank.path)
+            )
+            banked_chains = BankedChains(self.bank, self.bank_cursor)
+        self.result_keeper = ResultKeeper(
+            self.init_level, bank=banked_chains, executor=self.prefetch
+        )
         self.info_label.text = self.get_label_with_variables(
             self.NAME_SCREEN, "info_label", lives=self.result_keeper.lives_left
         )
@@ -188,44 +204,17 @@ class ResultKeeperScreen(BaseGamaScreen):
 
     def save_stats(self):
         """
-        Method updates the record of the table and current stats. In the following steps:
-            1. Add new GameSession
-            2. Update User's points
-            3. If user level up then:
-                a. Update the level field in GameLevel mode
-                b. Update the level in the current session
-            4. Update points in the current session
+        Method saves the result of the game and refreshes the current session
+        (points and level when user level up).
         """
-        user_session = self.session_manager.current_session
         game_stats = self.result_keeper.get_stats()
-        started_level = game_stats.get("started_level")
-        finished_level = game_stats.get("finished_level")
-        earned_point = game_stats.get("points_earned")
-
-        game = user_session.stats.get(self.NAME_GAME.value)
-        # Save session stats
-        self.session_manager.db.add_record(
-            ResultKeeperSessionModel,
-            result_keeper_id=game.id,
-            duration=ResultKeeperScreen.TIME_LEFT - self.time_left,
-            **game_stats,
+        if self.bank_cursor:
+            self.bank_cursor.save()
+        self.session_manager.record_result(
+            self.NAME_GAME,
+            {**game_stats, "duration": ResultKeeperScreen.TIME_LEFT - self.time_left},
         )
 
-        self.session_manager.db.add_points_for_game(
-            user_id=user_session.id,
-            point=earned_point,
-            category=PointsCategory.GAME_RESULT_KEEPER,
-        )
-        if started_level < finished_level:
-            # update level
-            self.session_manager.db.update_record(
-                ResultKeeperModel, game.id, {"level": finished_level}
-            )
-            # update level in current session
-            self.session_manager.update_level_of_game(self.NAME_GAME, finished_level)
-        # update points in current session
-        self.session_manager.update_point(earned_point)
-
     def generate_ending_message(self, is_time_over):
         """Generate the ending message based on the game outcome"""
         message = ""
@@ -240,3 +229,10 @@ class ResultKeeperScreen(BaseGamaScreen):
             level=self.result_keeper.level,
         )
         return message
+
+    def close(self):
+        """Stop generating the next chains and release the bank of chains"""
+        self.prefetch.shutdown(wait=False, cancel_futures=True)
+        if self.bank:
+            self.bank.close()
+            self.bank = None
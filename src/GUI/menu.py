@@ -1,5 +1,6 @@
 from functools import partial
 
+from kivy.clock import Clock
 from kivy.uix.button import Button
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.label import Label
@@ -7,7 +8,9 @@ from kivy.uix.label import Label
 from src.db.session import GameManager
 from src.models.enum_types import GameName, PointsCategory
 
+from ..db.db import Operation
 from ..models.games import AssociativeChangingModel, ResultKeeperModel
+from ..models.user import PointsModel
 from .base_screen import BaseScreen
 
 
@@ -61,17 +64,40 @@ class MenuScreen(BaseScreen):
     def on_enter(self, *args) -> None:
         """
         Before entering screen:
-            * update welcome message
+            * update welcome message with the rank on the global leaderboard
         """
         super(MenuScreen, self).on_enter(name_screen="menu")
-        # Update welcome message
+        leaderboard = self.session_manager.leaderboard
+        if not leaderboard.ready:
+            # the boards are read from the database off the UI thread, the rank is
+            # shown when they are ready
+            leaderboard.rebuild_in_background(
+                lambda: Clock.schedule_once(lambda dt: self.update_welcome_message(), 0)
+            )
+        self.update_welcome_message()
+
+    def update_welcome_message(self) -> None:
+        if self.manager is None or self.manager.current != self.name:
+            return
         points = self.session_manager.current_session.point
         username = self.session_manager.current_session.username
+        leaderboard = self.session_manager.leaderboard
+        rank = (
+            leaderboard.rank(self.session_manager.current_session.id)
+            if leaderboard.ready
+            else None
+        )
         self.welcome_message.text = self.get_message_with_variables(
-            "menu", "user_info", points=points, username=username
+            "menu",
+            "user_info",
+            points=points,
+            username=username,
+            rank=f"#{rank}" if rank else "-",
         )
 
     def go_back(self, instance) -> None:
+        # make sure the results of the last games are saved
+        self.session_manager.db.flush()
         del self.session_manager.current_session
         self.manager.current = "login"
 
@@ -84,13 +110,16 @@ class MenuScreen(BaseScreen):
         level = self.session_manager.get_level_game(game_name)
         game_id = self.session_manager.get_id_game(game_name)
         if level is None:
-            # update PointModel
-            self.session_manager.db.add_points_for_first_game(
-                user_id=self.session_manager.current_session.id,
-                category=points_category,
+            # update PointModel and record GameModel
+            self.session_manager.db.enqueue(
+                Operation.add(
+                    PointsModel,
+                    user_id=self.session_manager.current_session.id,
+                    point=points_category.value[1],
+                    category=points_category.value[0],
+                ),
+                Operation.update(model, game_id, {"level": 1}),
             )
-            # Update record GameModel
-            self.session_manager.db.update_record(model, game_id, {"level": 1})
             # Update level current session
             self.session_manager.update_level_of_game(game_name, 1)
 
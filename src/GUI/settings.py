@@ -3,12 +3,16 @@ from kivy.uix.gridlayout import GridLayout
 from kivy.uix.label import Label
 from kivy.uix.spinner import Spinner
 
+from src.config.app_config import AppConfig
 from src.db.session import GameManager
 from src.models.enum_types import Language
 from src.models.user import User
 
 from .base_screen import BaseScreen
 
+# edits allowed in the answers of AssociativeChaining, 0 turns the fuzzy matching off
+MAX_DISTANCES = ("0", "1", "2")
+
 
 class SettingsScreen(BaseScreen):
     def __init__(self, session_manager: GameManager, translation, **kwargs) -> None:
@@ -44,6 +48,24 @@ class SettingsScreen(BaseScreen):
         self.language_layout.add_widget(self.language_spinner)
         self.layout.add_widget(self.language_layout)
 
+        # Typo tolerance of AssociativeChaining
+        self.max_distance_layout = GridLayout(cols=2, size_hint=(1, 0.2))
+        self.max_distance_label = Label(
+            text=self.translation.get_labels_text("settings", "max_distance_label"),
+            size_hint=(0.5, 1),
+        )
+        self.max_distance_spinner = Spinner(
+            text=MAX_DISTANCES[0],
+            values=MAX_DISTANCES,
+            size_hint=(0.5, 0.3),
+            background_color=(0.2, 0.6, 0.8, 1),
+            color=(1, 1, 1, 1),
+            pos_hint={"center_x": 0.5, "center_y": 0.4},
+        )
+        self.max_distance_layout.add_widget(self.max_distance_label)
+        self.max_distance_layout.add_widget(self.max_distance_spinner)
+        self.layout.add_widget(self.max_distance_layout)
+
         # User info section
         self.user_info = Label(text="", size_hint=(1, 0.3))
         self.layout.add_widget(self.user_info)
@@ -72,6 +94,7 @@ class SettingsScreen(BaseScreen):
     def on_enter(self, *args):
         super().on_enter(name_screen="settings", *args)
         self.language_spinner.text = self.session_manager.get_language()
+        self.max_distance_spinner.text = AppConfig.get("Settings", "max_distance", "0")
 
     # Button events
     def back_to_menu(self, instance):
@@ -91,6 +114,7 @@ class SettingsScreen(BaseScreen):
             - Update current language in the translation.
             - Update labels.
             - Show success message.
+        A changed typo tolerance is saved in the local config file.
         """
         message = ""
         if self.language_spinner.text != self.session_manager.get_language():
@@ -108,6 +132,17 @@ class SettingsScreen(BaseScreen):
             )
             message += self.get_message_with_variables("settings", "changed_language")
 
+        if self.max_distance_spinner.text != AppConfig.get(
+            "Settings", "max_distance", "0"
+        ):
+            AppConfig.save_local(
+                "Settings", "max_distance", self.max_distance_spinner.text
+            )
+            message += "\n" if message else ""
+            message += self.get_message_with_variables(
+                "settings", "changed_max_distance"
+            )
+
         if message:
             self.info_label.text = (
                 self.get_message_with_variables("settings", "saved_settings")
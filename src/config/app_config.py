@@ -0,0 +1,48 @@
+import os
+from configparser import ConfigParser
+from pathlib import Path
+
+
+class AppConfig:
+    """
+    Class for reading and modifying config files. Values measured on this machine
+    (e.g. the bcrypt cost) are saved in the local config file, which isn't tracked
+    by git and overrides the shared config file.
+    """
+
+    CONFIG_FILE = os.path.join(Path.cwd(), Path("src/config/config.ini"))
+    LOCAL_CONFIG_FILE = os.path.join(Path.cwd(), Path("src/config/local.ini"))
+    config = ConfigParser()
+
+    @staticmethod
+    def load_settings():
+        AppConfig.config.read(AppConfig.CONFIG_FILE)
+        return AppConfig.config["Settings"]
+
+    @staticmethod
+    def get(section, key, fallback=None):
+        AppConfig.config.read([AppConfig.CONFIG_FILE, AppConfig.LOCAL_CONFIG_FILE])
+        return AppConfig.config.get(section, key, fallback=fallback)
+
+    @staticmethod
+    def save_settings(key, value):
+        AppConfig.save("Settings", key, value)
+
+    @staticmethod
+    def save(section, key, value):
+        AppConfig._save(AppConfig.CONFIG_FILE, section, key, value)
+
+    @staticmethod
+    def save_local(section, key, value):
+        AppConfig._save(AppConfig.LOCAL_CONFIG_FILE, section, key, value)
+
+    @staticmethod
+    def _save(path, section, key, value):
+        # only the values of the file itself, not the ones merged by 'get'
+        config = ConfigParser()
+        config.read(path)
+        if section not in config:
+            config[section] = {}
+        config[section][key] = value
+        with open(path, "w") as configfile:
+            config.write(configfile)
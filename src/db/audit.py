@@ -0,0 +1,195 @@
+"""
+Integrity audit of the stored games: every session with a seed is replayed from its seed
+and answers, sessions whose replay earns other points than the stored 'points_earned'
+are reported.
+
+Usage:
+    python -m src.db.audit [--database-url sqlite:///db.sqlite] [--workers 4]
+
+Sessions are read in pages by id and replayed in a process pool, at most a few pages are
+in flight at a time, so the memory doesn't grow with the number of rows.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from sqlalchemy import Engine, func, select
+
+from ..games.replay import (
+    parse_answers,
+    parse_due_words,
+    parse_user_answers,
+    parse_word_ids,
+    replay_associative_changing,
+    replay_result_keeper,
+)
+from ..models.enum_types import GameName
+from .db import DATABASE_URL, engine, read_only_engine
+from .session import GAME_RECORDS
+
+# columns of the session rows needed by the replay of every game
+REPLAY_COLUMNS = {
+    GameName.RESULT_KEEPER: ("answers",),
+    GameName.ASSOCIATIVE_CHANGING: (
+        "language",
+        "words",
+        "user_answers",
+        "max_distance",
+        "word_ids",
+        "due_words",
+    ),
+}
+
+
+@dataclass
+class Mismatch:
+    game: GameName
+    session_id: int
+    points_earned: int
+    replayed_points: int
+    # False when the replay asked other questions, e.g. the words file has changed
+    same_questions: bool = True
+
+
+@dataclass
+class AuditReport:
+    checked: int = 0
+    not_replayable: int = 0
+    mismatches: List[Mismatch] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def sessions_per_second(self) -> float:
+        return self.checked / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f"Replayed {self.checked} sessions in {self.elapsed:.2f}s "
+            f"({self.sessions_per_second:.0f} sessions/s), "
+            f"{len(self.mismatches)} mismatched, "
+            f"{self.not_replayable} without a seed"
+        )
+
+
+def replay_session(game: GameName, row: Dict[str, Any]) -> Optional[Mismatch]:
+    """Mismatch of the session row, None when the replay agrees with it"""
+    match game:
+        case GameName.RESULT_KEEPER:
+            replay = replay_result_keeper(
+                row["started_level"], row["seed"], parse_answers(row["answers"])
+            )
+            same_questions = True
+        case GameName.ASSOCIATIVE_CHANGING:
+            replay = replay_associative_changing(
+                row["started_level"],
+                row["seed"],
+                row["language"],
+                parse_user_answers(row["user_answers"]),
+                row["max_distance"],
+                parse_word_ids(row["word_ids"]),
+                parse_due_words(row["due_words"]),
+            )
+            same_questions = " ,".join(replay.questions) == row["words"]
+        case _:
+            raise ValueError(f"Game {game} can't be replayed")
+    if replay.points_earned == row["points_earned"] and same_questions:
+        return None
+    return Mismatch(
+        game=game,
+        session_id=row["id"],
+        points_earned=row["points_earned"],
+        replayed_points=replay.points_earned,
+        same_questions=same_questions,
+    )
+
+
+def _replay_page(game: GameName, rows: List[Dict[str, Any]]) -> List[Mismatch]:
+    return [mismatch for row in rows if (mismatch := replay_session(game, row))]
+
+
+def session_pages(
+    db_engine: Engine, game: GameName, page_size: int = 1000
+) -> Iterator[List[Dict[str, Any]]]:
+    """Session rows with a seed, as dicts of the replayed columns, in pages by id"""
+    model = GAME_RECORDS[game].session_model
+    columns = [
+        getattr(model, name)
+        for name in ("id", "seed", "started_level", "points_earned")
+        + REPLAY_COLUMNS[game]
+    ]
+    last_id = 0
+    while True:
+        stmt = (
+            select(*columns)
+            .where(model.seed.is_not(None), model.id > last_id)
+            .order_by(model.id)
+            .limit(page_size)
+        )
+        with db_engine.connect() as connection:
+            rows = [dict(row._mapping) for row in connection.execute(stmt)]
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]["id"]
+
+
+def audit_sessions(
+    db_engine: Engine,
+    games: Iterable[GameName] = tuple(GameName),
+    workers: Optional[int] = None,
+    page_size: int = 1000,
+) -> AuditReport:
+    report = AuditReport()
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as executor:
+        for game in games:
+            model = GAME_RECORDS[game].session_model
+            with db_engine.connect() as connection:
+                report.not_replayable += connection.scalar(
+                    select(func.count()).select_from(model).where(model.seed.is_(None))
+                )
+
+            pending: Set[Future] = set()
+            for rows in session_pages(db_engine, game, page_size):
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        report.mismatches.extend(future.result())
+                pending.add(executor.submit(_replay_page, game, rows))
+                report.checked += len(rows)
+            for future in pending:
+                report.mismatches.extend(future.result())
+    report.mismatches.sort(key=lambda mismatch: (mismatch.game, mismatch.session_id))
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay the stored BrainBoost games.")
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--profile", default="desktop")
+    parser.add_argument("--game", choices=[game.value for game in GameName])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    db_engine = read_only_engine(args.database_url, args.profile) or engine(
+        args.database_url, args.profile
+    )
+    games = [GameName(args.game)] if args.game else list(GameName)
+    report = audit_sessions(db_engine, games, args.workers, args.page_size)
+    for mismatch in report.mismatches:
+        print(
+            f"{mismatch.game.value} session {mismatch.session_id}: "
+            f"stored {mismatch.points_earned} points, replayed {mismatch.replayed_points}"
+            + ("" if mismatch.same_questions else ", other questions")
+        )
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,688 @@
-from sqlalchemy import Engine, create_engine, update
-from sqlalchemy.orm import sessionmaker
+import datetime
+import json
+import logging
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from sqlalchemy import Engine, create_engine, delete, make_url, select, update
+from sqlalchemy.exc import (
+    ArgumentError,
+    CompileError,
+    DataError,
+    DBAPIError,
+    IntegrityError,
+    InterfaceError,
+    OperationalError,
+    StatementError,
+)
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
 
 from src.models.enum_types import GameName, PointsCategory
 
-from ..models.games import AssociativeChangingModel, ResultKeeperModel
-from ..models.user import PointsModel, User
+from ..models.games import (
+    AssociativeChangingModel,
+    AssociativeChangingReviewModel,
+    AssociativeChangingSeenModel,
+    AssociativeChangingSessionModel,
+    ResultKeeperModel,
+    ResultKeeperSessionModel,
+)
+from ..models.journal import JournalGroupModel
+from ..models.ledger import notify, recalculate_points
+from ..models.user import Login, PointsModel, User
 from ..user.session import hash_password
+from .directory import UserDirectory
+from .profiles import EngineProfile, get_profile
 
 DATABASE_URL = "sqlite:///db.sqlite"
+JOURNAL_PATH = "db.journal"
+
+logger = logging.getLogger(__name__)
+
+# errors of the data of a group, it fails the same way every time it's committed
+DATA_ERRORS = (
+    IntegrityError,
+    DataError,
+    StatementError,
+    CompileError,
+    ArgumentError,
+    ValueError,
+    KeyError,
+    TypeError,
+)
+# first delay (s) of the retries of a batch when the database is unavailable, and the
+# longest one
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 30.0
 
+# Models which can be written through an Operation, looked up by class name
+MODELS = {
+    model.__name__: model
+    for model in (
+        User,
+        Login,
+        PointsModel,
+        ResultKeeperModel,
+        ResultKeeperSessionModel,
+        AssociativeChangingModel,
+        AssociativeChangingSessionModel,
+        AssociativeChangingSeenModel,
+        AssociativeChangingReviewModel,
+    )
+}
 
-def engine(database_url: str = DATABASE_URL) -> Engine:
-    engine = create_engine(database_url, echo=True)
+
+def engine(
+    database_url: str = DATABASE_URL,
+    profile: Union[str, EngineProfile, None] = None,
+) -> Engine:
+    profile = get_profile(profile)
+    engine = create_engine(database_url, echo=profile.echo)
+    profile.install(engine)
     return engine
 
 
+def read_only_engine(
+    database_url: str = DATABASE_URL,
+    profile: Union[str, EngineProfile, None] = None,
+    pool_size: int = 4,
+) -> Optional[Engine]:
+    """
+    Engine with a pool of read-only connections ('mode=ro') to the same database file.
+    Returns None for in-memory databases, which can't be opened twice.
+    """
+    url = make_url(database_url)
+    database = url.database
+    if not database or database == ":memory:" or database.startswith("file:"):
+        return None
+    profile = get_profile(profile)
+    url = url.set(
+        database=f"file:{Path(database).resolve()}",
+        query={"mode": "ro", "uri": "true"},
+    )
+    read_engine = create_engine(url, echo=profile.echo, pool_size=pool_size)
+    profile.install(read_engine, read_only=True)
+    return read_engine
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+@dataclass
+class Operation:
+    """
+    A single write which can be stored in the journal: insert of a new record ("add"),
+    update of the record with given id ("update") or update of the record with given
+    values of the 'keys' fields, inserted when there is none ("upsert").
+    """
+
+    kind: str
+    model: str
+    fields: Dict[str, Any] = field(default_factory=dict)
+    id: Optional[int] = None
+    keys: Optional[List[str]] = None
+
+    @classmethod
+    def add(cls, model, **kwargs) -> "Operation":
+        """
+        Create an insert operation. The record is built immediately, so default values
+        like 'finished_datetime' are taken when the operation is created, not when it is committed.
+        """
+        record = model(**kwargs)
+        fields = {}
+        for name in model.model_fields:
+            value = getattr(record, name)
+            if value is not None:
+                fields[name] = _encode_value(value)
+        return cls(kind="add", model=model.__name__, fields=fields)
+
+    @classmethod
+    def update(cls, model, id: int, fields: dict) -> "Operation":
+        return cls(
+            kind="update",
+            model=model.__name__,
+            fields={key: _encode_value(value) for key, value in fields.items()},
+            id=id,
+        )
+
+    @classmethod
+    def upsert(cls, model, keys: dict, fields: dict) -> "Operation":
+        return cls(
+            kind="upsert",
+            model=model.__name__,
+            fields={
+                key: _encode_value(value) for key, value in {**keys, **fields}.items()
+            },
+            keys=list(keys),
+        )
+
+    def apply(self, session: Session) -> None:
+        model = MODELS[self.model]
+        match self.kind:
+            case "add":
+                session.add(model.model_validate(self.fields))
+            case "update":
+                stmt = update(model).where(model.id == self.id).values(**self.fields)
+                session.execute(stmt)
+            case "upsert":
+                record = model.model_validate(self.fields)
+                # values of the model types, e.g. datetime from the isoformat
+                values = {key: getattr(record, key) for key in self.fields}
+                stmt = (
+                    update(model)
+                    .where(*(getattr(model, key) == values[key] for key in self.keys))
+                    .values(
+                        **{
+                            key: value
+                            for key, value in values.items()
+                            if key not in self.keys
+                        }
+                    )
+                )
+                if not session.execute(stmt).rowcount:
+                    session.add(record)
+            case _:
+                raise ValueError(f"Invalid operation: {self.kind}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "model": self.model,
+            "fields": self.fields,
+            "id": self.id,
+            "keys": self.keys,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Operation":
+        return cls(**data)
+
+
+@dataclass
+class Group:
+    """Operations committed together, with the id which marks the group as committed"""
+
+    operations: List[Operation]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "ops": [op.to_dict() for op in self.operations]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Group":
+        operations = [Operation.from_dict(op) for op in data["ops"]]
+        # groups journaled before they had ids get a new one
+        if "id" not in data:
+            return cls(operations)
+        return cls(operations, data["id"])
+
+
+def is_data_error(error: Exception) -> bool:
+    """
+    The group can't be committed because of its data. Other errors, e.g. a locked database,
+    a full disk or a dropped connection, can go away and the group is committed later.
+    """
+    if isinstance(error, (OperationalError, InterfaceError)) or (
+        isinstance(error, DBAPIError) and error.connection_invalidated
+    ):
+        return False
+    return isinstance(error, DATA_ERRORS)
+
+
+class WriteBehindQueue:
+    """
+    Durable write-behind queue for the database.
+
+    Callers enqueue groups of operations (e.g. session row, points row and level update of one game).
+    Each group is appended to a local journal file before 'enqueue' returns, so nothing queued is lost
+    when the application crashes. A background thread commits the queued groups in batches, many groups
+    per transaction, and appends an acknowledgement of them to the journal afterward. Groups which
+    aren't acknowledged are replayed when the queue is created again.
+
+    Every group is committed together with its id in 'journal_group_table', so a group committed
+    before a crash, but not acknowledged, is skipped by the replay: each group is applied once.
+
+    A group whose data can't be committed is written to the '.rejected' file next to the journal.
+    When the database is unavailable the groups stay in the queue and the writer retries them,
+    waiting longer after every failure; the groups left at close are replayed at the next start.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        journal_path: str = JOURNAL_PATH,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        fsync: bool = True,
+        write_lock: Optional[threading.RLock] = None,
+        on_commit: Optional[Callable[[List[Operation]], None]] = None,
+        retry_delay: float = RETRY_DELAY,
+    ):
+        """'on_commit' is called by the writer with the operations of the groups of every
+        transaction, after the commit and before 'write_lock' is released"""
+        self.session_factory = session_factory
+        self.write_lock = write_lock or threading.RLock()
+        self.on_commit = on_commit
+        self.journal_path = Path(journal_path)
+        self.rejected_path = self.journal_path.with_name(
+            self.journal_path.name + ".rejected"
+        )
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.retry_delay = retry_delay
+
+        self._condition = threading.Condition()
+        # guards the journal file, taken before '_condition' when both are needed
+        self._journal_lock = threading.Lock()
+        self._pending: List[Group] = []
+        self._flush_requested = False
+        self._closed = False
+        # error of the last commit when the database is unavailable
+        self._failure: Optional[Exception] = None
+
+        self._pending.extend(self._read_journal())
+        self._rewrite_journal()
+        self._forget_committed()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._thread = threading.Thread(
+            target=self._run, name="db-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Number of groups which are not committed yet"""
+        with self._condition:
+            return len(self._pending)
+
+    def enqueue(self, operations: Iterable[Operation]) -> None:
+        """Journal the group of operations and queue it for the background writer"""
+        operations = list(operations)
+        if not operations:
+            return
+        group = Group(operations)
+        # the writer only appends short acknowledgements to the journal without fsync,
+        # so the caller waits for its own write only
+        with self._journal_lock:
+            if self._closed:
+                raise RuntimeError("Write-behind queue is closed")
+            self._write_line(group.to_dict(), fsync=self.fsync)
+            with self._condition:
+                self._pending.append(group)
+                self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every queued group is committed.
+        Returns False when 'timeout' expired before the queue was drained or the database
+        is unavailable, the groups stay in the queue.
+        """
+        with self._condition:
+            self._flush_requested = True
+            self._failure = None
+            self._condition.notify_all()
+            self._condition.wait_for(
+                lambda: not self._pending or self._failure is not None, timeout
+            )
+            self._flush_requested = False
+            return not self._pending
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Commit everything left in the queue and stop the background writer"""
+        self.flush(timeout)
+        with self._journal_lock, self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        self._journal.close()
+
+    # Journal
+
+    def _write_line(self, data: Dict[str, Any], fsync: bool) -> None:
+        self._journal.write(json.dumps(data) + "\n")
+        self._journal.flush()
+        if fsync:
+            os.fsync(self._journal.fileno())
+
+    def _read_journal(self) -> List[Group]:
+        if not self.journal_path.exists():
+            return []
+        groups: Dict[str, Group] = {}
+        with open(self.journal_path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line can be cut off by a crash in the middle of a write
+                    logger.warning("Skipping damaged journal line: %r", line)
+                    continue
+                if "ack" in data:
+                    for group_id in data["ack"]:
+                        groups.pop(group_id, None)
+                    continue
+                group = Group.from_dict(data)
+                groups[group.id] = group
+        if groups:
+            logger.info("Recovered %s groups from %s", len(groups), self.journal_path)
+        return list(groups.values())
+
+    def _rewrite_journal(self) -> None:
+        """Compact the journal to the pending groups, before the writer starts"""
+        tmp_path = self.journal_path.with_name(self.journal_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            for group in self._pending:
+                file.write(json.dumps(group.to_dict()) + "\n")
+            file.flush()
+            if self.fsync:
+                os.fsync(file.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def _acknowledge(self, groups: List[Group]) -> None:
+        """
+        Mark the groups as done in the journal. No fsync: an acknowledgement lost in a crash
+        only makes the replay skip the group by its committed id. The journal is truncated
+        once every group is done.
+        """
+        with self._journal_lock:
+            with self._condition:
+                drained = not self._pending
+            if drained:
+                self._journal.truncate(0)
+            else:
+                self._write_line({"ack": [group.id for group in groups]}, fsync=False)
+
+    def _forget_committed(self) -> None:
+        """
+        Remove the ids of the committed groups which can't be replayed anymore, i.e. which
+        aren't in the journal compacted at start.
+        """
+        pending = [group.id for group in self._pending]
+        with self.write_lock, self.session_factory() as session:
+            session.execute(
+                delete(JournalGroupModel).where(JournalGroupModel.id.not_in(pending))
+            )
+            session.commit()
+
+    def _reject(self, group: Group, error: Exception) -> None:
+        logger.error("Rejected journal group %s: %s", group.to_dict(), error)
+        with open(self.rejected_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps({**group.to_dict(), "error": str(error)}) + "\n")
+
+    # Writer
+
+    def _commit(self, groups: List[Group]) -> None:
+        with self.write_lock, self.session_factory() as session:
+            committed = set(
+                session.scalars(
+                    select(JournalGroupModel.id).where(
+                        JournalGroupModel.id.in_([group.id for group in groups])
+                    )
+                )
+            )
+            applied = []
+            for group in groups:
+                if group.id in committed:
+                    logger.info("Skipping group %s committed before", group.id)
+                    continue
+                for operation in group.operations:
+                    operation.apply(session)
+                session.add(JournalGroupModel(id=group.id))
+                applied.append(group)
+            session.commit()
+            if applied and self.on_commit:
+                self._notify(applied)
+
+    def _commit_batch(self, batch: List[Group]) -> Tuple[int, Optional[Exception]]:
+        """
+        Commit the batch, group by group when it fails, and reject the groups with invalid data.
+        An error which can go away stops the commit, the rest of the batch is retried later.
+        Returns the number of the groups done (committed or rejected) and the error which
+        stopped the commit.
+        """
+        try:
+            self._commit(batch)
+            return len(batch), None
+        except Exception as e:
+            logger.warning("Batch commit failed, retrying group by group: %s", e)
+        for done, group in enumerate(batch):
+            try:
+                self._commit([group])
+            except Exception as e:
+                if not is_data_error(e):
+                    return done, e
+                self._reject(group, e)
+        return len(batch), None
+
+    def _notify(self, groups: List[Group]) -> None:
+        try:
+            self.on_commit(
+                [operation for group in groups for operation in group.operations]
+            )
+        except Exception:
+            # the groups are committed, the writer goes on
+            logger.exception("Commit callback failed")
+
+    def _run(self) -> None:
+        delay = self.retry_delay
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                # group commit: give other groups a moment to join the batch
+                if len(self._pending) < self.batch_size and not (
+                    self._flush_requested or self._closed
+                ):
+                    self._condition.wait(self.flush_interval)
+                batch = self._pending[: self.batch_size]
+
+            done, error = self._commit_batch(batch)
+            with self._condition:
+                del self._pending[:done]
+                self._failure = error
+                self._condition.notify_all()
+            if done:
+                self._acknowledge(batch[:done])
+            if error is None:
+                delay = self.retry_delay
+                continue
+
+            logger.warning("Database unavailable, retrying in %.1f s: %s", delay, error)
+            with self._condition:
+                # 'flush' retries at once
+                self._condition.wait_for(
+                    lambda: self._closed or self._flush_requested, delay
+                )
+                if self._closed:
+                    # the groups left in the journal are replayed at the next start
+                    return
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+
+
 class DBManager:
-    def __init__(self, database_url: str = DATABASE_URL):
-        self.engine = engine(database_url)
-        self.session = sessionmaker(bind=self.engine)()
+    """
+    Access to the database, safe to use from many threads.
+
+    Every thread gets its own session ('session' is a scoped session). Writes go through
+    the writer engine and are serialized by 'write_lock'; reports and history can use
+    'read_session', which takes a connection from the pool of read-only connections,
+    so they run concurrently with game writes (the database is in WAL mode).
+    """
+
+    def __init__(
+        self,
+        database_url: str = DATABASE_URL,
+        journal_path: Optional[str] = None,
+        profile: Union[str, EngineProfile, None] = None,
+        readers: int = 4,
+    ):
+        self.engine = engine(database_url, profile)
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.session = scoped_session(self.session_factory)
+        self.write_lock = threading.RLock()
+
+        self.read_engine = read_only_engine(database_url, profile, readers)
+        if self.read_engine:
+            # the writer creates the database file and switches the journal mode
+            # before the first read-only connection is opened
+            with self.engine.connect():
+                pass
+        self.read_session_factory = sessionmaker(
+            bind=self.read_engine or self.engine, expire_on_commit=False
+        )
+
+        # users by username for the login and account creation
+        self.users = UserDirectory(self)
+        # callbacks notified about the committed operations, e.g. leaderboards
+        self._commit_listeners: List[Callable[[List[Operation]], None]] = []
+        # writes are committed synchronously when there is no journal
+        self.write_behind = (
+            WriteBehindQueue(
+                self.session_factory,
+                journal_path,
+                write_lock=self.write_lock,
+                on_commit=self._on_commit,
+            )
+            if journal_path
+            else None
+        )
+
+    @contextmanager
+    def read_session(self) -> Iterator[Session]:
+        """Session for queries only, e.g. reports, leaderboards and history"""
+        session = self.read_session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
 
     def find_record(self, model, **kwargs):
         return self.session.query(model).filter_by(**kwargs).first()
 
     def add_record(self, model, **kwargs):
         record = model(**kwargs)
-        self.session.add(record)
-        self.session.commit()
+        with self.write_lock:
+            self.session.add(record)
+            self.session.commit()
+        if model is User:
+            self.users.invalidate(kwargs.get("username"))
 
     def update_record(self, model, id: int, fields: dict):
         stmt = update(model).where(model.id == id).values(**fields)
-        self.session.execute(stmt)
-        self.session.commit()
+        with self.write_lock:
+            self.session.execute(stmt)
+            self.session.commit()
+        if model is User:
+            self.users.invalidate(user_id=id)
 
     def rollback(self):
         self.session.rollback()
 
+    def apply_operations(self, operations: Iterable[Operation]) -> None:
+        """Write all operations in one transaction"""
+        operations = list(operations)
+        with self.write_lock:
+            try:
+                for operation in operations:
+                    operation.apply(self.session)
+                self.session.commit()
+            except:
+                self.session.rollback()
+                raise
+            self._on_commit(operations)
+
+    def add_commit_listener(self, listener: Callable[[List[Operation]], None]) -> None:
+        self._commit_listeners.append(listener)
+
+    def remove_commit_listener(
+        self, listener: Callable[[List[Operation]], None]
+    ) -> None:
+        if listener in self._commit_listeners:
+            self._commit_listeners.remove(listener)
+
+    def _on_commit(self, operations: List[Operation]) -> None:
+        """
+        Called with the committed operations while 'write_lock' is held, so the listeners
+        get them in the order of the commits
+        """
+        self._invalidate_users(operations)
+        for listener in list(self._commit_listeners):
+            try:
+                listener(operations)
+            except Exception:
+                logger.exception("Commit listener failed")
+
+    def _invalidate_users(self, operations: List[Operation]) -> None:
+        """Forget the cached users written by the committed operations"""
+        for operation in operations:
+            if operation.model == User.__name__:
+                self.users.invalidate(
+                    operation.fields.get("username"), user_id=operation.id
+                )
+
+    def enqueue(self, *operations: Operation) -> None:
+        """
+        Write the operations together. They go through the write-behind queue when it is enabled,
+        otherwise they are committed immediately.
+        """
+        if self.write_behind:
+            self.write_behind.enqueue(operations)
+        else:
+            self.apply_operations(operations)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued writes are committed, e.g. before logout"""
+        if not self.write_behind:
+            return True
+        return self.write_behind.flush(timeout)
+
+    def close(self) -> None:
+        if self.write_behind:
+            self.write_behind.close()
+        self.session.remove()
+        if self.read_engine:
+            self.read_engine.dispose()
+        self.engine.dispose()
+
+    def recalculate_points(self, user_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Rebuild users' points from the points table, e.g. after manual fixes. The changes
+        are passed to the ledger listeners like committed points.
+        """
+        with self.write_lock:
+            with self.engine.begin() as connection:
+                deltas = recalculate_points(connection, user_ids)
+            if deltas:
+                notify(self.engine, deltas)
+        self.session.expire_all()
+
     def create_account(self, username: str, password: str):
         # Hash the password
         password = hash_password(password)
+        return self.create_account_with_hash(username, password)
+
+    def create_account_with_hash(self, username: str, password_hash: str):
+        """Create the account when the password is already hashed, e.g. in a worker"""
+        try:
+            with self.write_lock:
+                return self._create_account(username, password_hash)
+        finally:
+            # the username could be cached as missing
+            self.users.invalidate(username)
+
+    def _create_account(self, username: str, password: str):
         try:
             # First create and commit the user
             user = User(username=username, password=password)
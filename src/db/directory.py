@@ -0,0 +1,114 @@
+"""
+User directory: a bounded LRU cache of users keyed by username, used on the login and
+account creation paths. Users are read as plain rows (no model hydration), and unknown
+usernames are cached as well, so repeated "does not exist" checks don't hit the database.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Union
+
+from sqlalchemy import select
+
+from ..models.enum_types import Language
+from ..models.user import User
+
+if TYPE_CHECKING:
+    from .db import DBManager
+
+
+class UserRow(NamedTuple):
+    id: int
+    username: str
+    password: str
+    language: Language
+
+
+# Marks a username which doesn't exist, with the time it was checked
+class _Missing(NamedTuple):
+    checked_at: float
+
+
+class UserDirectory:
+    def __init__(self, db: "DBManager", maxsize: int = 1024, negative_ttl: float = 30):
+        """
+        'negative_ttl' (s) limits how long an unknown username is trusted, accounts
+        created by other processes don't invalidate the cache.
+        """
+        self.db = db
+        self.maxsize = maxsize
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Union[UserRow, _Missing]]" = OrderedDict()
+        self._usernames: Dict[int, str] = {}
+        # changed by every invalidation, rows read before it are not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self, username: str) -> Optional[UserRow]:
+        stmt = select(User.id, User.username, User.password, User.language).where(
+            User.username == username
+        )
+        with self.db.read_session() as session:
+            row = session.execute(stmt).first()
+        return UserRow(*row) if row else None
+
+    def _cached(self, username: str) -> Union[UserRow, _Missing, None]:
+        entry = self._entries.get(username)
+        if isinstance(entry, _Missing) and (
+            time.monotonic() - entry.checked_at > self.negative_ttl
+        ):
+            del self._entries[username]
+            return None
+        if entry is not None:
+            self._entries.move_to_end(username)
+        return entry
+
+    def _store(self, username: str, entry: Union[UserRow, _Missing]) -> None:
+        self._entries[username] = entry
+        self._entries.move_to_end(username)
+        if isinstance(entry, UserRow):
+            self._usernames[entry.id] = username
+        while len(self._entries) > self.maxsize:
+            _, evicted = self._entries.popitem(last=False)
+            if isinstance(evicted, UserRow):
+                self._usernames.pop(evicted.id, None)
+
+    def get(self, username: str) -> Optional[UserRow]:
+        with self._lock:
+            entry = self._cached(username)
+            if entry is not None:
+                self.hits += 1
+                return entry if isinstance(entry, UserRow) else None
+            self.misses += 1
+            generation = self._generation
+        # the database is read outside the lock
+        row = self._load(username)
+        with self._lock:
+            if generation == self._generation:
+                self._store(username, row or _Missing(time.monotonic()))
+        return row
+
+    def exists(self, username: str) -> bool:
+        return self.get(username) is not None
+
+    def invalidate(self, username: Optional[str] = None, user_id: Optional[int] = None):
+        """Forget the user, e.g. after the record was inserted or updated"""
+        with self._lock:
+            self._generation += 1
+            if user_id is not None:
+                username = self._usernames.pop(user_id, username)
+            if username is not None:
+                entry = self._entries.pop(username, None)
+                if isinstance(entry, UserRow):
+                    self._usernames.pop(entry.id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._usernames.clear()
@@ -0,0 +1,248 @@
+"""
+Query instrumentation. Hooks on the engine's cursor executions collect, per statement,
+a latency histogram, the number of affected rows and the places of the application
+which run the statement. Statements slower than the threshold are kept in the slow
+query log together with their EXPLAIN QUERY PLAN.
+
+Usage:
+    INSTRUMENTATION.install(engine)   # done by profiles with 'instrument=True'
+    INSTRUMENTATION.report()          # text summary
+    INSTRUMENTATION.dump("queries.json")
+"""
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Union
+
+from sqlalchemy import Engine, event
+
+# upper bounds of the histogram buckets in ms, the last bucket is unbounded
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+SLOW_QUERY_THRESHOLD = 0.1  # s
+DUMP_PATH = "db_queries.json"
+
+_SRC_DIR = str(Path(__file__).resolve().parents[1])
+_THIS_FILE = str(Path(__file__).resolve())
+
+
+@dataclass
+class StatementStats:
+    statement: str
+    count: int = 0
+    total_time: float = 0  # s
+    max_time: float = 0  # s
+    rows: int = 0  # affected by INSERT/UPDATE/DELETE
+    histogram: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+    call_sites: Counter = field(default_factory=Counter)
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.count if self.count else 0
+
+    def percentile(self, q: float) -> float:
+        """Upper bound (ms) of the bucket holding the 'q' percentile"""
+        threshold, seen = q * self.count, 0
+        for i, amount in enumerate(self.histogram):
+            seen += amount
+            if amount and seen >= threshold:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else float("inf")
+        return 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "statement": self.statement,
+            "count": self.count,
+            "total_time": self.total_time,
+            "mean_time": self.mean_time,
+            "max_time": self.max_time,
+            "rows": self.rows,
+            "histogram": dict(
+                zip([*map(str, BUCKETS_MS), "inf"], self.histogram, strict=True)
+            ),
+            "call_sites": dict(self.call_sites.most_common()),
+        }
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    parameters: str
+    duration: float  # s
+    call_site: str
+    plan: Optional[List[str]]
+    executed_at: float  # unix time
+
+
+def call_site(depth: int = 3) -> str:
+    """
+    The innermost frames of the application (outside SQLAlchemy and this module),
+    e.g. 'src/models/ledger.py:71 apply_point_deltas < src/models/user.py:100 ...'
+    """
+    frames = []
+    frame = sys._getframe(1)
+    while frame and len(frames) < depth:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_SRC_DIR) and filename != _THIS_FILE:
+            path = os.path.relpath(filename, os.path.dirname(_SRC_DIR))
+            frames.append(f"{path}:{frame.f_lineno} {frame.f_code.co_name}")
+        frame = frame.f_back
+    return " < ".join(frames) or "<unknown>"
+
+
+def explain_plan(cursor, statement: str, parameters) -> Optional[List[str]]:
+    """EXPLAIN QUERY PLAN run on the raw DBAPI connection, so no events are fired"""
+    if isinstance(parameters, list):
+        # executemany
+        parameters = parameters[0] if parameters else ()
+    try:
+        plan_cursor = cursor.connection.cursor()
+        try:
+            plan_cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return [row[3] for row in plan_cursor.fetchall()]
+        finally:
+            plan_cursor.close()
+    except Exception:
+        return None
+
+
+class QueryInstrumentation:
+    """Statistics of the statements executed by the installed engines"""
+
+    def __init__(
+        self, slow_query_threshold: float = SLOW_QUERY_THRESHOLD, max_slow: int = 100
+    ):
+        self.slow_query_threshold = slow_query_threshold
+        self._stats: Dict[str, StatementStats] = {}
+        self._slow: Deque[SlowQuery] = deque(maxlen=max_slow)
+        self._lock = threading.Lock()
+        self._engines: List[Engine] = []
+
+    def install(self, engine: Engine) -> None:
+        if engine in self._engines:
+            return
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+        self._engines.append(engine)
+
+    def remove(self, engine: Engine) -> None:
+        if engine not in self._engines:
+            return
+        event.remove(engine, "before_cursor_execute", self._before_execute)
+        event.remove(engine, "after_cursor_execute", self._after_execute)
+        event.remove(engine, "handle_error", self._handle_error)
+        self._engines.remove(engine)
+
+    def _before_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context) -> None:
+        """A failed statement has no 'after_cursor_execute', its start is dropped here"""
+        conn = exception_context.connection
+        if conn is None or exception_context.execution_context is None:
+            return
+        starts = conn.info.get("query_start")
+        if starts:
+            starts.pop()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        site = call_site()
+        rows = max(cursor.rowcount, 0)
+        slow = duration >= self.slow_query_threshold
+        # the plan is read before the lock, EXPLAIN may take a while
+        plan = (
+            explain_plan(cursor, statement, parameters)
+            if slow and conn.dialect.name == "sqlite"
+            else None
+        )
+        with self._lock:
+            stats = self._stats.get(statement)
+            if stats is None:
+                stats = self._stats[statement] = StatementStats(statement)
+            stats.count += 1
+            stats.total_time += duration
+            stats.max_time = max(stats.max_time, duration)
+            stats.rows += rows
+            stats.histogram[bisect_left(BUCKETS_MS, duration * 1000)] += 1
+            stats.call_sites[site] += 1
+            if slow:
+                self._slow.append(
+                    SlowQuery(
+                        statement=statement,
+                        parameters=repr(parameters),
+                        duration=duration,
+                        call_site=site,
+                        plan=plan,
+                        executed_at=time.time(),
+                    )
+                )
+
+    def stats(self) -> List[StatementStats]:
+        """Snapshot of the statistics, the slowest statements (in total) first"""
+        with self._lock:
+            return sorted(
+                (
+                    StatementStats(
+                        statement=s.statement,
+                        count=s.count,
+                        total_time=s.total_time,
+                        max_time=s.max_time,
+                        rows=s.rows,
+                        histogram=list(s.histogram),
+                        call_sites=Counter(s.call_sites),
+                    )
+                    for s in self._stats.values()
+                ),
+                key=lambda s: s.total_time,
+                reverse=True,
+            )
+
+    @property
+    def slow_queries(self) -> List[SlowQuery]:
+        with self._lock:
+            return list(self._slow)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+
+    def report(self, limit: int = 10) -> str:
+        lines = []
+        for stats in self.stats()[:limit]:
+            statement = " ".join(stats.statement.split())
+            lines.append(
+                f"{stats.count:>6}x total {stats.total_time * 1000:.1f}ms "
+                f"mean {stats.mean_time * 1000:.2f}ms "
+                f"p99 <= {stats.percentile(0.99)}ms rows {stats.rows}: {statement[:120]}"
+            )
+            for site, count in stats.call_sites.most_common(3):
+                lines.append(f"        {count:>6}x {site}")
+        for slow in self.slow_queries:
+            lines.append(
+                f"SLOW {slow.duration * 1000:.1f}ms {slow.call_site}: "
+                f"{'; '.join(slow.plan or [])}"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path: Union[str, os.PathLike]) -> None:
+        data = {
+            "slow_query_threshold": self.slow_query_threshold,
+            "statements": [stats.to_dict() for stats in self.stats()],
+            "slow_queries": [asdict(slow) for slow in self.slow_queries],
+        }
+        with open(path, "w") as file:
+            json.dump(data, file, indent=2)
+
+
+# Shared by all engines of the process which are instrumented
+INSTRUMENTATION = QueryInstrumentation()
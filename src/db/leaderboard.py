@@ -0,0 +1,378 @@
+"""
+Leaderboards: the global one over 'User.point' and one per game over the points earned
+in the game sessions. Every board is kept in memory in an indexable skip list, so updates,
+the rank of a user and slices of the board take O(log n).
+"""
+import logging
+import random
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import Engine, func, select
+
+from ..models import ledger
+from ..models.enum_types import GameName
+from ..models.user import PointsModel, User
+from .db import DBManager, Operation
+
+if TYPE_CHECKING:
+    from .session import GameRecord
+
+logger = logging.getLogger(__name__)
+
+
+class _Tail:
+    """Key of the last node, bigger than any other key"""
+
+    def __lt__(self, other) -> bool:
+        return False
+
+    def __eq__(self, other) -> bool:
+        return other is self
+
+    __hash__ = object.__hash__
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.next: List[Optional[_Node]] = [None] * level
+        # number of elements skipped by the link on each level
+        self.width: List[int] = [1] * level
+
+
+class IndexableSkipList:
+    """
+    Sorted list of unique keys. Insert, remove, index of a key and the key at a position
+    take O(log n) on average.
+    """
+
+    MAX_LEVEL = 24
+
+    def __init__(self, seed: Optional[int] = None):
+        self._random = random.Random(seed)
+        # searching never walks past the tail
+        self._tail = _Node(_Tail(), 0)
+        self._head = _Node(None, self.MAX_LEVEL)
+        self._head.next = [self._tail] * self.MAX_LEVEL
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator:
+        node = self._head.next[0]
+        while node is not self._tail:
+            yield node.key
+            node = node.next[0]
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < self.MAX_LEVEL and self._random.random() < 0.5:
+            level += 1
+        return level
+
+    def _find_chain(self, key):
+        """Last node before 'key' on every level and its position"""
+        chain = [self._head] * self.MAX_LEVEL
+        positions = [0] * self.MAX_LEVEL
+        node, position = self._head, 0
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, key) -> None:
+        chain, positions = self._find_chain(key)
+        if chain[0].next[0].key == key:
+            raise KeyError(f"Key {key} already exists")
+        new_node = _Node(key, self._random_level())
+        for level in range(len(new_node.next)):
+            previous = chain[level]
+            # number of elements between 'previous' and the new node
+            steps = positions[0] - positions[level]
+            new_node.next[level] = previous.next[level]
+            new_node.width[level] = previous.width[level] - steps
+            previous.next[level] = new_node
+            previous.width[level] = steps + 1
+        for level in range(len(new_node.next), self.MAX_LEVEL):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key) -> None:
+        chain, _ = self._find_chain(key)
+        node = chain[0].next[0]
+        if node.key != key:
+            raise KeyError(f"Key {key} not found")
+        for level in range(len(node.next)):
+            previous = chain[level]
+            previous.width[level] += node.width[level] - 1
+            previous.next[level] = node.next[level]
+        for level in range(len(node.next), self.MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def index(self, key) -> int:
+        """Position of the key, counted from 0"""
+        chain, positions = self._find_chain(key)
+        if chain[0].next[0].key != key:
+            raise KeyError(f"Key {key} not found")
+        return positions[0]
+
+    def slice(self, start: int, stop: int) -> List:
+        """Keys on positions from 'start' to 'stop' (exclusive)"""
+        start, stop = max(start, 0), min(stop, self._size)
+        if start >= stop:
+            return []
+        # walk to the element at 'start'
+        node, remaining = self._head, start + 1
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.width[level] <= remaining and node.next[level] is not self._tail:
+                remaining -= node.width[level]
+                node = node.next[level]
+        keys = []
+        for _ in range(stop - start):
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+@dataclass
+class LeaderboardEntry:
+    rank: int
+    user_id: int
+    username: Optional[str]
+    score: int
+
+
+class Leaderboard:
+    """Users ordered by score (descending), ties ordered by user id"""
+
+    def __init__(self):
+        self._scores: Dict[int, int] = {}
+        self._usernames: Dict[int, str] = {}
+        self._ranking = IndexableSkipList()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    @staticmethod
+    def _key(user_id: int, score: int):
+        return (-score, user_id)
+
+    def set_username(self, user_id: int, username: str) -> None:
+        self._usernames[user_id] = username
+
+    def set_score(self, user_id: int, score: int, username: Optional[str] = None):
+        if username is not None:
+            self.set_username(user_id, username)
+        if user_id in self._scores:
+            self._ranking.remove(self._key(user_id, self._scores[user_id]))
+        self._scores[user_id] = score
+        self._ranking.insert(self._key(user_id, score))
+
+    def add_score(self, user_id: int, delta: int) -> None:
+        self.set_score(user_id, self._scores.get(user_id, 0) + delta)
+
+    def score(self, user_id: int) -> Optional[int]:
+        return self._scores.get(user_id)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """Position of the user counted from 1, None when the user is not on the board"""
+        if user_id not in self._scores:
+            return None
+        return self._ranking.index(self._key(user_id, self._scores[user_id])) + 1
+
+    def _entries(self, start: int, stop: int) -> List[LeaderboardEntry]:
+        start = max(start, 0)
+        return [
+            LeaderboardEntry(
+                rank=rank,
+                user_id=user_id,
+                username=self._usernames.get(user_id),
+                score=-score,
+            )
+            for rank, (score, user_id) in enumerate(
+                self._ranking.slice(start, stop), start=start + 1
+            )
+        ]
+
+    def top(self, n: int = 10) -> List[LeaderboardEntry]:
+        return self._entries(0, n)
+
+    def around(self, user_id: int, n: int = 5) -> List[LeaderboardEntry]:
+        """The user with 'n' users above and below"""
+        rank = self.rank(user_id)
+        if rank is None:
+            return []
+        return self._entries(rank - 1 - n, rank + n)
+
+
+class LeaderboardService:
+    """
+    Global and per-game leaderboards of the database. The boards are built from SQL
+    (the sums of the points per user) on first use, or in the background with
+    'rebuild_in_background', and then updated incrementally with the committed points:
+    the global board from the ledger, the game boards from the points of the games. The
+    skip lists order the users, so the queries don't rank them.
+    """
+
+    def __init__(self, db: DBManager, records: Dict[GameName, "GameRecord"]):
+        self.db = db
+        self.records = records
+        # game of the points of every game category
+        self._games = {
+            record.points_category.value[0]: game for game, record in records.items()
+        }
+        self._boards: Optional[Dict[Optional[GameName], Leaderboard]] = None
+        self._lock = threading.RLock()
+        self._listening = False
+        self._rebuilding = False
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def ready(self) -> bool:
+        """The boards are built, the queries don't read the database"""
+        return self._boards is not None
+
+    def rebuild(self) -> None:
+        # no points are committed while the boards are read ('write_lock'), the
+        # listeners get the points committed after, the queued ones too
+        with self.db.write_lock:
+            with self._lock:
+                if not self._listening:
+                    ledger.add_listener(self._on_points_committed)
+                    self.db.add_commit_listener(self._on_operations_committed)
+                    self._listening = True
+            boards = self._read_boards()
+            with self._lock:
+                self._boards = boards
+
+    def rebuild_in_background(self, callback: Optional[Callable[[], None]] = None):
+        """
+        Build the boards in a thread, e.g. so the UI isn't blocked; 'callback' is called
+        in the thread when they are ready
+        """
+        with self._lock:
+            if callback:
+                self._callbacks.append(callback)
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(
+            target=self._rebuild_and_notify, name="leaderboard", daemon=True
+        ).start()
+
+    def _rebuild_and_notify(self) -> None:
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("Leaderboards couldn't be built")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+                callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def _read_boards(self) -> Dict[Optional[GameName], Leaderboard]:
+        boards = {None: Leaderboard()}
+        with self.db.read_session() as session:
+            stmt = select(User.id, User.username, User.point)
+            for user_id, username, point in session.execute(stmt):
+                boards[None].set_score(user_id, point, username)
+
+            for game, record in self.records.items():
+                boards[game] = board = Leaderboard()
+                score = func.sum(record.session_model.points_earned)
+                stmt = (
+                    select(User.id, User.username, score)
+                    .join(record.game_model, record.game_model.user_id == User.id)
+                    .join(
+                        record.session_model,
+                        getattr(record.session_model, record.game_field)
+                        == record.game_model.id,
+                    )
+                    .group_by(User.id)
+                )
+                for user_id, username, point in session.execute(stmt):
+                    board.set_score(user_id, point, username)
+        return boards
+
+    def close(self) -> None:
+        ledger.remove_listener(self._on_points_committed)
+        self.db.remove_commit_listener(self._on_operations_committed)
+        with self._lock:
+            self._listening = False
+            self._boards = None
+
+    def _board(self, game: Optional[GameName]) -> Leaderboard:
+        # not under '_lock': the rebuild waits for 'write_lock', whose holder can wait
+        # for '_lock' in a listener
+        boards = self._boards
+        if boards is None:
+            self.rebuild()
+            boards = self._boards
+        return boards[game]
+
+    def _on_points_committed(self, engine: Optional[Engine], deltas: Dict[int, int]):
+        if engine is not self.db.engine:
+            return
+        with self._lock:
+            if self._boards is not None:
+                for user_id, delta in deltas.items():
+                    self._boards[None].add_score(user_id, delta)
+
+    def _on_operations_committed(self, operations: List[Operation]) -> None:
+        """Points of the recorded games, the session and its points are committed together"""
+        with self._lock:
+            if self._boards is None:
+                return
+            for operation in operations:
+                if operation.kind != "add" or operation.model != PointsModel.__name__:
+                    continue
+                game = self._games.get(operation.fields.get("category"))
+                if game is not None:
+                    self._boards[game].add_score(
+                        operation.fields["user_id"], operation.fields["point"]
+                    )
+
+    def _with_usernames(
+        self, board: Leaderboard, entries: List[LeaderboardEntry]
+    ) -> List[LeaderboardEntry]:
+        """Users added by the listeners come without username, they are read on demand"""
+        missing = [entry.user_id for entry in entries if entry.username is None]
+        if missing:
+            with self.db.read_session() as session:
+                stmt = select(User.id, User.username).where(User.id.in_(missing))
+                usernames = dict(session.execute(stmt).all())
+            for entry in entries:
+                if entry.user_id in usernames:
+                    entry.username = usernames[entry.user_id]
+                    board.set_username(entry.user_id, entry.username)
+        return entries
+
+    def top(
+        self, n: int = 10, game: Optional[GameName] = None
+    ) -> List[LeaderboardEntry]:
+        board = self._board(game)
+        with self._lock:
+            return self._with_usernames(board, board.top(n))
+
+    def rank(self, user_id: int, game: Optional[GameName] = None) -> Optional[int]:
+        board = self._board(game)
+        with self._lock:
+            return board.rank(user_id)
+
+    def around(
+        self, user_id: int, n: int = 5, game: Optional[GameName] = None
+    ) -> List[LeaderboardEntry]:
+        board = self._board(game)
+        with self._lock:
+            return self._with_usernames(board, board.around(user_id, n))
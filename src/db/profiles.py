@@ -0,0 +1,144 @@
+"""
+Engine profiles. Every profile is a set of SQLite PRAGMAs applied to each new connection.
+
+The profile is selected (first match wins) by:
+    * the name passed to 'engine()' / 'DBManager'
+    * the BRAINBOOST_DB_PROFILE environment variable
+    * the 'profile' key in the [Database] section of the config file
+    * DEFAULT_PROFILE
+"""
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Union
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import Engine, event, text
+
+from ..config.app_config import AppConfig
+from .instrumentation import INSTRUMENTATION
+
+PROFILE_ENV = "BRAINBOOST_DB_PROFILE"
+DEFAULT_PROFILE = "desktop"
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    name: str
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size: int = -16000  # negative value is in KiB
+    mmap_size: int = 0
+    temp_store: str = "DEFAULT"
+    busy_timeout: int = 5000  # ms
+    echo: bool = False
+    # collect statistics of the statements, see 'instrumentation'
+    instrument: bool = False
+
+    def pragmas(self) -> Dict[str, Any]:
+        return {
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "cache_size": self.cache_size,
+            "mmap_size": self.mmap_size,
+            "temp_store": self.temp_store,
+            "busy_timeout": self.busy_timeout,
+        }
+
+    def install(self, engine: Engine, read_only: bool = False) -> None:
+        """
+        Apply the PRAGMAs to every connection opened by the engine. Read-only connections
+        skip the PRAGMAs which change the database file.
+        """
+        pragmas = self.pragmas()
+        if read_only:
+            del pragmas["journal_mode"], pragmas["synchronous"]
+
+        @event.listens_for(engine, "connect")
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for key, value in pragmas.items():
+                cursor.execute(f"PRAGMA {key}={value}")
+            cursor.close()
+
+        if self.instrument:
+            INSTRUMENTATION.install(engine)
+        _ENGINE_PROFILES[engine] = self
+
+
+PROFILES = {
+    # interactive app on a regular computer
+    "desktop": EngineProfile(
+        name="desktop",
+        synchronous="NORMAL",
+        cache_size=-16000,
+        mmap_size=64 * 1024 * 1024,
+        temp_store="MEMORY",
+    ),
+    # low-end machines with slow storage: WAL with NORMAL sync fsyncs only on checkpoints
+    "kiosk": EngineProfile(
+        name="kiosk",
+        synchronous="NORMAL",
+        cache_size=-8000,
+        mmap_size=32 * 1024 * 1024,
+        temp_store="MEMORY",
+        busy_timeout=10000,
+    ),
+    # one-off imports which can be repeated when they fail, durability is not needed
+    "bulk-import": EngineProfile(
+        name="bulk-import",
+        synchronous="OFF",
+        cache_size=-64000,
+        mmap_size=256 * 1024 * 1024,
+        temp_store="MEMORY",
+        busy_timeout=30000,
+    ),
+    # desktop with the statistics of the queries, instead of echoing every statement
+    "debug": EngineProfile(
+        name="debug",
+        synchronous="NORMAL",
+        cache_size=-16000,
+        mmap_size=64 * 1024 * 1024,
+        temp_store="MEMORY",
+        instrument=True,
+    ),
+    "test": EngineProfile(
+        name="test",
+        journal_mode="MEMORY",
+        synchronous="OFF",
+        cache_size=-2000,
+        temp_store="MEMORY",
+        busy_timeout=0,
+    ),
+}
+
+_ENGINE_PROFILES: "WeakKeyDictionary[Engine, EngineProfile]" = WeakKeyDictionary()
+
+
+def get_profile(profile: Union[str, EngineProfile, None] = None) -> EngineProfile:
+    if isinstance(profile, EngineProfile):
+        return profile
+    name = (
+        profile
+        or os.environ.get(PROFILE_ENV)
+        or AppConfig.get("Database", "profile")
+        or DEFAULT_PROFILE
+    )
+    if name not in PROFILES:
+        raise ValueError(
+            f"Unknown engine profile: {name}. Available: {', '.join(PROFILES)}"
+        )
+    return PROFILES[name]
+
+
+def describe_engine(engine: Engine) -> Dict[str, Any]:
+    """Report the profile of the engine and the PRAGMA values which are really active"""
+    profile = _ENGINE_PROFILES.get(engine)
+    report = {
+        "profile": profile.name if profile else None,
+        "echo": engine.echo,
+        "instrument": bool(profile and profile.instrument),
+    }
+    with engine.connect() as connection:
+        for key in EngineProfile(name="").pragmas():
+            report[key] = connection.execute(text(f"PRAGMA {key}")).scalar()
+    return report
@@ -0,0 +1,217 @@
+"""
+Bulk account provisioning, e.g. for a whole class of students.
+
+Usage:
+    python -m src.db.provisioning students.csv --output credentials.csv
+
+Passwords are hashed with the bcrypt cost saved in the local config of this machine (it's
+calibrated and saved at the first start, see 'configure_rounds'), or with '--rounds'.
+
+The CSV file has a 'username' column and an optional 'password' column. Missing passwords
+are generated and written to the output file together with the usernames.
+"""
+import argparse
+import csv
+import datetime
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from sqlalchemy import Engine, insert, select
+
+from ..models.enum_types import GameName, PointsCategory
+from ..models.user import PointsModel, User
+from ..user.session import configure_rounds, get_rounds, hash_password, set_rounds
+from .db import DATABASE_URL, engine
+from .session import GAME_RECORDS
+
+Account = Union[str, Tuple[str, Optional[str]]]
+
+
+@dataclass
+class ProvisionedAccount:
+    id: int
+    username: str
+    password: str
+
+
+@dataclass
+class ProvisioningReport:
+    created: int = 0
+    skipped: List[str] = field(default_factory=list)
+    hashing_time: float = 0.0
+    insert_time: float = 0.0
+
+    @property
+    def total_time(self) -> float:
+        return self.hashing_time + self.insert_time
+
+    @property
+    def accounts_per_second(self) -> float:
+        return self.created / self.total_time if self.total_time else 0.0
+
+    def __str__(self):
+        return (
+            f"Created {self.created} accounts (skipped {len(self.skipped)}) "
+            f"in {self.total_time:.2f}s: hashing {self.hashing_time:.2f}s, "
+            f"inserts {self.insert_time:.2f}s, "
+            f"{self.accounts_per_second:.1f} accounts/s"
+        )
+
+
+def read_accounts(path: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """Read (username, password) pairs from the CSV file with the 'username' header"""
+    with open(path, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            username = (row.get("username") or "").strip()
+            if username:
+                yield username, row.get("password") or None
+
+
+def _normalize(accounts: Iterable[Account]) -> List[Tuple[str, str]]:
+    """Deduplicate usernames and generate missing passwords"""
+    result = {}
+    for account in accounts:
+        username, password = (account, None) if isinstance(account, str) else account
+        username = username.strip()
+        if username and username not in result:
+            result[username] = password or secrets.token_urlsafe(9)
+    return list(result.items())
+
+
+def _batches(items: List, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def provision_accounts(
+    db_engine: Engine,
+    accounts: Iterable[Account],
+    workers: Optional[int] = None,
+    batch_size: int = 500,
+) -> Tuple[List[ProvisionedAccount], ProvisioningReport]:
+    """
+    Create many accounts at once. Passwords are hashed in a process pool, users with
+    their game rows and points for creating an account are inserted with executemany
+    statements, one transaction per 'batch_size' users. Usernames which already exist are skipped.
+    """
+    report = ProvisioningReport()
+    accounts = _normalize(accounts)
+
+    # skip existing users
+    existing = set()
+    usernames = [username for username, _ in accounts]
+    with db_engine.connect() as connection:
+        for batch in _batches(usernames, batch_size):
+            stmt = select(User.username).where(User.username.in_(batch))
+            existing.update(connection.scalars(stmt))
+    report.skipped = [username for username in usernames if username in existing]
+    accounts = [account for account in accounts if account[0] not in existing]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as executor:
+        chunksize = max(1, len(accounts) // ((workers or 4) * 4))
+        hashes = list(
+            executor.map(
+                # workers don't share the configured cost of this process
+                partial(hash_password, rounds=get_rounds()),
+                [password for _, password in accounts],
+                chunksize=chunksize,
+            )
+        )
+    report.hashing_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    created = []
+    category, point = PointsCategory.CREATE_ACCOUNT.value
+    for batch in _batches(list(zip(accounts, hashes)), batch_size):
+        now = datetime.datetime.now()
+        with db_engine.begin() as connection:
+            # Core inserts don't fire the model events, so the points for creating
+            # the account are added to both tables here
+            stmt = insert(User.__table__).returning(
+                User.__table__.c.id, sort_by_parameter_order=True
+            )
+            user_ids = connection.scalars(
+                stmt,
+                [
+                    {
+                        "username": username,
+                        "password": password_hash,
+                        "created_at": now,
+                        "point": point,
+                    }
+                    for (username, _), password_hash in batch
+                ],
+            ).all()
+
+            connection.execute(
+                insert(PointsModel.__table__),
+                [
+                    {
+                        "user_id": user_id,
+                        "category": category,
+                        "point": point,
+                        "saved_date": now,
+                    }
+                    for user_id in user_ids
+                ],
+            )
+            for game in GameName:
+                connection.execute(
+                    insert(GAME_RECORDS[game].game_model.__table__),
+                    [{"user_id": user_id, "game_name": game} for user_id in user_ids],
+                )
+        created += [
+            ProvisionedAccount(id=user_id, username=username, password=password)
+            for user_id, ((username, password), _) in zip(user_ids, batch)
+        ]
+    report.insert_time = time.perf_counter() - start
+    report.created = len(created)
+    return created, report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Create many BrainBoost accounts.")
+    parser.add_argument("accounts", help="CSV file with 'username[,password]' columns")
+    parser.add_argument("--output", help="CSV file for the created credentials")
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--profile", default="bulk-import")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--rounds", type=int, default=None, help="bcrypt cost, the saved one by default"
+    )
+    args = parser.parse_args(argv)
+
+    # the accounts are hashed with the cost checked at login, so they aren't rehashed
+    if args.rounds:
+        set_rounds(args.rounds)
+    else:
+        configure_rounds()
+
+    created, report = provision_accounts(
+        engine(args.database_url, args.profile),
+        read_accounts(args.accounts),
+        workers=args.workers,
+        batch_size=args.batch_size,
+    )
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["username", "password"])
+            writer.writerows(
+                (account.username, account.password) for account in created
+            )
+    if report.skipped:
+        print(f"Skipped existing users: {', '.join(report.skipped)}")
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Query plan regression check.
+
+Runs EXPLAIN QUERY PLAN over the queries used by the application and reports the ones
+which scan a whole table (or index) or sort the rows in a temporary b-tree.
+
+Usage:
+    python -m src.db.query_plan [--database-url sqlite:///db.sqlite]
+Exits with status 1 when any query has a problem.
+"""
+import argparse
+import datetime
+import sys
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from sqlalchemy import Connection, Engine, Executable, desc, func, select
+
+from ..models.enum_types import GameName
+from ..models.games import (
+    AssociativeChangingModel,
+    AssociativeChangingSessionModel,
+    ResultKeeperModel,
+    ResultKeeperSessionModel,
+)
+from ..models.user import Login, PointsModel, User
+from .db import DATABASE_URL, engine
+from .session import GAME_RECORDS, HistoryCursor, HistoryFilter, history_query
+
+# Queries used by the application, with example parameters
+KNOWN_QUERIES: Dict[str, Callable[[], Executable]] = {
+    "user by username": lambda: select(User).where(User.username == "username"),
+    "logins of user": lambda: select(Login)
+    .where(Login.user_id == 1)
+    .order_by(desc(Login.login_date)),
+    "points of user by date": lambda: select(PointsModel.point, PointsModel.saved_date)
+    .where(PointsModel.user_id == 1)
+    .order_by(desc(PointsModel.saved_date)),
+    "points total of user": lambda: select(func.sum(PointsModel.point)).where(
+        PointsModel.user_id == 1
+    ),
+    "result keeper of user": lambda: select(ResultKeeperModel).where(
+        ResultKeeperModel.user_id == 1
+    ),
+    "associative changing of user": lambda: select(AssociativeChangingModel).where(
+        AssociativeChangingModel.user_id == 1
+    ),
+    "result keeper history": lambda: select(ResultKeeperSessionModel)
+    .where(ResultKeeperSessionModel.result_keeper_id == 1)
+    .order_by(
+        desc(ResultKeeperSessionModel.finished_datetime),
+        desc(ResultKeeperSessionModel.id),
+    ),
+    "associative changing history": lambda: select(AssociativeChangingSessionModel)
+    .where(AssociativeChangingSessionModel.associative_changing_id == 1)
+    .order_by(
+        desc(AssociativeChangingSessionModel.finished_datetime),
+        desc(AssociativeChangingSessionModel.id),
+    ),
+    "result keeper history page": lambda: history_query(
+        GAME_RECORDS[GameName.RESULT_KEEPER],
+        game_id=1,
+        limit=21,
+        cursor=HistoryCursor(datetime.datetime(2024, 1, 1), 100),
+        filters=HistoryFilter(levels=(1, 10)),
+    ),
+    "associative changing history page": lambda: history_query(
+        GAME_RECORDS[GameName.ASSOCIATIVE_CHANGING],
+        game_id=1,
+        limit=21,
+        cursor=HistoryCursor(datetime.datetime(2024, 1, 1), 100),
+        filters=HistoryFilter(since=datetime.datetime(2023, 1, 1)),
+    ),
+}
+
+
+@dataclass
+class QueryPlan:
+    name: str
+    details: List[str]
+
+    @property
+    def problems(self) -> List[str]:
+        """Steps of the plan which read a whole table/index or sort in a temporary b-tree"""
+        return [
+            detail
+            for detail in self.details
+            if detail.startswith("SCAN") or "TEMP B-TREE" in detail
+        ]
+
+
+def explain(connection: Connection, stmt: Executable) -> List[str]:
+    compiled = stmt.compile(dialect=connection.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+    # columns: id, parent, notused, detail
+    return [row[3] for row in rows]
+
+
+def check_query_plans(db_engine: Engine) -> List[QueryPlan]:
+    """Explain all known queries, returns the plans which have problems"""
+    with db_engine.connect() as connection:
+        plans = [
+            QueryPlan(name=name, details=explain(connection, query()))
+            for name, query in KNOWN_QUERIES.items()
+        ]
+    return [plan for plan in plans if plan.problems]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check plans of the known queries.")
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    args = parser.parse_args()
+
+    failed = check_query_plans(engine(args.database_url))
+    for plan in failed:
+        print(f"{plan.name}: {'; '.join(plan.problems)}")
+    if failed:
+        sys.exit(1)
+    print(f"All {len(KNOWN_QUERIES)} queries use indexes.")
+
+
+if __name__ == "__main__":
+    main()
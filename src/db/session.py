@@ -1,12 +1,31 @@
-from dataclasses import dataclass
-from typing import Dict, Optional
+import datetime
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.orm import defer, joinedload
 
 from src.exceptions.database_exceptions import UserNotFoundException
 
-from ..models.enum_types import Language
-from ..models.games import GameName, ResultKeeperModel
-from ..models.user import User
-from .db import DATABASE_URL, DBManager
+from ..games.mnemonic.associative_chaining import DATA_PATH, corpus_name
+from ..games.mnemonic.corpus import load_corpus
+from ..games.mnemonic.scheduler import Review, ReviewScheduler
+from ..games.mnemonic.seen import SeenWords, decode_chunk, encode_chunk
+from ..models import ModelBase
+from ..models.enum_types import Language, PointsCategory
+from ..models.games import (
+    AssociativeChangingModel,
+    AssociativeChangingReviewModel,
+    AssociativeChangingSeenModel,
+    AssociativeChangingSessionModel,
+    GameName,
+    ResultKeeperModel,
+    ResultKeeperSessionModel,
+)
+from ..models.user import Login, PointsModel, User
+from ..user.credentials import CredentialService
+from .db import DATABASE_URL, DBManager, Operation
+from .leaderboard import LeaderboardService
 
 
 @dataclass
@@ -16,6 +35,118 @@ class GameStatistic:
     level: Optional[int]
 
 
+@dataclass
+class GameRecord:
+    """Describes which models store the result of the game"""
+
+    game_model: Type[ModelBase]
+    session_model: Type[ModelBase]
+    game_field: str
+    points_category: PointsCategory
+
+
+GAME_RECORDS = {
+    GameName.RESULT_KEEPER: GameRecord(
+        game_model=ResultKeeperModel,
+        session_model=ResultKeeperSessionModel,
+        game_field="result_keeper_id",
+        points_category=PointsCategory.GAME_RESULT_KEEPER,
+    ),
+    GameName.ASSOCIATIVE_CHANGING: GameRecord(
+        game_model=AssociativeChangingModel,
+        session_model=AssociativeChangingSessionModel,
+        game_field="associative_changing_id",
+        points_category=PointsCategory.GAME_ASSOCIATIVE_CHANGING,
+    ),
+}
+
+
+# relationships of User with the game rows
+GAME_RELATIONSHIPS = {game: game.lower().replace(" ", "_") for game in GameName}
+
+# columns with the whole content of the game, loaded only on request
+LARGE_COLUMNS = ("words", "user_answers", "answers", "word_ids", "due_words")
+
+
+@dataclass
+class HistoryCursor:
+    """Position in the history: the last returned session"""
+
+    finished_datetime: datetime.datetime
+    id: int
+
+
+@dataclass
+class HistoryFilter:
+    """Optional bounds (inclusive) of the finished level and the finished date"""
+
+    levels: Optional[Tuple[int, int]] = None
+    since: Optional[datetime.datetime] = None
+    until: Optional[datetime.datetime] = None
+
+
+@dataclass
+class HistoryPage:
+    sessions: List[ModelBase]
+    next_cursor: Optional[HistoryCursor] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+def history_query(
+    record: GameRecord,
+    game_id: int,
+    limit: int,
+    cursor: Optional[HistoryCursor] = None,
+    filters: Optional[HistoryFilter] = None,
+    with_content: bool = False,
+) -> Select:
+    """
+    Sessions of the game, newest first. Pages are read by keyset: the next page starts
+    right after the cursor in the index on (game id, finished_datetime), so every page
+    costs the same no matter how far in the history it is.
+    """
+    model = record.session_model
+    stmt = (
+        select(model)
+        .where(getattr(model, record.game_field) == game_id)
+        .order_by(model.finished_datetime.desc(), model.id.desc())
+        .limit(limit)
+    )
+    if cursor:
+        stmt = stmt.where(
+            tuple_(model.finished_datetime, model.id)
+            < (cursor.finished_datetime, cursor.id)
+        )
+    if filters and filters.levels:
+        stmt = stmt.where(model.finished_level.between(*filters.levels))
+    if filters and filters.since:
+        stmt = stmt.where(model.finished_datetime >= filters.since)
+    if filters and filters.until:
+        stmt = stmt.where(model.finished_datetime <= filters.until)
+    if not with_content:
+        # reading a deferred column raises instead of querying per row
+        stmt = stmt.options(
+            *(
+                defer(getattr(model, name), raiseload=True)
+                for name in LARGE_COLUMNS
+                if name in model.model_fields
+            )
+        )
+    return stmt
+
+
+@dataclass
+class SeenCorpus:
+    """Words of the corpus seen by the user"""
+
+    corpus: str
+    fingerprint: str
+    words: SeenWords
+
+
 @dataclass
 class UserSession:
     id: int
@@ -23,13 +154,20 @@ class UserSession:
     username: str
     point: int
     stats: Dict[GameName, GameStatistic]
+    # read on first use, by the name of the corpus
+    seen: Dict[str, SeenCorpus] = field(default_factory=dict)
+    reviews: Dict[str, ReviewScheduler] = field(default_factory=dict)
 
 
 class GameManager:
     NAME_GAME = None
 
-    def __init__(self, database_url=DATABASE_URL):
-        self.db = DBManager(database_url)
+    def __init__(self, database_url=DATABASE_URL, journal_path=None):
+        self.db = DBManager(database_url, journal_path)
+        # boards are read from the database on first use
+        self.leaderboard = LeaderboardService(self.db, GAME_RECORDS)
+        # bcrypt off the UI thread
+        self.credentials = CredentialService()
         self._current_session = None
 
     @property
@@ -90,8 +228,7 @@ class GameManager:
         a new record with that game.
         """
         stats = {}
-        for game in GameName:
-            name_game = game.lower().replace(" ", "_")
+        for game, name_game in GAME_RELATIONSHIPS.items():
             game_stat: Optional[ResultKeeperModel] = getattr(user, name_game)
             if game_stat:
                 stats[game.value] = GameStatistic(
@@ -105,17 +242,220 @@ class GameManager:
         """
         Method captures the user with the specified 'user_id' from the database and then checks whether all games exist.
         Assigns the 'current_session' to user when user exist.
+        The user and the rows of all games are read in a single query.
         """
-        user = self.db.find_record(User, id=user_id)
-        if user:
-            # check if all game exists
-            games = self._check_games(user)
-        else:
-            raise UserNotFoundException(user_id)
-        self.current_session = UserSession(
-            id=user.id,
-            language=user.language,
-            username=user.username,
-            point=user.point,
-            stats=games,
+        stmt = (
+            select(User)
+            .options(
+                *(
+                    joinedload(getattr(User, name))
+                    for name in GAME_RELATIONSHIPS.values()
+                )
+            )
+            .where(User.id == user_id)
+        )
+        with self.db.read_session() as session:
+            user = session.scalars(stmt).first()
+            if user:
+                # check if all game exists
+                games = self._check_games(user)
+            else:
+                raise UserNotFoundException(user_id)
+            self.current_session = UserSession(
+                id=user.id,
+                language=user.language,
+                username=user.username,
+                point=user.point,
+                stats=games,
+            )
+
+    def login(self, user_id: int) -> UserSession:
+        """
+        Load the session of the verified user and save the login. The login is written
+        by the write-behind queue (in a single transaction when it's disabled).
+        """
+        self.load_session(user_id)
+        self.db.enqueue(Operation.add(Login, user_id=user_id))
+        return self.current_session
+
+    def record_result(self, game_name: GameName, stats: Dict[str, Any]) -> UserSession:
+        """
+        Save the result of the finished game and return the refreshed current session.
+        The session row, the earned points and the new level (when user level up) are written
+        in a single transaction, or as one group of the write-behind queue when it is enabled.
+        """
+        self.current_session_validation()
+        record = GAME_RECORDS.get(game_name)
+        if not record:
+            raise ValueError(f"Game {game_name} has no record. Please implement it!")
+
+        game_id = self.get_id_game(game_name)
+        started_level = stats.get("started_level")
+        finished_level = stats.get("finished_level")
+        earned_point = stats.get("points_earned")
+
+        operations = [
+            Operation.add(
+                record.session_model, **{record.game_field: game_id}, **stats
+            ),
+            Operation.add(
+                PointsModel,
+                user_id=self.current_session.id,
+                point=earned_point,
+                category=record.points_category.value[0],
+            ),
+        ]
+        if started_level < finished_level:
+            operations.append(
+                Operation.update(record.game_model, game_id, {"level": finished_level})
+            )
+        # the seen words and the reviews are saved with the result of AssociativeChanging
+        saves_words = game_name == GameName.ASSOCIATIVE_CHANGING
+        if saves_words:
+            operations.extend(self._seen_words_operations(game_id))
+            operations.extend(self._review_operations(game_id))
+        self.db.enqueue(*operations)
+        if saves_words:
+            for seen in self.current_session.seen.values():
+                seen.words.mark_saved()
+            for scheduler in self.current_session.reviews.values():
+                scheduler.mark_saved()
+
+        # refresh the current session
+        if started_level < finished_level:
+            self.update_level_of_game(game_name, finished_level)
+        self.update_point(earned_point)
+        return self.current_session
+
+    def seen_words(self, language: Language) -> Optional[SeenWords]:
+        """
+        Words of the corpus of the language seen by the current user in
+        AssociativeChaining, read once per session. The changes are saved with the
+        result of the game. None when the corpus can't be compiled.
+        """
+        self.current_session_validation()
+        name = corpus_name(language)
+        if name in self.current_session.seen:
+            return self.current_session.seen[name].words
+        game_id = self.get_id_game(GameName.ASSOCIATIVE_CHANGING)
+        try:
+            corpus = load_corpus(DATA_PATH / name)
+        except OSError:
+            return None
+
+        chunks = {}
+        if game_id is not None:
+            model = AssociativeChangingSeenModel
+            stmt = select(model.chunk, model.bits).where(
+                model.associative_changing_id == game_id,
+                model.corpus == name,
+                # ids of other words are meaningless
+                model.fingerprint == corpus.fingerprint,
+            )
+            with self.db.read_session() as session:
+                chunks = {
+                    chunk: decode_chunk(bits) for chunk, bits in session.execute(stmt)
+                }
+        seen = SeenCorpus(name, corpus.fingerprint, SeenWords(len(corpus), chunks))
+        self.current_session.seen[name] = seen
+        return seen.words
+
+    def _seen_words_operations(self, game_id: Optional[int]) -> List[Operation]:
+        """Writes of the chunks of the seen words changed since the last save"""
+        if game_id is None:
+            return []
+        return [
+            Operation.upsert(
+                AssociativeChangingSeenModel,
+                {
+                    "associative_changing_id": game_id,
+                    "corpus": seen.corpus,
+                    "chunk": chunk,
+                },
+                {"fingerprint": seen.fingerprint, "bits": encode_chunk(bits)},
+            )
+            for seen in self.current_session.seen.values()
+            for chunk, bits in seen.words.dirty_chunks().items()
+        ]
+
+    def review_scheduler(self, language: Language) -> ReviewScheduler:
+        """
+        Spaced repetition of the words of the language for the current user in
+        AssociativeChaining, read once per session. The reviews are saved with the
+        result of the game.
+        """
+        self.current_session_validation()
+        name = corpus_name(language)
+        if name in self.current_session.reviews:
+            return self.current_session.reviews[name]
+        game_id = self.get_id_game(GameName.ASSOCIATIVE_CHANGING)
+
+        reviews = []
+        if game_id is not None:
+            model = AssociativeChangingReviewModel
+            stmt = select(
+                model.word, model.due, model.ease, model.interval, model.repetitions
+            ).where(model.associative_changing_id == game_id, model.corpus == name)
+            with self.db.read_session() as session:
+                reviews = [Review(**row._mapping) for row in session.execute(stmt)]
+        scheduler = ReviewScheduler.from_reviews(reviews)
+        self.current_session.reviews[name] = scheduler
+        return scheduler
+
+    def _review_operations(self, game_id: Optional[int]) -> List[Operation]:
+        """Writes of the reviews changed since the last save"""
+        if game_id is None:
+            return []
+        return [
+            Operation.upsert(
+                AssociativeChangingReviewModel,
+                {
+                    "associative_changing_id": game_id,
+                    "corpus": name,
+                    "word": review.word,
+                },
+                {
+                    "ease": review.ease,
+                    "interval": review.interval,
+                    "repetitions": review.repetitions,
+                    "due": review.due,
+                },
+            )
+            for name, scheduler in self.current_session.reviews.items()
+            for review in scheduler.dirty_reviews()
+        ]
+
+    def history(
+        self,
+        game_name: GameName,
+        limit: int = 20,
+        cursor: Optional[HistoryCursor] = None,
+        filters: Optional[HistoryFilter] = None,
+        with_content: bool = False,
+    ) -> HistoryPage:
+        """
+        Page of the current user's finished games, newest first. Pass 'next_cursor' of
+        the page to get the following one. The words and answers of the games are loaded
+        only with 'with_content'.
+        """
+        self.current_session_validation()
+        if limit < 1:
+            raise ValueError("limit must be a positive number")
+        record = GAME_RECORDS.get(game_name)
+        if not record:
+            raise ValueError(f"Game {game_name} has no record. Please implement it!")
+        game_id = self.get_id_game(game_name)
+        if game_id is None:
+            return HistoryPage(sessions=[])
+
+        # one more row tells whether there is a next page
+        stmt = history_query(record, game_id, limit + 1, cursor, filters, with_content)
+        with self.db.read_session() as session:
+            sessions = list(session.scalars(stmt))
+        if len(sessions) <= limit:
+            return HistoryPage(sessions=sessions)
+        last = sessions[limit - 1]
+        return HistoryPage(
+            sessions=sessions[:limit],
+            next_cursor=HistoryCursor(last.finished_datetime, last.id),
         )
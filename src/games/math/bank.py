@@ -0,0 +1,297 @@
+"""
+Puzzle bank of ResultKeeper: chains generated offline and stored in a binary file with
+fixed-width records, read at runtime through mmap.
+
+File layout (little endian):
+    header      magic, chain length, number of levels
+    directory   per level: level, range_size, offset of starts, offset of records, records
+    per level   starts: (range_size + 2) uint32, index of the first record of every start
+                records: sorted by start, 10 x uint16 numbers + uint32 with 2-bit operations
+
+A chain of (level, start) is read in O(1): the record 'starts[start] + i' of the level.
+The default of a million chains per level makes a bank of levels 1-50 about 1.2 GB.
+The positions of the users are saved next to the bank (see 'cursor_path').
+
+Usage:
+    python -m src.games.math.bank --levels 1-50 [--chains-per-level 1000000]
+        [--output path]
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import random
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .batch import generate_chains
+from .chain import OPERATIONS, range_size
+
+BANK_PATH = os.path.join("src", "games", "data", "result_keeper.bank")
+CHAINS_PER_LEVEL = 1_000_000
+
+CHAIN_LENGTH = 10
+MAGIC = b"RKBANK01"
+HEADER = struct.Struct("<8sII")
+LEVEL_ENTRY = struct.Struct("<IIQQI")
+START = struct.Struct("<I")
+RECORD = struct.Struct(f"<{CHAIN_LENGTH}HI")
+RECORD_DTYPE = np.dtype([("numbers", "<u2", (CHAIN_LENGTH,)), ("operations", "<u4")])
+MAX_RANGE_SIZE = 0xFFFF
+
+Chain = Tuple[List[int], List[str]]
+
+
+def pack_chain(numbers: List[int], chars: List[str]) -> bytes:
+    operations = 0
+    for i, char in enumerate(chars):
+        operations |= OPERATIONS.index(char) << (2 * i)
+    return RECORD.pack(*numbers, operations)
+
+
+def unpack_chain(record: Tuple[int, ...]) -> Chain:
+    *numbers, operations = record
+    chars = [
+        OPERATIONS[(operations >> (2 * i)) & 0b11] for i in range(CHAIN_LENGTH - 1)
+    ]
+    return numbers, chars
+
+
+def cursor_path(bank_path: Union[str, os.PathLike]) -> str:
+    """The file of the users' positions in the bank, next to the bank"""
+    return str(Path(bank_path).with_suffix(".cursor.json"))
+
+
+CURSOR_PATH = cursor_path(BANK_PATH)
+
+
+def _level_chains(level: int, chains_per_level: int, rng: np.random.Generator):
+    """Unique chains of every start, as records sorted by start, and the starts index"""
+    size = range_size(level)
+    chains_per_start = -(-chains_per_level // (size + 1))
+    # short chains of small ranges have fewer variants than requested
+    starts = np.repeat(np.arange(size + 1), chains_per_start * 2)
+    batch = generate_chains(level, len(starts), rng, starts, CHAIN_LENGTH)
+    records = np.empty(len(starts), dtype=RECORD_DTYPE)
+    records["numbers"] = batch.numbers
+    records["operations"] = (
+        batch.operations.astype(np.uint32) << (2 * np.arange(CHAIN_LENGTH - 1))
+    ).sum(axis=1, dtype=np.uint32)
+    # the first unique chains of every start, in the order they were generated
+    _, first = np.unique(records.view(f"V{RECORD.size}"), return_index=True)
+    records = records[np.sort(first)]
+    starts = records["numbers"][:, 0]
+    rank = np.arange(len(records)) - np.searchsorted(starts, starts)
+    records = records[rank < chains_per_start]
+    counts = np.bincount(records["numbers"][:, 0], minlength=size + 1)
+    return np.concatenate([[0], np.cumsum(counts)]), records
+
+
+def build_bank(
+    path: Union[str, os.PathLike],
+    levels: Iterable[int],
+    chains_per_level: int = CHAINS_PER_LEVEL,
+    seed: Optional[int] = None,
+) -> None:
+    levels = sorted(set(levels))
+    if levels and range_size(levels[-1]) > MAX_RANGE_SIZE:
+        raise ValueError(f"Level {levels[-1]} doesn't fit in the bank records")
+    rng = np.random.default_rng(seed)
+    tmp_path = Path(f"{path}.tmp")
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, CHAIN_LENGTH, len(levels)))
+        directory_offset = file.tell()
+        # the directory is written when the offsets are known
+        file.write(bytes(LEVEL_ENTRY.size * len(levels)))
+        entries = []
+        for level in levels:
+            starts, records = _level_chains(level, chains_per_level, rng)
+            starts_offset = file.tell()
+            file.write(starts.astype("<u4").tobytes())
+            records_offset = file.tell()
+            file.write(records.tobytes())
+            entries.append(
+                LEVEL_ENTRY.pack(
+                    level,
+                    range_size(level),
+                    starts_offset,
+                    records_offset,
+                    len(records),
+                )
+            )
+        file.seek(directory_offset)
+        file.write(b"".join(entries))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class _Level:
+    range_size: int
+    starts_offset: int
+    records_offset: int
+    records: int
+
+
+class PuzzleBank:
+    """Read-only view of the bank file"""
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, chain_length, levels = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or chain_length != CHAIN_LENGTH:
+            self.close()
+            raise ValueError(f"{path} is not a ResultKeeper puzzle bank")
+        self._levels: Dict[int, _Level] = {}
+        for i in range(levels):
+            level, *entry = LEVEL_ENTRY.unpack_from(
+                self._mmap, HEADER.size + i * LEVEL_ENTRY.size
+            )
+            self._levels[level] = _Level(*entry)
+
+    @property
+    def levels(self) -> List[int]:
+        return list(self._levels)
+
+    def __len__(self) -> int:
+        """Number of all chains"""
+        return sum(entry.records for entry in self._levels.values())
+
+    def __contains__(self, level: int) -> bool:
+        return level in self._levels
+
+    def _bucket(self, level: int, start: int) -> Tuple[int, int]:
+        """Index of the first record of the start and number of its records"""
+        entry = self._levels.get(level)
+        if entry is None or not 0 <= start <= entry.range_size:
+            return 0, 0
+        first, end = struct.unpack_from(
+            "<2I", self._mmap, entry.starts_offset + start * START.size
+        )
+        return first, end - first
+
+    def count(self, level: int, start: int) -> int:
+        return self._bucket(level, start)[1]
+
+    def chain(self, level: int, start: int, index: int) -> Chain:
+        first, count = self._bucket(level, start)
+        if not 0 <= index < count:
+            raise IndexError(f"No chain {index} for level {level} and start {start}")
+        offset = self._levels[level].records_offset + (first + index) * RECORD.size
+        return unpack_chain(RECORD.unpack_from(self._mmap, offset))
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def open_bank(path: Union[str, os.PathLike] = BANK_PATH) -> Optional[PuzzleBank]:
+    """The bank, or None when it hasn't been built"""
+    if not os.path.exists(path):
+        return None
+    return PuzzleBank(path)
+
+
+class BankCursor:
+    """
+    Positions of a user in the chains of every (level, start). Chains of a start are
+    visited in a permutation of the user (a stride coprime with their number), so they
+    don't repeat before all of them are drawn.
+    """
+
+    def __init__(self, user_id: int, path: Union[str, os.PathLike, None] = CURSOR_PATH):
+        self.user_id = str(user_id)
+        self.path = path
+        self._users: Dict[str, Dict[str, int]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as file:
+                    self._users = json.load(file)
+            except (IOError, json.JSONDecodeError):
+                self._users = {}
+        self.positions = self._users.setdefault(self.user_id, {})
+        self._permutations: Dict[Tuple[str, int], Tuple[int, int]] = {}
+
+    def _permutation(self, key: str, count: int) -> Tuple[int, int]:
+        """Offset and stride of the user's permutation of 'count' chains"""
+        permutation = self._permutations.get((key, count))
+        if permutation is None:
+            rng = random.Random(f"{self.user_id}:{key}")
+            offset = rng.randrange(count)
+            stride = rng.randrange(1, count + 1)
+            while math.gcd(stride, count) != 1:
+                stride = stride % count + 1
+            permutation = self._permutations[(key, count)] = (offset, stride)
+        return permutation
+
+    def next_index(self, level: int, start: int, count: int) -> int:
+        key = f"{level}:{start}"
+        position = self.positions.get(key, 0)
+        self.positions[key] = position + 1
+        offset, stride = self._permutation(key, count)
+        return (offset + position * stride) % count
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with open(self.path, "w") as file:
+            json.dump(self._users, file)
+
+
+class BankedChains:
+    """Chains drawn from the bank for one user"""
+
+    def __init__(self, bank: PuzzleBank, cursor: BankCursor):
+        self.bank = bank
+        self.cursor = cursor
+
+    def has(self, level: int, start: int) -> bool:
+        return self.bank.count(level, start) > 0
+
+    def draw(self, level: int, start: int) -> Optional[Chain]:
+        """A chain from the bank, None when the bank has none for the level and start"""
+        count = self.bank.count(level, start)
+        if not count:
+            return None
+        return self.bank.chain(
+            level, start, self.cursor.next_index(level, start, count)
+        )
+
+
+def _levels(value: str) -> List[int]:
+    first, _, last = value.partition("-")
+    return list(range(int(first), int(last or first) + 1))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the ResultKeeper puzzle bank.")
+    parser.add_argument("--levels", type=_levels, default=_levels("1-50"))
+    parser.add_argument("--chains-per-level", type=int, default=CHAINS_PER_LEVEL)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=BANK_PATH)
+    args = parser.parse_args()
+
+    build_bank(args.output, args.levels, args.chains_per_level, args.seed)
+    with PuzzleBank(args.output) as bank:
+        records = len(bank)
+    print(
+        f"Saved {records} chains of levels {args.levels[0]}-{args.levels[-1]} "
+        f"to {args.output} ({os.path.getsize(args.output)} bytes)."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Batches of ResultKeeper chains generated with NumPy, e.g. for puzzle banks, daily
+challenges and simulations.
+
+The rules and the distribution are the same as in 'chain': the operand of a step is
+drawn uniformly from [0, range_size], the operation uniformly among the operations valid
+for it, and an operand without a valid operation is drawn again uniformly among the valid
+operands from 1. A step of all chains of the batch is computed at once: the valid
+operations are masks over the results and operands, the redraws are looked up in tables
+of the level.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from .chain import OPERATIONS, range_size, redraw_operands
+
+PLUS, MINUS, TIMES, DIVIDE = range(len(OPERATIONS))
+SIGNS = np.array([1, -1, 0, 0], dtype=np.int32)
+HALF = np.uint64(32)
+
+Seed = Union[int, np.random.Generator, None]
+Starts = Union[int, Sequence[int], np.ndarray, None]
+
+
+def apply_all(a: np.ndarray, b: np.ndarray, operations: np.ndarray) -> np.ndarray:
+    """'apply' of every element, the division by 0 gives -1 (an invalid result)"""
+    quotient = np.where(b == 0, -1, a // np.where(b == 0, 1, b))
+    return np.choose(operations, [a + b, a - b, a * b, quotient])
+
+
+def valid_operations(
+    results: np.ndarray, operands: np.ndarray, size: int, allowed: int
+) -> np.ndarray:
+    """
+    Bit mask of the allowed operations valid for every result and operand, bit i for
+    OPERATIONS[i]
+    """
+    valid = (results + operands <= size).view(np.uint8) << PLUS
+    valid |= (operands <= results).view(np.uint8) << MINUS
+    valid |= (results * operands <= size).view(np.uint8) << TIMES
+    valid |= ((operands > 0) & (results % np.maximum(operands, 1) == 0)).view(
+        np.uint8
+    ) << DIVIDE
+    return valid & np.uint8(allowed)
+
+
+# number of the operations in every mask and its k-th operation at [mask * 4 + k]
+MASK_COUNTS = np.array([bin(mask).count("1") for mask in range(16)], dtype=np.uint64)
+MASK_OPERATIONS = np.array(
+    [
+        ([op for op in range(len(OPERATIONS)) if mask >> op & 1] + [0] * 4)[:4]
+        for mask in range(16)
+    ],
+    dtype=np.uint8,
+).ravel()
+# the operation of a mask picked by a random 16-bit word at [word << 4 | mask]:
+# its k-th operation, k = (word * count) >> 16
+PICKS = MASK_OPERATIONS[
+    np.arange(16) * 4
+    + ((np.arange(1 << 16, dtype=np.uint64)[:, None] * MASK_COUNTS) >> 16).astype(int)
+].ravel()
+
+
+@dataclass(frozen=True)
+class StepTables:
+    """
+    Lookups of a level: 'valid' is the mask of 'valid_operations' of every result and
+    operand at [result * (size + 1) + operand]. The operands of the redraw of a result
+    (see 'chain.redraw_operands') are the row of the result in 'redraws', padded with
+    0, and their number is in 'redraw_counts'.
+    """
+
+    valid: np.ndarray
+    redraws: np.ndarray
+    redraw_counts: np.ndarray
+
+
+@lru_cache(maxsize=32)
+def step_tables(size: int, operations: Tuple[str, ...] = OPERATIONS) -> StepTables:
+    numbers = np.arange(size + 1)
+    allowed = sum(1 << OPERATIONS.index(operation) for operation in operations)
+    valid = valid_operations(
+        np.repeat(numbers, size + 1), np.tile(numbers, size + 1), size, allowed
+    )
+    redraws = np.zeros((size + 1, max(size, 1)), dtype=np.min_scalar_type(size))
+    redraw_counts = np.zeros(size + 1, dtype=np.uint64)
+    for result in numbers:
+        end, extra = redraw_operands(result, size, operations)
+        redraws[result, :end] = numbers[1 : end + 1]
+        redraws[result, end : end + len(extra)] = extra
+        redraw_counts[result] = end + len(extra)
+    return StepTables(valid=valid, redraws=redraws, redraw_counts=redraw_counts)
+
+
+def valid_chains(numbers: np.ndarray, operations: np.ndarray, size: int) -> np.ndarray:
+    """
+    Mask of the chains in which every result stays in [0, size] and every division
+    is exact
+    """
+    numbers = np.asarray(numbers, dtype=np.int64)
+    operations = np.asarray(operations)
+    results = numbers[:, 0]
+    valid = (results >= 0) & (results <= size)
+    for step in range(operations.shape[1]):
+        operands, step_operations = numbers[:, step + 1], operations[:, step]
+        divisions = step_operations == DIVIDE
+        valid &= ~divisions | (
+            (operands != 0) & (results % np.where(operands == 0, 1, operands) == 0)
+        )
+        results = apply_all(results, operands, step_operations)
+        valid &= (results >= 0) & (results <= size)
+    return valid
+
+
+@dataclass
+class ChainBatch:
+    """
+    'numbers' of shape (n, length) and 'operations' of shape (n, length - 1), the
+    indexes of OPERATIONS. Both are column-major (transposed views of the steps).
+    """
+
+    numbers: np.ndarray
+    operations: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def chain(self, index: int) -> Tuple[List[int], List[str]]:
+        """The chain as returned by 'generate_chain'"""
+        return self.numbers[index].tolist(), [
+            OPERATIONS[operation] for operation in self.operations[index]
+        ]
+
+    def __iter__(self) -> Iterator[Tuple[List[int], List[str]]]:
+        return (self.chain(index) for index in range(len(self)))
+
+
+def _starts(starts: Starts, n: int, size: int, rng: np.random.Generator) -> np.ndarray:
+    if starts is None:
+        return rng.integers(0, size, n, endpoint=True)
+    starts = np.broadcast_to(np.asarray(starts, dtype=np.int64), (n,)).copy()
+    if n and (starts.min() < 0 or starts.max() > size):
+        raise ValueError(f"Starts must be in range 0-{size}")
+    return starts
+
+
+def generate_chains(
+    level: int,
+    n: int,
+    seed: Seed = None,
+    starts: Starts = None,
+    length: int = 10,
+    operations: Sequence[str] = OPERATIONS,
+) -> ChainBatch:
+    """
+    'n' chains of the level. 'starts' is the first number of every chain (or one
+    for all), random when it's not given.
+    """
+    if n < 0:
+        raise ValueError("n must not be negative")
+    if not operations or not set(operations) <= set(OPERATIONS):
+        raise ValueError(f"Operations must be some of {', '.join(OPERATIONS)}")
+    size = range_size(level)
+    rng = np.random.default_rng(seed)
+    tables = step_tables(size, tuple(sorted(set(operations), key=OPERATIONS.index)))
+
+    steps = max(length - 1, 0)
+    # one row per step, so every step writes contiguous memory
+    numbers = np.empty((length, n), dtype=np.int32)
+    chosen = np.empty((steps, n), dtype=np.uint8)
+    numbers[0] = _starts(starts, n, size, rng)
+    results = numbers[0]
+    # two random 32-bit words per step: (word * count) >> 32 is uniform in [0, count)
+    # for the operand (and its redraw), the high 16 bits of the other pick the operation
+    words = rng.bit_generator.random_raw((steps, n)).view(np.uint32)
+    words = words.reshape(steps, 2, n)
+    for step in range(steps):
+        operands = numbers[step + 1]
+        operands[:] = (words[step, 0] * np.uint64(size + 1)) >> HALF
+        cells = results * (size + 1)
+        valid = tables.valid[cells + operands]
+
+        # operands without a valid operation are drawn again among the valid ones,
+        # nothing but 0 continues the chain when there are none
+        stuck = np.flatnonzero(valid == 0)
+        if len(stuck):
+            stuck_results = results[stuck]
+            index = rng.bit_generator.random_raw(len(stuck)) & np.uint64(0xFFFFFFFF)
+            index *= tables.redraw_counts[stuck_results]
+            index >>= HALF
+            redrawn = tables.redraws[stuck_results, index.view(np.int64)]
+            operands[stuck] = redrawn
+            valid[stuck] = tables.valid[cells[stuck] + redrawn]
+
+        # one of the valid operations, uniform up to (count / 2 ** 16)
+        index = (words[step, 1] >> 12) & np.uint32(0xFFFF0)
+        index |= valid
+        step_operations = np.take(PICKS, index, out=chosen[step])
+
+        # "+" and "-" by the sign, then "*" and "/" where they're used
+        results = results + operands * SIGNS[step_operations]
+        times = np.flatnonzero(step_operations == TIMES)
+        results[times] *= operands[times]
+        divisions = np.flatnonzero(step_operations == DIVIDE)
+        results[divisions] //= operands[divisions]
+    return ChainBatch(numbers=numbers.T, operations=chosen.T)
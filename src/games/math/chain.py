@@ -0,0 +1,148 @@
+"""
+Chains of operations for ResultKeeper built by construction, with the distribution of
+the former retry loop of ResultKeeper._set_math_char:
+
+    * the operand is drawn uniformly from [0, range_size]
+    * the operation is drawn uniformly among the operations valid for that operand
+    * an operand without a valid operation was drawn again from [1, range_size] until it
+      had one, i.e. uniformly among the valid operands from 1
+
+An operand is valid for an operation when the result stays in [0, range_size] and the
+division is exact. The valid operands from 1 are [1, end] (the "+", "-" and "*" operands
+are ranges from 1) and the divisors of the result above 'end', so the redraw is a single
+draw and a chain takes exactly 'length - 1' steps.
+"""
+import random
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+OPERATIONS = ("+", "-", "*", "/")
+
+
+def range_size(level: int) -> int:
+    # same as ResultKeeper.range_size
+    return 5 + level * 5
+
+
+@lru_cache(maxsize=32)
+def divisor_table(range_size: int) -> Tuple[Tuple[int, ...], ...]:
+    """Divisors of every number from 0 to range_size, 0 is divisible by any operand"""
+    divisors = [[] for _ in range(range_size + 1)]
+    for divisor in range(1, range_size + 1):
+        for multiple in range(divisor, range_size + 1, divisor):
+            divisors[multiple].append(divisor)
+    divisors[0] = list(range(1, range_size + 1))
+    return tuple(tuple(d) for d in divisors)
+
+
+def operands(result: int, operation: str, range_size: int) -> Sequence[int]:
+    """Operands (without 0) which keep the result of the operation in the range"""
+    match operation:
+        case "+":
+            return range(1, range_size - result + 1)
+        case "-":
+            return range(1, result + 1)
+        case "*":
+            return range(1, range_size // result + 1 if result else range_size + 1)
+        case "/":
+            return divisor_table(range_size)[result]
+        case _:
+            raise ValueError(f"Invalid operation: {operation}")
+
+
+def is_valid(result: int, operand: int, operation: str, range_size: int) -> bool:
+    if operation == "/" and (operand == 0 or result % operand):
+        return False
+    return 0 <= apply(result, operand, operation) <= range_size
+
+
+def valid_operations(
+    result: int, operand: int, range_size: int, operations: Sequence[str] = OPERATIONS
+) -> List[str]:
+    return [op for op in operations if is_valid(result, operand, op, range_size)]
+
+
+def redraw_operands(
+    result: int, range_size: int, operations: Sequence[str] = OPERATIONS
+) -> Tuple[int, Tuple[int, ...]]:
+    """
+    The valid operands from 1 as 'end' and 'extra': every operand in [1, end] and the
+    divisors of the result above 'end'
+    """
+    end = max(
+        (
+            len(operands(result, operation, range_size))
+            for operation in operations
+            if operation != "/" or result == 0
+        ),
+        default=0,
+    )
+    extra = ()
+    if "/" in operations and result:
+        extra = tuple(d for d in divisor_table(range_size)[result] if d > end)
+    return end, extra
+
+
+def next_step(
+    result: int,
+    range_size: int,
+    operations: Sequence[str] = OPERATIONS,
+    rng: random.Random = random,
+) -> Tuple[str, int]:
+    """Operation and operand which continue the chain from 'result'"""
+    operand = rng.randint(0, range_size)
+    valid = valid_operations(result, operand, range_size, operations)
+    if not valid:
+        end, extra = redraw_operands(result, range_size, operations)
+        if not end + len(extra):
+            # e.g. only "+" at the top of the range, nothing but 0 continues the chain
+            operand = 0
+        else:
+            index = rng.randrange(end + len(extra))
+            operand = index + 1 if index < end else extra[index - end]
+        valid = valid_operations(result, operand, range_size, operations)
+    return rng.choice(valid), operand
+
+
+def generate_chain(
+    start: int,
+    range_size: int,
+    length: int = 10,
+    operations: Sequence[str] = OPERATIONS,
+    rng: random.Random = random,
+) -> Tuple[List[int], List[str]]:
+    """Numbers (starting with 'start') and the operations between them"""
+    if not 0 <= start <= range_size:
+        raise ValueError(f"Start {start} is out of range 0-{range_size}")
+    if not operations or not set(operations) <= set(OPERATIONS):
+        raise ValueError(f"Operations must be some of {', '.join(OPERATIONS)}")
+    numbers, chars = [start], []
+    result = start
+    for _ in range(length - 1):
+        operation, operand = next_step(result, range_size, operations, rng)
+        numbers.append(operand)
+        chars.append(operation)
+        result = apply(result, operand, operation)
+    return numbers, chars
+
+
+def chain_result(numbers: Sequence[int], chars: Sequence[str]) -> int:
+    """The result of the whole chain, i.e. the last answer"""
+    result = numbers[0]
+    for number, char in zip(numbers[1:], chars):
+        result = apply(result, number, char)
+    return result
+
+
+def apply(a: int, b: int, operation: str) -> int:
+    match operation:
+        case "+":
+            return a + b
+        case "-":
+            return a - b
+        case "*":
+            return a * b
+        case "/":
+            return a // b
+        case _:
+            raise ValueError(f"Invalid operation: {operation}")
@@ -1,12 +1,42 @@
 import random
-from typing import Dict, Generator, List, Optional
+from concurrent.futures import Executor, Future
+from typing import TYPE_CHECKING, Dict, Generator, List, Optional, Tuple
 
 from src.games.points import Points
+from src.games.seed import new_seed
+
+from .chain import OPERATIONS, apply, chain_result, generate_chain, range_size
+
+if TYPE_CHECKING:
+    from .bank import BankedChains
 
 
 class ResultKeeper:
-    def __init__(self, level: int):
+    def __init__(
+        self,
+        level: int,
+        bank: Optional["BankedChains"] = None,
+        seed: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        'bank' gives pre-generated chains, levels missing in it are generated live.
+        Live chains are drawn from generators derived from 'seed' (a new one when it's
+        None) and the number of the round, so the game is reproduced from the seed and
+        the answers. With 'executor' the chain of the next round is generated there
+        while the current round is played.
+        """
         self.level = level
+        self.bank = bank
+        self.seed = new_seed() if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.executor = executor
+        self.rounds = 0
+        # (round, level, start) -> the chain generated ahead
+        self._prefetched: Dict[Tuple[int, int, int], Future] = {}
+        # a chain drawn from the bank can't be reproduced from the seed
+        self.replayable = True
+        self.answers: List[int] = []
         self.level_start = self.level
         self.payload = []
         self.points = Points(level)
@@ -30,10 +60,16 @@ class ResultKeeper:
             "steps": self.steps,
             "wrong_answers": self.points.wrong_answer,
             "correct_answers": self.points.correct_answers,
+            "seed": self.seed if self.replayable else None,
+            "answers": ",".join(str(answer) for answer in self.answers),
         }
 
     def _set_math_char(self, math_char: Optional[List[str]] = None) -> List[str]:
-        """Generate a sequence of mathematical operations that work with the given payload."""
+        """
+        Generate a sequence of mathematical operations that work with the given payload.
+        The chain is built from the first number of the payload, the rest of the payload
+        is replaced with operands valid for the picked operations.
+        """
         if not self.payload:
             self.create_payload()
 
@@ -41,74 +77,73 @@ class ResultKeeper:
         if len(payload) < 10:
             raise ValueError("Payload must contain at least 10 numbers")
 
-        if math_char is None:
-            math_char = ["+", "-", "*", "/"]
-
-        result = []
-        chars = math_char[:]
-        r = payload[0]
-        i = 1
-
-        while i < 10:
-            temp_res = r
-            if not chars:
-                chars = math_char[:]
-                payload[i] = random.randint(1, self.range_size)  # Avoid 0 for division
-                continue
-
-            char = random.choice(chars)
-            valid_operation = True
-
-            match char:
-                case "+":
-                    temp_res = r + payload[i]
-                case "-":
-                    if r - payload[i] < 0:
-                        valid_operation = False
-                    else:
-                        temp_res = r - payload[i]
-                case "*":
-                    temp_res = r * payload[i]
-                case "/":
-                    if payload[i] == 0 or r % payload[i] != 0:
-                        valid_operation = False
-                    else:
-                        temp_res = r // payload[i]  # Using integer division
-
-            if valid_operation and 0 <= temp_res <= self.range_size:
-                result.append(char)
-                i += 1
-                r = temp_res
-                chars = math_char[:]
+        round_number = self.rounds
+        self.rounds += 1
+        prefetched = self._prefetched.pop((round_number, self.level, payload[0]), None)
+        # the candidate of the other level isn't needed
+        for future in self._prefetched.values():
+            future.cancel()
+        self._prefetched.clear()
+
+        if math_char is None and len(payload) == 10:
+            chain = self.bank.draw(self.level, payload[0]) if self.bank else None
+            if chain:
+                self.replayable = False
+            elif prefetched:
+                chain = prefetched.result()
             else:
-                chars.remove(char)
-
-        if len(result) < 9:  # We need 9 operations for 10 numbers
-            raise ValueError("Could not find valid sequence of operations")
-        self.payload = payload
+                chain = self._chain(round_number, self.level, payload[0])
+            self.payload, result = chain
+            self._prefetch(round_number + 1, chain_result(*chain))
+            return result
+
+        self.payload, result = self._chain(
+            round_number,
+            self.level,
+            payload[0],
+            len(payload),
+            list(OPERATIONS) if math_char is None else math_char,
+        )
         return result
 
+    def _chain(
+        self,
+        round_number: int,
+        level: int,
+        start: int,
+        length: int = 10,
+        operations: List[str] = OPERATIONS,
+    ) -> Tuple[List[int], List[str]]:
+        """The live chain of the round, the same when it's generated ahead or not"""
+        rng = random.Random(f"{self.seed}:{round_number}")
+        return generate_chain(start, range_size(level), length, operations, rng)
+
+    def _prefetch(self, round_number: int, start: int) -> None:
+        """
+        Generate the chains of the next round in the executor. The round starts from the
+        result of the current chain, at the same level or the next one when all answers
+        of the current round are correct.
+        """
+        if not self.executor:
+            return
+        for level in (self.level, self.level + 1):
+            if self.bank and self.bank.has(level, start):
+                continue
+            self._prefetched[(round_number, level, start)] = self.executor.submit(
+                self._chain, round_number, level, start
+            )
+
     def create_payload(self, payload: Optional[List[int]] = None):
         if not payload:
             payload = []
         size_payload = len(payload)
         payload += [
-            random.randint(0, self.range_size) for _ in range(10 - size_payload)
+            self.rng.randint(0, self.range_size) for _ in range(10 - size_payload)
         ]
         self.payload = payload
 
     def calculate(self, a, b, op):
-        match op:
-            case "+":
-                return a + b
-            case "-":
-                return a - b
-            case "*":
-                return a * b
-            case "/":
-                return a // b
-            case _:
-                raise ValueError(f"Invalid operation: {op}")
+        return apply(a, b, op)
 
     def _question(self, a: int, b: int, char: str):
         """Helper method to generate questions"""
@@ -120,6 +155,7 @@ class ResultKeeper:
         """Helper method to handle answer validation"""
         while True:
             answer = yield question, False
+            self.answers.append(answer)
             if answer == expected_result:
                 self.points.update_points()
                 self._is_init = False
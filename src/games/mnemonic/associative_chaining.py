@@ -1,19 +1,49 @@
+import random
+from dataclasses import dataclass
 from enum import Enum
-from itertools import zip_longest
 from pathlib import Path
-from random import sample
-from typing import Generator, List, Tuple
+from typing import Generator, Iterable, List, Optional, Tuple
 
 from src.games.points import Points
+from src.games.seed import new_seed
 from src.models.enum_types import Language
 
+from .corpus import load_corpus, sample_words
+from .grading import AnswerKey, Grade, Grading
+from .scheduler import DUE_SHARE, ReviewScheduler
+from .seen import SeenWords
+
 DATA_PATH = Path(__file__).parent.parent / Path("data")
 
 
+def corpus_name(language: Language) -> str:
+    return language.value.lower() + "_noun"
+
+
 class Color(Enum):
     RED = "FF0000"
     YELLOW = "FFFF00"
     GREEN = "00FF00"
+    LIGHT_YELLOW = "FFFF99"
+    LIGHT_GREEN = "99FF99"
+
+
+GRADE_COLORS = {
+    Grade.CORRECT: Color.GREEN.value,
+    Grade.GOOD: Color.YELLOW.value,
+    Grade.NEARLY_CORRECT: Color.LIGHT_GREEN.value,
+    Grade.NEARLY_GOOD: Color.LIGHT_YELLOW.value,
+    Grade.WRONG: Color.RED.value,
+    Grade.SKIPPED: Color.RED.value,
+    Grade.MISSING: Color.RED.value,
+}
+
+
+@dataclass
+class SubmissionResult:
+    result: List[Tuple[str, str]]
+    points: Points
+    skip_answers: int
 
 
 class AssociativeChaining:
@@ -22,17 +52,56 @@ class AssociativeChaining:
     GOOD_ANSWER_COLOR = Color.YELLOW.value
     START_SIZE = 10
 
-    def __init__(self, level: int, language: Language):
+    def __init__(
+        self,
+        level: int,
+        language: Language,
+        seed: Optional[int] = None,
+        max_distance: int = 0,
+        seen: Optional[SeenWords] = None,
+        scheduler: Optional[ReviewScheduler] = None,
+        word_ids: Optional[List[int]] = None,
+        due_words: Optional[List[str]] = None,
+    ):
+        """Words are drawn from the generator of 'seed' (a new one when it's None),
+        from the words not in 'seen' when it's given, and mixed with the words due for
+        a review in 'scheduler'. The ids of the words drawn from 'seen' and the due
+        words are saved with the game, the replay passes them in 'word_ids' and
+        'due_words'.
+        Answers within 'max_distance' edits of a word get part of its points."""
         self.level = level
         self.level_start = self.level
         self.language = language
-        self.data_file = self.language.value.lower() + "_noun"
+        self.data_file = corpus_name(self.language)
         self.path_file = DATA_PATH / Path(self.data_file)
+        self.max_distance = max_distance
+        self.seen = seen
+        self.scheduler = scheduler
+        self.word_ids = word_ids
+        self.due_words = due_words
         self.payload = []
         self.user_answers = []
         self.skip_answers = 0
         self._size = None
         self.points = Points(level)
+        self.seed = new_seed() if seed is None else seed
+        self.rng = random.Random(self.seed)
+
+    @property
+    def payload(self) -> List[str]:
+        return self._payload
+
+    @payload.setter
+    def payload(self, payload: List[str]) -> None:
+        self._payload = payload
+        self._answer_key = None
+
+    @property
+    def answer_key(self) -> AnswerKey:
+        """Index of the payload, built once per payload"""
+        if self._answer_key is None:
+            self._answer_key = AnswerKey(self._payload, self.max_distance)
+        return self._answer_key
 
     @property
     def size(self) -> int:
@@ -51,44 +120,85 @@ class AssociativeChaining:
             "user_answers": " ,".join(self.user_answers),
             "amt_words": self.size,
             "language": self.language,
+            "max_distance": self.max_distance,
+            "seed": self.seed,
+            "word_ids": (
+                None
+                if self.word_ids is None
+                else ",".join(str(word_id) for word_id in self.word_ids)
+            ),
+            "due_words": None if self.due_words is None else " ,".join(self.due_words),
         }
 
     def create_payload(self):
-        with open(self.path_file, encoding="utf-8") as file:
-            raw_payload = file.read().split("\n")
-        self.payload = sample(raw_payload, self.size)
+        if self.scheduler is None and self.due_words is None:
+            self.payload = self._draw_words()
+            return
+        if self.due_words is None:
+            self.due_words = self.scheduler.due_words(int(self.size * DUE_SHARE))
+        due = set(self.due_words)
+        fresh = [word for word in self._draw_words() if word not in due]
+        payload = self.due_words + fresh[: self.size - len(self.due_words)]
+        self.rng.shuffle(payload)
+        self.payload = payload
+
+    def _draw_words(self) -> List[str]:
+        if self.seen is None and self.word_ids is None:
+            return sample_words(self.path_file, self.size, self.rng)
+        # the unseen words are drawn by a generator of their own, so the replay, which
+        # gets their ids, uses 'rng' the same way
+        rng = random.Random(self.rng.getrandbits(64))
+        if self.word_ids is None:
+            self.word_ids = self.seen.sample_ids(self.size, rng)
+            self.seen.mark(self.word_ids)
+        corpus = load_corpus(self.path_file)
+        return [corpus[word_id] for word_id in self.word_ids]
 
     def check_answer(self, answers: List[str]) -> List[Tuple[str, str]]:
-        result = []
-        answers = [a.lower() for a in answers]
-        for user_answer, answer in zip_longest(answers, self.payload):
-            # when to many answers
-            if not answer:
-                self.points.update_points(is_wrong_answer=True)
-                result.append((user_answer, AssociativeChaining.BAD_ANSWER_COLOR))
-                continue
-            # points for good order
-            if user_answer == answer:
-                self.points.update_points(bonus=2)
-                result.append((user_answer, AssociativeChaining.CORRECT_ANSWER_COLOR))
-            # points for memorize noun
-            elif user_answer in self.payload:
-                self.points.update_points()
-                result.append((user_answer, AssociativeChaining.GOOD_ANSWER_COLOR))
-            else:
-                # points for bad or missing answers
-                if user_answer == "-":
-                    self.skip_answers += 1
-                elif user_answer is None:
-                    self.points.wrong_answer += 1
-                else:
-                    self.points.update_points(is_wrong_answer=True)
-                result.append((user_answer, AssociativeChaining.BAD_ANSWER_COLOR))
+        grading = self.answer_key.grade(answers)
+        result = self._award(grading, self.points)
+        self.skip_answers += grading.count(Grade.SKIPPED)
+        if self.scheduler is not None:
+            self.scheduler.review(self.payload, grading)
         # update level
         self.update_level()
 
         return result
 
+    def check_answers(self, submissions: Iterable[List[str]]) -> List[SubmissionResult]:
+        """Classroom mode: grade the answers of many players against the payload, every
+        player gets own points, the level of the game doesn't change"""
+        return [
+            SubmissionResult(
+                result=self._award(grading, points := Points(self.level)),
+                points=points,
+                skip_answers=grading.count(Grade.SKIPPED),
+            )
+            for grading in self.answer_key.grade_many(submissions)
+        ]
+
+    @staticmethod
+    def _award(grading: Grading, points: Points) -> List[Tuple[str, str]]:
+        for _, grade in grading.grades:
+            match grade:
+                # points for good order
+                case Grade.CORRECT:
+                    points.update_points(bonus=2)
+                # points for memorize noun
+                case Grade.GOOD:
+                    points.update_points()
+                # half of the points for a typo or missing diacritics
+                case Grade.NEARLY_CORRECT:
+                    points.update_partial_points(bonus=2)
+                case Grade.NEARLY_GOOD:
+                    points.update_partial_points()
+                # points for bad or missing answers
+                case Grade.WRONG:
+                    points.update_points(is_wrong_answer=True)
+                case Grade.MISSING:
+                    points.wrong_answer += 1
+        return [(answer, GRADE_COLORS[grade]) for answer, grade in grading.grades]
+
     def update_level(self):
         if self.size == self.points.correct_answers:
             self.level += 1
@@ -0,0 +1,369 @@
+"""
+Word corpora of AssociativeChaining. A word file is read once per process: the words
+are normalized (NFC, stripped, lower case), empty lines and repeated words are dropped,
+and the result is compiled to a file read through mmap, so processes using the same
+corpus share its pages. The compiled file is rebuilt when the word file changes.
+
+Compiled file layout (little endian):
+    header   magic, number of words, size and mtime (ns) of the word file
+    offsets  (words + 1) uint32, the start of every word in the buffer
+    buffer   the words in UTF-8, in the order of the word file
+
+The id of a word is its position in the corpus, word i is read in O(1). Compiling is an
+external sort: the words are written to a temporary file and their hashes and positions
+are sorted in runs of RUN_SIZE words, the merged runs give the repeated words (the words
+of the same hash are compared byte by byte), and the first occurrences, sorted back by
+position the same way, are copied to the compiled file. The memory is a run and a block
+of MERGE_BLOCK records for every run, not the words or a record per word.
+
+When the compiled file can't be written, e.g. the cache directory is read only,
+'sample_words' draws the words streaming the word file with reservoir sampling, in
+memory of the size of the sample.
+"""
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import random
+import shutil
+import struct
+import threading
+import unicodedata
+from array import array
+from functools import cached_property
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+
+CACHE_DIR = Path(".corpus")
+
+MAGIC = b"BBWORDS1"
+HEADER = struct.Struct("<8sIQQ")
+OFFSET = struct.Struct("<I")
+# words sorted in memory at a time while compiling, and records read from every sorted
+# run at a time while merging the runs
+RUN_SIZE = 1 << 20
+MERGE_BLOCK = 1 << 12
+# hash and position of a word in the file of all the words, and the position alone
+WORD = np.dtype([("hash", "<i8"), ("start", "<u8"), ("end", "<u8")])
+SPAN = np.dtype([("start", "<u8"), ("end", "<u8")])
+
+
+def normalize(word: str) -> str:
+    return unicodedata.normalize("NFC", word.strip()).lower()
+
+
+def read_words(path: Union[str, os.PathLike]) -> Iterator[str]:
+    """Normalized words of the file, without empty lines"""
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            word = normalize(line)
+            if word:
+                yield word
+
+
+def _source_stamp(source: Union[str, os.PathLike]):
+    stat = os.stat(source)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _word_hash(data: bytes) -> int:
+    # only compared within one compilation, the hash of the process will do
+    return hash(data)
+
+
+def _word_runs(
+    source: Union[str, os.PathLike], words: BinaryIO
+) -> Iterator[np.ndarray]:
+    """WORD records of the words of the word file, RUN_SIZE at a time, the words are
+    written to 'words'"""
+    hashes, starts, ends = array("q"), array("Q"), array("Q")
+    end = 0
+    for word in read_words(source):
+        data = word.encode("utf-8")
+        words.write(data)
+        starts.append(end)
+        end += len(data)
+        ends.append(end)
+        hashes.append(_word_hash(data))
+        if len(ends) == RUN_SIZE:
+            yield _records(hashes, starts, ends)
+            hashes, starts, ends = array("q"), array("Q"), array("Q")
+    if ends:
+        yield _records(hashes, starts, ends)
+
+
+def _records(hashes: array, starts: array, ends: array) -> np.ndarray:
+    records = np.empty(len(ends), dtype=WORD)
+    records["hash"] = np.frombuffer(hashes, dtype=np.int64)
+    records["start"] = np.frombuffer(starts, dtype=np.uint64)
+    records["end"] = np.frombuffer(ends, dtype=np.uint64)
+    return records
+
+
+def _write_runs(
+    chunks: Iterable[np.ndarray], path: Path, key: str
+) -> List[Tuple[int, int]]:
+    """Every chunk sorted by 'key' (the order of equal keys is kept) and written to the
+    file, the bounds of the runs in records"""
+    runs = []
+    position = 0
+    with open(path, "wb") as file:
+        for chunk in chunks:
+            file.write(chunk[np.argsort(chunk[key], kind="stable")].tobytes())
+            runs.append((position, position + len(chunk)))
+            position += len(chunk)
+    return runs
+
+
+def _read_run(file: BinaryIO, dtype: np.dtype, start: int, end: int) -> Iterator[tuple]:
+    while start < end:
+        count = min(MERGE_BLOCK, end - start)
+        file.seek(start * dtype.itemsize)
+        yield from np.fromfile(file, dtype=dtype, count=count).tolist()
+        start += count
+
+
+def _merge_runs(file: BinaryIO, dtype: np.dtype, runs: List[Tuple[int, int]]):
+    """Records of the sorted runs of the file in one sorted stream"""
+    return heapq.merge(*(_read_run(file, dtype, start, end) for start, end in runs))
+
+
+def _first_occurrences(
+    records: Iterable[tuple], buffer: mmap.mmap
+) -> Iterator[np.ndarray]:
+    """SPAN of the first occurrence of every word, RUN_SIZE at a time, from the WORD
+    records sorted by hash and position"""
+    kept = []
+    group_hash, group = None, []
+    for word_hash, start, end in records:
+        if word_hash != group_hash:
+            group_hash, group = word_hash, []
+        # different words with the same hash are told apart by their bytes
+        data = buffer[start:end]
+        if data not in group:
+            group.append(data)
+            kept.append((start, end))
+            if len(kept) == RUN_SIZE:
+                yield np.array(kept, dtype=SPAN)
+                kept = []
+    if kept:
+        yield np.array(kept, dtype=SPAN)
+
+
+def compile_corpus(
+    source: Union[str, os.PathLike], target: Union[str, os.PathLike]
+) -> None:
+    tmp_path = Path(f"{target}.{os.getpid()}.tmp")
+    words_path, runs_path, spans_path, buffer_path = (
+        Path(f"{target}.{os.getpid()}.{name}.tmp")
+        for name in ("words", "runs", "spans", "buffer")
+    )
+    try:
+        # all the words, repeated ones too, and their records sorted by hash in runs
+        with open(words_path, "wb") as words:
+            runs = _write_runs(_word_runs(source, words), runs_path, "hash")
+
+        # the first occurrence of every word, sorted back in the order of the word file
+        spans = []
+        if runs:
+            with open(words_path, "rb") as words, mmap.mmap(
+                words.fileno(), 0, access=mmap.ACCESS_READ
+            ) as buffer, open(runs_path, "rb") as records:
+                spans = _write_runs(
+                    _first_occurrences(_merge_runs(records, WORD, runs), buffer),
+                    spans_path,
+                    "start",
+                )
+        count = spans[-1][1] if spans else 0
+
+        with open(tmp_path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, count, *_source_stamp(source)))
+            file.write(OFFSET.pack(0))
+            if count:
+                with open(words_path, "rb") as words, mmap.mmap(
+                    words.fileno(), 0, access=mmap.ACCESS_READ
+                ) as buffer, open(spans_path, "rb") as kept, open(
+                    buffer_path, "wb"
+                ) as kept_words:
+                    offset = 0
+                    for start, end in _merge_runs(kept, SPAN, spans):
+                        offset += end - start
+                        if offset >= 1 << (8 * OFFSET.size):
+                            raise ValueError(f"{source} is too large for a corpus")
+                        file.write(OFFSET.pack(offset))
+                        kept_words.write(buffer[start:end])
+                with open(buffer_path, "rb") as kept_words:
+                    shutil.copyfileobj(kept_words, file)
+            file.flush()
+            os.fsync(file.fileno())
+        # other processes see either the old file or the whole new one
+        os.replace(tmp_path, target)
+    finally:
+        for path in (words_path, runs_path, spans_path, buffer_path, tmp_path):
+            path.unlink(missing_ok=True)
+
+
+class Corpus:
+    """Read-only view of a compiled corpus"""
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self._mmap)
+        magic, self._count, *source_stamp = (
+            HEADER.unpack_from(self._mmap) if size >= HEADER.size else (b"", 0)
+        )
+        buffer_start = HEADER.size + (self._count + 1) * OFFSET.size
+        if magic != MAGIC or size < buffer_start:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a compiled corpus")
+        # size and mtime of the word file the corpus was compiled from
+        self.source_stamp = tuple(source_stamp)
+        self._view = memoryview(self._mmap)
+        self._offsets = self._view[HEADER.size : buffer_start].cast("I")
+        self._buffer = self._view[buffer_start:]
+        if self._offsets[-1] > len(self._buffer):
+            self.close()
+            raise ValueError(f"{path} is truncated")
+
+    def __len__(self) -> int:
+        return self._count
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Hash of the words, the same for the same words on every machine"""
+        return hashlib.blake2b(self._view[HEADER.size :], digest_size=8).hexdigest()
+
+    def word(self, word_id: int) -> str:
+        if not 0 <= word_id < self._count:
+            raise IndexError(f"No word {word_id} in the corpus")
+        start, end = self._offsets[word_id], self._offsets[word_id + 1]
+        return str(self._buffer[start:end], "utf-8")
+
+    def __getitem__(self, word_id: int) -> str:
+        return self.word(word_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.word(word_id) for word_id in range(self._count))
+
+    def sample_ids(self, k: int, rng: random.Random = random) -> List[int]:
+        """k different word ids, in O(k) for k much smaller than the corpus"""
+        return rng.sample(range(self._count), k)
+
+    def sample(self, k: int, rng: random.Random = random) -> List[str]:
+        return [self.word(word_id) for word_id in self.sample_ids(k, rng)]
+
+    def close(self) -> None:
+        # the views must be released before the mmap can be closed
+        for view in (self._offsets, self._buffer, self._view):
+            view.release()
+        self._mmap.close()
+
+
+def compiled_path(source: Union[str, os.PathLike], cache_dir: Path = CACHE_DIR) -> Path:
+    """Path of the compiled corpus, unique for every word file"""
+    source = Path(source).resolve()
+    digest = hashlib.sha1(str(source).encode(), usedforsecurity=False).hexdigest()
+    return cache_dir / f"{source.name}-{digest[:10]}.words"
+
+
+_corpora: Dict[Path, Corpus] = {}
+_lock = threading.Lock()
+
+
+def load_corpus(source: Union[str, os.PathLike], cache_dir: Path = CACHE_DIR) -> Corpus:
+    """The corpus of the word file, compiled and opened once per process"""
+    source = Path(source).resolve()
+    with _lock:
+        corpus = _corpora.get(source)
+        if corpus is None or corpus.source_stamp != _source_stamp(source):
+            target = compiled_path(source, cache_dir)
+            corpus = _open_compiled(target)
+            if corpus is None or corpus.source_stamp != _source_stamp(source):
+                if corpus:
+                    corpus.close()
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                compile_corpus(source, target)
+                corpus = Corpus(target)
+            _corpora[source] = corpus
+        return corpus
+
+
+def _open_compiled(path: Path):
+    try:
+        return Corpus(path)
+    except (OSError, ValueError):
+        return None
+
+
+def reservoir_sample(
+    words: Iterable[str], k: int, rng: random.Random = random
+) -> List[str]:
+    """k different words of the stream, each equally likely, in one pass and O(k)
+    memory (Li's algorithm L: the number of words to skip is drawn, not every word).
+    Words repeated in the stream are a bit more likely than the others."""
+    if not k:
+        return []
+    words = iter(words)
+    reservoir: List[str] = []
+    chosen = set()
+    for word in words:
+        if word not in chosen:
+            chosen.add(word)
+            reservoir.append(word)
+            if len(reservoir) == k:
+                break
+    if len(reservoir) < k:
+        raise ValueError("Sample larger than the words")
+
+    weight = math.exp(math.log(_open_unit(rng)) / k)
+    while True:
+        skip = (
+            math.floor(math.log(_open_unit(rng)) / math.log1p(-weight))
+            if weight < 1
+            else 0
+        )
+        word = next(islice(words, skip, None), None)
+        if word is None:
+            break
+        if word not in chosen:
+            slot = rng.randrange(k)
+            chosen.remove(reservoir[slot])
+            chosen.add(word)
+            reservoir[slot] = word
+        weight *= math.exp(math.log(_open_unit(rng)) / k)
+    rng.shuffle(reservoir)
+    return reservoir
+
+
+def _open_unit(rng: random.Random) -> float:
+    """Random number from (0, 1)"""
+    while True:
+        value = rng.random()
+        if value:
+            return value
+
+
+def sample_words(
+    source: Union[str, os.PathLike],
+    k: int,
+    rng: random.Random = random,
+    cache_dir: Path = CACHE_DIR,
+) -> List[str]:
+    """k different words of the word file: drawn from the compiled corpus, or streamed
+    from the word file when the corpus can't be compiled"""
+    try:
+        corpus = load_corpus(source, cache_dir)
+    except OSError:
+        return reservoir_sample(read_words(source), k, rng)
+    return corpus.sample(k, rng)
+
+
+def clear_corpora() -> None:
+    """Forget the loaded corpora, e.g. after the word files were replaced"""
+    with _lock:
+        _corpora.clear()
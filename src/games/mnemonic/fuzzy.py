@@ -0,0 +1,136 @@
+"""
+Fuzzy matching of the answers: words are compared folded (without diacritics, "żółw" and
+"zolw" are the same) by the Levenshtein distance, computed bit-parallel (Myers, in the
+variant of Hyyrö for the distance of whole words): a column of the distance matrix is a
+pair of bit vectors updated with a few integer operations per character of the text.
+The comparison stops as soon as the distance can't fit in the limit. A limit of one edit,
+the common case, is checked without the matrix: the words must be the same after their
+first different char.
+"""
+import unicodedata
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+# letters which don't decompose to a base letter and a combining mark
+FOLDED_LETTERS = str.maketrans(
+    {"ł": "l", "đ": "d", "ø": "o", "ß": "ss", "æ": "ae", "œ": "oe", "ı": "i"}
+)
+
+
+def _fold(word: str) -> str:
+    decomposed = unicodedata.normalize("NFD", word)
+    return "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    ).translate(FOLDED_LETTERS)
+
+
+# folded Latin letters with diacritics, to fold most words in one translate
+FOLDED_LATIN = str.maketrans(
+    {chr(code): _fold(chr(code)) for code in range(0xC0, 0x250) if chr(code).isalpha()}
+)
+
+
+def fold(word: str) -> str:
+    """The word without diacritics"""
+    if word.isascii():
+        return word
+    folded = word.translate(FOLDED_LATIN)
+    return folded if folded.isascii() else _fold(folded)
+
+
+def deletions(word: str, max_deleted: int) -> Set[str]:
+    """The word with up to 'max_deleted' chars deleted. Words within 'max_deleted' edits
+    of each other always share one of them, so they find the candidates for the
+    comparison in an index without comparing with every word."""
+    result = {word}
+    layer = {word}
+    for _ in range(max_deleted):
+        layer = {
+            variant[:position] + variant[position + 1 :]
+            for variant in layer
+            for position in range(len(variant))
+        }
+        result |= layer
+    return result
+
+
+def one_edit_halves(word: str) -> Iterator[Tuple[str, str]]:
+    """First and last halves of the answers of every length one edit away from the
+    word. The edit is in one half of the answer, the other half is the same in the
+    word: an answer one edit away has one of the halves of its length."""
+    for length in range(max(len(word) - 1, 0), len(word) + 2):
+        middle = length // 2
+        yield word[:middle], word[len(word) - (length - middle) :]
+
+
+class Pattern:
+    """A word prepared for comparisons with many other words"""
+
+    __slots__ = ("word", "length", "masks")
+
+    def __init__(self, word: str):
+        self.word = word
+        self.length = len(word)
+        # char -> bits of the positions of the char in the word
+        self.masks: Dict[str, int] = {}
+        for position, char in enumerate(word):
+            self.masks[char] = self.masks.get(char, 0) | 1 << position
+
+    def distance(self, text: str, max_distance: Optional[int] = None) -> Optional[int]:
+        """Levenshtein distance to the text, None when it's greater than max_distance"""
+        m, n = self.length, len(text)
+        limit = max(m, n) if max_distance is None else max_distance
+        if abs(m - n) > limit:
+            return None
+        if limit <= 1:
+            return within_one(self.word, text, limit)
+        if not m:
+            return n
+
+        full = (1 << m) - 1
+        last = 1 << (m - 1)
+        # vertical deltas of the column: +1 in 'plus', -1 in 'minus'
+        plus, minus = full, 0
+        score = m
+        for column, char in enumerate(text, 1):
+            eq = self.masks.get(char, 0)
+            xv = eq | minus
+            xh = (((eq & plus) + plus) ^ plus) | eq
+            horizontal_plus = minus | (~(xh | plus) & full)
+            horizontal_minus = plus & xh
+            if horizontal_plus & last:
+                score += 1
+            elif horizontal_minus & last:
+                score -= 1
+            # the distance decreases at most by one per remaining char
+            if score - (n - column) > limit:
+                return None
+            # the first row grows by one in every column
+            horizontal_plus = (horizontal_plus << 1) | 1
+            horizontal_minus <<= 1
+            plus = (horizontal_minus | ~(xv | horizontal_plus)) & full
+            minus = horizontal_plus & xv & full
+        return score if score <= limit else None
+
+
+def within_one(a: str, b: str, limit: int = 1) -> Optional[int]:
+    """Levenshtein distance of words, None when it's greater than 'limit' (0 or 1)"""
+    if a == b:
+        return 0
+    if not limit:
+        return None
+    if len(a) < len(b):
+        a, b = b, a
+    if len(a) - len(b) > 1:
+        return None
+    first = 0
+    for char_a, char_b in zip(a, b):
+        if char_a != char_b:
+            break
+        first += 1
+    # a substitution or the deletion of the first different char of the longer word
+    skipped = first + 1 if len(a) == len(b) else first
+    return 1 if a[first + 1 :] == b[skipped:] else None
+
+
+def levenshtein(a: str, b: str, max_distance: Optional[int] = None) -> Optional[int]:
+    return Pattern(a).distance(b, max_distance)
@@ -0,0 +1,211 @@
+"""
+Grading of the AssociativeChaining answers. AnswerKey indexes the words of a payload once,
+then every submission is graded in O(n):
+
+    CORRECT  the word of the payload at the same position
+    GOOD     a word of the payload at another position
+    WRONG    any other word, an extra answer or a word repeated more times than it
+             appears in the payload
+    SKIPPED  "-"
+    MISSING  no answer at the position
+
+Answers at their position are matched first, so a repeated word is GOOD only while the
+payload still has positions of it which weren't answered.
+
+With 'max_distance' the answers left WRONG are matched fuzzily: an answer which differs
+from a word of the payload only by diacritics or by at most 'max_distance' edits (of the
+folded words) is NEARLY_CORRECT at the position of the word, NEARLY_GOOD elsewhere.
+
+The candidates for the comparison are looked up in indexes of the payload: the words
+within one edit, the common case, by the halves of the answer (the edit is in one half,
+the other one is the same in both words), the words farther away by the deletions of
+the answer, which they share with it.
+"""
+from dataclasses import dataclass, field
+from enum import Enum
+from itertools import zip_longest
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .corpus import normalize
+from .fuzzy import Pattern, deletions, fold, one_edit_halves, within_one
+
+SKIP = "-"
+
+
+class Grade(Enum):
+    CORRECT = "correct"
+    GOOD = "good"
+    NEARLY_CORRECT = "nearly correct"
+    NEARLY_GOOD = "nearly good"
+    WRONG = "wrong"
+    SKIPPED = "skipped"
+    MISSING = "missing"
+
+
+@dataclass
+class Grading:
+    grades: List[Tuple[Optional[str], Grade]]
+    # words of the payload recalled by an answer -> grade of the answer
+    recalled: Dict[str, Grade] = field(default_factory=dict)
+
+    def count(self, grade: Grade) -> int:
+        return sum(1 for _, answer_grade in self.grades if answer_grade is grade)
+
+
+class AnswerKey:
+    def __init__(self, payload: Sequence[str], max_distance: int = 0):
+        if max_distance < 0:
+            raise ValueError("max_distance can't be negative")
+        self.payload = list(payload)
+        self.max_distance = max_distance
+        # word -> positions of the word in the payload
+        self.positions: Dict[str, List[int]] = {}
+        for position, word in enumerate(self.payload):
+            self.positions.setdefault(word, []).append(position)
+
+        # indexes of the folded words, only for the fuzzy matching
+        self.keys: Dict[str, str] = {}
+        self.words_by_key: Dict[str, List[str]] = {}
+        # max distance 1: first and last half of the answers which can be one edit away
+        # -> folded words
+        self.first_halves: Dict[str, Set[str]] = {}
+        self.last_halves: Dict[str, Set[str]] = {}
+        # larger distances: folded word with deleted chars -> folded words
+        self.patterns: Dict[str, Pattern] = {}
+        self.deletions: Dict[str, Set[str]] = {}
+        if max_distance:
+            for word in self.positions:
+                key = self.keys[word] = fold(word)
+                if key not in self.words_by_key:
+                    self._index(key)
+                self.words_by_key.setdefault(key, []).append(word)
+
+    def _index(self, key: str) -> None:
+        if self.max_distance == 1:
+            for first, last in one_edit_halves(key):
+                self.first_halves.setdefault(first, set()).add(key)
+                self.last_halves.setdefault(last, set()).add(key)
+            return
+        self.patterns[key] = Pattern(key)
+        for variant in deletions(key, self.max_distance):
+            self.deletions.setdefault(variant, set()).add(key)
+
+    def grade(self, answers: Sequence[str]) -> Grading:
+        answers = [normalize(answer) for answer in answers]
+        size = len(self.payload)
+        answered = min(len(answers), size)
+        grades: List[Optional[Grade]] = [
+            Grade.CORRECT if answer == word else None
+            for answer, word in zip(answers, self.payload)
+        ]
+        # too many answers or answers missing
+        grades += [Grade.WRONG] * (len(answers) - size)
+        grades += [Grade.MISSING] * (size - len(answers))
+
+        # word of the payload recalled by the answer at every position
+        matched: List[Optional[str]] = [
+            answer if grade else None for answer, grade in zip(answers, grades)
+        ]
+
+        # positions of every word still free for an answer at another position
+        left = {word: len(positions) for word, positions in self.positions.items()}
+        for position in range(answered):
+            if grades[position] is Grade.CORRECT:
+                left[answers[position]] -= 1
+        for position in range(answered):
+            if grades[position] is None and left.get(answers[position], 0) > 0:
+                left[answers[position]] -= 1
+                grades[position] = Grade.GOOD
+                matched[position] = answers[position]
+        if self.max_distance:
+            for position in range(answered):
+                if grades[position] is None and answers[position] != SKIP:
+                    nearly = self._grade_nearly(
+                        answers[position], self.payload[position], left
+                    )
+                    if nearly:
+                        grades[position], matched[position] = nearly
+
+        recalled: Dict[str, Grade] = {}
+        for word, grade in zip(matched, grades):
+            if word is not None:
+                recalled.setdefault(word, grade)
+        return Grading(
+            [
+                (answer, grade or (Grade.SKIPPED if answer == SKIP else Grade.WRONG))
+                for answer, grade in zip_longest(answers, grades)
+            ],
+            recalled,
+        )
+
+    def grade_many(self, submissions: Iterable[Sequence[str]]) -> List[Grading]:
+        """Grade the submissions of many players with the same index"""
+        return [self.grade(answers) for answers in submissions]
+
+    def _grade_nearly(
+        self, answer: str, word: str, left: Dict[str, int]
+    ) -> Optional[Tuple[Grade, str]]:
+        """Grade of the answer and the word of the payload it nearly recalls"""
+        key = fold(answer)
+        if key == self.keys[word] and left[word] > 0:
+            left[word] -= 1
+            return Grade.NEARLY_CORRECT, word
+        if self.max_distance == 1:
+            nearest = self._words_within_one(key)
+        else:
+            nearest = self._nearest_words(key)
+        if word in nearest and left[word] > 0:
+            left[word] -= 1
+            return Grade.NEARLY_CORRECT, word
+        for candidate in nearest:
+            if left[candidate] > 0:
+                left[candidate] -= 1
+                return Grade.NEARLY_GOOD, candidate
+        return None
+
+    def _words_within_one(self, key: str) -> List[str]:
+        """Words of the payload within one edit of the folded answer, the nearest first.
+        Only the words with the first or the last half of the answer are compared."""
+        middle = len(key) // 2
+        firsts = self.first_halves.get(key[:middle])
+        lasts = self.last_halves.get(key[middle:])
+        if firsts is None:
+            if lasts is None:
+                return []
+            candidates = lasts
+        elif lasts is None:
+            candidates = firsts
+        else:
+            candidates = firsts | lasts
+        found = [
+            candidate
+            for candidate in candidates
+            if within_one(candidate, key) is not None
+        ]
+        if len(found) > 1:
+            found.sort(key=lambda candidate: (candidate != key, candidate))
+        elif not found:
+            return []
+        words_by_key = self.words_by_key
+        if len(found) == 1:
+            return words_by_key[found[0]]
+        return [word for candidate in found for word in words_by_key[candidate]]
+
+    def _nearest_words(self, key: str) -> List[str]:
+        """Words of the payload close to the folded answer, the nearest first. Only the
+        words sharing a deletion with the answer are compared, the others can't be
+        within 'max_distance'."""
+        candidates = set()
+        for keys in map(self.deletions.get, deletions(key, self.max_distance)):
+            if keys:
+                candidates |= keys
+        if not candidates:
+            return []
+        found = []
+        for candidate in candidates:
+            distance = self.patterns[candidate].distance(key, self.max_distance)
+            if distance is not None:
+                found.append((distance, candidate))
+        if len(found) > 1:
+            found.sort()
+        return [word for _, candidate in found for word in self.words_by_key[candidate]]
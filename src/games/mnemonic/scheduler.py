@@ -0,0 +1,119 @@
+"""
+Spaced repetition of the AssociativeChaining words (SM-2). Every word the user has played
+has an ease and an interval in days; a word recalled well comes back after a longer
+interval, a forgotten one the next day. The words due for a review are kept in a heap by
+the due date, so the next n due words are picked in O(n log m) of the m tracked words.
+
+Updating a word pushes a new heap entry; entries older than the review of their word are
+skipped when popped.
+"""
+import datetime
+import heapq
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .grading import Grade, Grading
+
+EASE = 2.5
+MIN_EASE = 1.3
+# quality of the recall (0-5) by the grade of the answer which recalled the word
+QUALITY = {
+    Grade.CORRECT: 5,
+    Grade.GOOD: 4,
+    Grade.NEARLY_CORRECT: 3,
+    Grade.NEARLY_GOOD: 3,
+}
+# quality of a word of the payload no answer recalled
+NOT_RECALLED = 1
+# highest share of the payload given to the due words
+DUE_SHARE = 0.5
+
+
+@dataclass
+class Review:
+    word: str
+    due: datetime.datetime
+    ease: float = EASE
+    interval: int = 0
+    repetitions: int = 0
+
+
+def sm2(review: Review, quality: int, now: datetime.datetime) -> Review:
+    """The review after a recall of the given quality"""
+    if quality < 3:
+        repetitions, interval = 0, 1
+    else:
+        repetitions = review.repetitions + 1
+        match repetitions:
+            case 1:
+                interval = 1
+            case 2:
+                interval = 6
+            case _:
+                interval = round(review.interval * review.ease)
+    ease = review.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    return Review(
+        word=review.word,
+        due=now + datetime.timedelta(days=interval),
+        ease=max(MIN_EASE, ease),
+        interval=interval,
+        repetitions=repetitions,
+    )
+
+
+@dataclass
+class ReviewScheduler:
+    reviews: Dict[str, Review] = field(default_factory=dict)
+    # words reviewed since the last save
+    dirty: Set[str] = field(default_factory=set)
+
+    def __post_init__(self):
+        self._queue: List[Tuple[datetime.datetime, str]] = [
+            (review.due, review.word) for review in self.reviews.values()
+        ]
+        heapq.heapify(self._queue)
+
+    @classmethod
+    def from_reviews(cls, reviews: Iterable[Review]) -> "ReviewScheduler":
+        return cls({review.word: review for review in reviews})
+
+    def __len__(self) -> int:
+        return len(self.reviews)
+
+    def due_words(self, n: int, now: Optional[datetime.datetime] = None) -> List[str]:
+        """
+        Up to n words due at 'now', the longest overdue first. The words leave the queue
+        until they are reviewed again.
+        """
+        now = now or datetime.datetime.now()
+        words: List[str] = []
+        picked = set()
+        while self._queue and len(words) < n and self._queue[0][0] <= now:
+            due, word = heapq.heappop(self._queue)
+            # the word was reviewed after this entry was pushed
+            if self.reviews[word].due == due and word not in picked:
+                picked.add(word)
+                words.append(word)
+        return words
+
+    def review(
+        self,
+        words: Iterable[str],
+        grading: Grading,
+        now: Optional[datetime.datetime] = None,
+    ) -> None:
+        """Update the words of the payload by the recalls of the grading"""
+        now = now or datetime.datetime.now()
+        for word in words:
+            grade = grading.recalled.get(word)
+            quality = QUALITY[grade] if grade else NOT_RECALLED
+            review = self.reviews.get(word) or Review(word=word, due=now)
+            review = self.reviews[word] = sm2(review, quality, now)
+            heapq.heappush(self._queue, (review.due, word))
+            self.dirty.add(word)
+
+    def dirty_reviews(self) -> List[Review]:
+        return [self.reviews[word] for word in sorted(self.dirty)]
+
+    def mark_saved(self) -> None:
+        self.dirty.clear()
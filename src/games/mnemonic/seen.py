@@ -0,0 +1,87 @@
+"""
+Words of a corpus seen by a user: a bitmap over the word ids, so the next payloads are
+drawn from the words not seen recently. The bitmap is stored in chunks of CHUNK_BITS
+bits and only the chunks changed since the last save are written.
+
+When less than MIN_UNSEEN of the corpus would stay unseen after a payload, the seen
+words are forgotten and a new round over the corpus starts.
+"""
+import base64
+import random
+from typing import Dict, Iterable, List, Optional, Set
+
+CHUNK_BITS = 1024
+CHUNK_BYTES = CHUNK_BITS // 8
+MIN_UNSEEN = 0.25
+
+
+def encode_chunk(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def decode_chunk(text: str) -> bytes:
+    return base64.b64decode(text)
+
+
+class SeenWords:
+    def __init__(self, size: int, chunks: Optional[Dict[int, bytes]] = None):
+        """Bitmap of a corpus of 'size' words, with the saved chunks"""
+        self.size = size
+        self.bits = bytearray((size + 7) // 8)
+        for chunk, data in (chunks or {}).items():
+            start = chunk * CHUNK_BYTES
+            # chunks of another corpus size are left out
+            if 0 <= start < len(self.bits) and len(data) == len(
+                self.bits[start : start + CHUNK_BYTES]
+            ):
+                self.bits[start : start + CHUNK_BYTES] = data
+        self.seen = int.from_bytes(self.bits, "little").bit_count()
+        # chunks changed since the last save
+        self.dirty: Set[int] = set()
+
+    def __contains__(self, word_id: int) -> bool:
+        return bool(self.bits[word_id >> 3] & 1 << (word_id & 7))
+
+    def mark(self, word_ids: Iterable[int]) -> None:
+        for word_id in word_ids:
+            if word_id not in self:
+                self.bits[word_id >> 3] |= 1 << (word_id & 7)
+                self.seen += 1
+                self.dirty.add(word_id // CHUNK_BITS)
+
+    def forget(self) -> None:
+        for chunk in range(0, len(self.bits), CHUNK_BYTES):
+            if any(self.bits[chunk : chunk + CHUNK_BYTES]):
+                self.dirty.add(chunk // CHUNK_BYTES)
+        self.bits[:] = bytes(len(self.bits))
+        self.seen = 0
+
+    def sample_ids(self, k: int, rng: random.Random = random) -> List[int]:
+        """
+        k different ids of unseen words. Ids are drawn until they hit unseen words; at
+        least MIN_UNSEEN of the corpus stays available, so that's O(k) draws.
+        """
+        if not 0 <= k <= self.size:
+            raise ValueError("Sample larger than the corpus or negative")
+        if self.size - self.seen - k < self.size * MIN_UNSEEN:
+            self.forget()
+        if not self.seen:
+            return rng.sample(range(self.size), k)
+        drawn: Set[int] = set()
+        result = []
+        while len(result) < k:
+            word_id = rng.randrange(self.size)
+            if word_id not in self and word_id not in drawn:
+                drawn.add(word_id)
+                result.append(word_id)
+        return result
+
+    def chunk(self, chunk: int) -> bytes:
+        return bytes(self.bits[chunk * CHUNK_BYTES : (chunk + 1) * CHUNK_BYTES])
+
+    def dirty_chunks(self) -> Dict[int, bytes]:
+        """The chunks changed since the last save"""
+        return {chunk: self.chunk(chunk) for chunk in sorted(self.dirty)}
+
+    def mark_saved(self) -> None:
+        self.dirty.clear()
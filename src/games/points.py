@@ -8,6 +8,7 @@ class Points:
         self.answers_status: List[bool] = []
         self.correct_answers: int = 0
         self.wrong_answer: int = 0
+        self.partial_answers: int = 0
 
     def update_points(self, is_wrong_answer: bool = False, bonus: int = 1) -> None:
         if is_wrong_answer:
@@ -16,3 +17,8 @@ class Points:
         else:
             self.points += self.level * bonus
             self.correct_answers += 1
+
+    def update_partial_points(self, bonus: int = 1) -> None:
+        """Half of the points of a correct answer, for a nearly correct one"""
+        self.points += self.level * bonus // 2
+        self.partial_answers += 1
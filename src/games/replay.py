@@ -0,0 +1,95 @@
+"""
+Replay of finished games: the engine is created with the seed of the session and fed
+with the recorded answers, so it asks the same questions and earns the same points.
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from src.models.enum_types import Language
+
+from .math import ResultKeeper
+from .mnemonic.associative_chaining import AssociativeChaining
+
+
+@dataclass
+class Replay:
+    questions: List[str]
+    points_earned: int
+    finished_level: int
+
+
+def parse_answers(answers: Optional[str]) -> List[int]:
+    """Answers of ResultKeeper as stored in the session row"""
+    return [int(answer) for answer in answers.split(",")] if answers else []
+
+
+def parse_user_answers(user_answers: str) -> List[str]:
+    """Answers of AssociativeChaining as stored in the session row"""
+    return user_answers.split(" ,")
+
+
+def parse_word_ids(word_ids: Optional[str]) -> Optional[List[int]]:
+    """Ids of the words of AssociativeChaining drawn among the unseen ones"""
+    if word_ids is None:
+        return None
+    return [int(word_id) for word_id in word_ids.split(",")] if word_ids else []
+
+
+def parse_due_words(due_words: Optional[str]) -> Optional[List[str]]:
+    """Words due for a review mixed in the payload of AssociativeChaining"""
+    if due_words is None:
+        return None
+    return due_words.split(" ,") if due_words else []
+
+
+def replay_result_keeper(
+    started_level: int, seed: int, answers: Sequence[int]
+) -> Replay:
+    """The game played like the UI does it: a correct answer is followed by 'next'"""
+    result_keeper = ResultKeeper(started_level, seed=seed)
+    game = result_keeper.run()
+    question, _ = next(game)
+    questions = [question]
+    for answer in answers:
+        try:
+            _, correct = game.send(answer)
+        except StopIteration:
+            break
+        if correct:
+            question, _ = next(game)
+            questions.append(question)
+    return Replay(
+        questions=questions,
+        points_earned=result_keeper.points.points,
+        finished_level=result_keeper.level,
+    )
+
+
+def replay_associative_changing(
+    started_level: int,
+    seed: int,
+    language: Language,
+    user_answers: Sequence[str],
+    max_distance: int = 0,
+    word_ids: Optional[Sequence[int]] = None,
+    due_words: Optional[Sequence[str]] = None,
+) -> Replay:
+    associative_chaining = AssociativeChaining(
+        started_level,
+        language,
+        seed=seed,
+        max_distance=max_distance,
+        word_ids=None if word_ids is None else list(word_ids),
+        due_words=None if due_words is None else list(due_words),
+    )
+    game = associative_chaining.run()
+    questions = next(game)
+    try:
+        game.send(list(user_answers))
+    except StopIteration:
+        pass
+    return Replay(
+        questions=questions,
+        points_earned=associative_chaining.points.points,
+        finished_level=associative_chaining.level,
+    )
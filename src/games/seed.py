@@ -0,0 +1,12 @@
+"""
+Seeds of the game engines. A game is reproduced by its engine created with the same
+seed and fed with the recorded answers.
+"""
+import random
+
+# stored in INTEGER columns of SQLite, i.e. signed 64-bit
+SEED_BITS = 63
+
+
+def new_seed() -> int:
+    return random.SystemRandom().getrandbits(SEED_BITS)
@@ -2,6 +2,7 @@ import datetime
 from typing import List, Optional
 
 from sqlalchemy import Enum as SQLEnum
+from sqlalchemy import Index, UniqueConstraint
 from sqlmodel import Column, Field, Relationship
 
 from . import ModelBase
@@ -11,7 +12,7 @@ from .enum_types import GameName, Language
 class GameModel(ModelBase):
     __abstract__ = True
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="user_table.id")
+    user_id: int = Field(foreign_key="user_table.id", index=True)
 
     game_name: GameName
     level: int = Field(default=None, nullable=True)
@@ -28,6 +29,8 @@ class SessionModel(ModelBase):
     finished_datetime: datetime.datetime = Field(default_factory=datetime.datetime.now)
     wrong_answers: int
     correct_answers: int
+    # the game is replayed from the seed, None when it can't be reproduced
+    seed: Optional[int] = Field(default=None, nullable=True)
 
 
 class ResultKeeperModel(GameModel, table=True):
@@ -42,6 +45,14 @@ class ResultKeeperModel(GameModel, table=True):
 
 class ResultKeeperSessionModel(SessionModel, table=True):
     __tablename__ = "result_keeper_session_table"
+    # history of the game ordered by date
+    __table_args__ = (
+        Index(
+            "ix_result_keeper_session_table_game_finished",
+            "result_keeper_id",
+            "finished_datetime",
+        ),
+    )
     result_keeper_id: int = Field(foreign_key="result_keeper_table.id")
     result_keeper: ResultKeeperModel = Relationship(back_populates="sessions")
 
@@ -49,6 +60,8 @@ class ResultKeeperSessionModel(SessionModel, table=True):
     range_min: int = Field(default=0)
     range_max: int
     steps: int
+    # every submitted answer, comma separated
+    answers: Optional[str] = Field(default=None, nullable=True)
 
 
 class AssociativeChangingModel(GameModel, table=True):
@@ -62,6 +75,14 @@ class AssociativeChangingModel(GameModel, table=True):
 
 class AssociativeChangingSessionModel(SessionModel, table=True):
     __tablename__ = "associative_changing_session_table"
+    # history of the game ordered by date
+    __table_args__ = (
+        Index(
+            "ix_associative_changing_session_table_game_finished",
+            "associative_changing_id",
+            "finished_datetime",
+        ),
+    )
     associative_changing_id: int = Field(foreign_key="associative_changing_table.id")
     associative_changing: AssociativeChangingModel = Relationship(
         back_populates="session"
@@ -73,6 +94,59 @@ class AssociativeChangingSessionModel(SessionModel, table=True):
     amt_words: int
     skip_answers: int
     memorization_time: int  # when user press start answer
+    # answers within this edit distance of a word got part of its points
+    max_distance: int = Field(default=0)
+    # ids of the words drawn among the unseen ones, comma separated, for the replay
+    word_ids: Optional[str] = Field(default=None, nullable=True)
+    # words due for a review mixed in the payload, " ," separated, for the replay
+    due_words: Optional[str] = Field(default=None, nullable=True)
     language: str = Field(
         sa_column=Column(SQLEnum(Language), nullable=False, default=Language.EN)
     )
+
+
+class AssociativeChangingSeenModel(ModelBase, table=True):
+    """Chunk of the bitmap of the words seen by the user (see src.games.mnemonic.seen)"""
+
+    __tablename__ = "associative_changing_seen_table"
+    __table_args__ = (
+        UniqueConstraint(
+            "associative_changing_id",
+            "corpus",
+            "chunk",
+            name="uq_associative_changing_seen_table_chunk",
+        ),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    associative_changing_id: int = Field(foreign_key="associative_changing_table.id")
+    # name of the word file
+    corpus: str
+    # words of the corpus the ids of the bitmap belong to
+    fingerprint: str
+    chunk: int
+    # base64 of the bits of the chunk
+    bits: str
+
+
+class AssociativeChangingReviewModel(ModelBase, table=True):
+    """Spaced repetition of a word for the user (see src.games.mnemonic.scheduler)"""
+
+    __tablename__ = "associative_changing_review_table"
+    __table_args__ = (
+        UniqueConstraint(
+            "associative_changing_id",
+            "corpus",
+            "word",
+            name="uq_associative_changing_review_table_word",
+        ),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    associative_changing_id: int = Field(foreign_key="associative_changing_table.id")
+    # name of the word file
+    corpus: str
+    word: str
+    ease: float
+    # days
+    interval: int
+    repetitions: int
+    due: datetime.datetime
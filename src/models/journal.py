@@ -0,0 +1,18 @@
+import datetime
+
+from sqlmodel import Field
+
+from . import ModelBase
+
+
+class JournalGroupModel(ModelBase, table=True):
+    """
+    Group of the write-behind journal committed to the database. It is written in the
+    same transaction as the operations of the group, so a replay of the journal skips it.
+    """
+
+    __tablename__ = "journal_group_table"
+
+    # id of the group in the journal
+    id: str = Field(primary_key=True)
+    committed_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
@@ -0,0 +1,103 @@
+"""
+Points ledger. 'User.point' holds the sum of the user's records in 'points_table';
+the functions below keep it up to date in aggregated, set-based statements.
+"""
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import (
+    Connection,
+    Engine,
+    bindparam,
+    column,
+    func,
+    select,
+    table,
+    update,
+)
+
+# Lightweight tables, so the ledger doesn't depend on the models
+user_table = table("user_table", column("id"), column("point"))
+points_table = table("points_table", column("user_id"), column("point"))
+
+# Callbacks notified about committed deltas, e.g. leaderboards
+Listener = Callable[[Optional[Engine], Dict[int, int]], None]
+_listeners: List[Listener] = []
+
+
+def add_listener(listener: Listener) -> None:
+    _listeners.append(listener)
+
+
+def remove_listener(listener: Listener) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def notify(engine: Optional[Engine], deltas: Dict[int, int]) -> None:
+    """Pass committed deltas to the listeners together with the engine they were written to"""
+    for listener in list(_listeners):
+        listener(engine, deltas)
+
+
+def aggregate_deltas(points: Iterable, sign: int = 1) -> Dict[int, int]:
+    """Sum points of the records per user"""
+    deltas = defaultdict(int)
+    for record in points:
+        deltas[record.user_id] += sign * record.point
+    return dict(deltas)
+
+
+def merge_deltas(*deltas: Dict[int, int]) -> Dict[int, int]:
+    result = defaultdict(int)
+    for delta in deltas:
+        for user_id, point in delta.items():
+            result[user_id] += point
+    return {user_id: point for user_id, point in result.items() if point}
+
+
+def apply_point_deltas(connection: Connection, deltas: Dict[int, int]) -> None:
+    """Add deltas to 'User.point' with one UPDATE per user"""
+    if not deltas:
+        return
+    stmt = (
+        update(user_table)
+        .where(user_table.c.id == bindparam("user_id"))
+        .values(point=user_table.c.point + bindparam("delta"))
+    )
+    connection.execute(
+        stmt,
+        [{"user_id": user_id, "delta": delta} for user_id, delta in deltas.items()],
+    )
+
+
+def recalculate_points(
+    connection: Connection, user_ids: Optional[Iterable[int]] = None
+) -> Dict[int, int]:
+    """
+    Rebuild 'User.point' from 'points_table' with a single GROUP BY.
+    When 'user_ids' is None all users are recalculated.
+    Returns the changes of the points per user, e.g. for the ledger listeners.
+    """
+    totals = select(
+        points_table.c.user_id, func.sum(points_table.c.point).label("total")
+    ).group_by(points_table.c.user_id)
+    reset = update(user_table).values(point=0)
+    points = select(user_table.c.id, user_table.c.point)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        totals = totals.where(points_table.c.user_id.in_(user_ids))
+        reset = reset.where(user_table.c.id.in_(user_ids))
+        points = points.where(user_table.c.id.in_(user_ids))
+    totals = totals.subquery()
+    before = dict(connection.execute(points).all())
+
+    # users without any record end up with 0 points
+    connection.execute(reset)
+    connection.execute(
+        update(user_table)
+        .where(user_table.c.id == totals.c.user_id)
+        .values(point=totals.c.total)
+    )
+    after = connection.execute(points).all()
+    return merge_deltas({user_id: point - before[user_id] for user_id, point in after})
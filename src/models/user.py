@@ -2,14 +2,16 @@ import datetime
 from typing import List, Optional
 
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy import event
+from sqlalchemy import Index, event
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
 from sqlmodel import Column, Field, Relationship
 
 from src.models.enum_types import Language, PointsCategory
 
 from . import ModelBase
 from .games import ResultKeeperModel
+from .ledger import aggregate_deltas, apply_point_deltas, merge_deltas, notify
 
 
 class User(ModelBase, table=True):
@@ -37,6 +39,9 @@ class User(ModelBase, table=True):
 
 class Login(ModelBase, table=True):
     __tablename__ = "login_table"
+    __table_args__ = (
+        Index("ix_login_table_user_id_login_date", "user_id", "login_date"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user_table.id")
@@ -48,6 +53,10 @@ class PointsModel(ModelBase, table=True):
     """Models hold information about assigned points"""
 
     __tablename__ = "points_table"
+    # points of the user by date, also used by the ledger's GROUP BY
+    __table_args__ = (
+        Index("ix_points_table_user_id_saved_date", "user_id", "saved_date", "point"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user_table.id")
@@ -74,11 +83,41 @@ def add_first_points_after_create_account(mapper, connection, target):
         session.commit()
 
 
-@event.listens_for(PointsModel, "after_insert")
-def update_point_in_user_model(mapper, connection, target):
-    """Events update point in User model when PointsModel is added"""
-    connection.execute(
-        User.__table__.update()
-        .where(User.id == target.user_id)
-        .values(point=User.__table__.c.point + target.point)
+@event.listens_for(Session, "after_flush")
+def update_point_in_user_model(session, flush_context):
+    """
+    Events update point in User model when PointsModel is added or deleted.
+    Records of one flush are aggregated, so every user gets one UPDATE per flush.
+    """
+    deltas = merge_deltas(
+        aggregate_deltas(o for o in session.new if isinstance(o, PointsModel)),
+        aggregate_deltas(
+            (o for o in session.deleted if isinstance(o, PointsModel)), sign=-1
+        ),
     )
+    if not deltas:
+        return
+    apply_point_deltas(session.connection(), deltas)
+    # listeners are notified after commit
+    session.info["point_deltas"] = merge_deltas(
+        session.info.get("point_deltas", {}), deltas
+    )
+    # loaded users have to read the new sum from the database
+    for user_id in deltas:
+        user = session.identity_map.get(identity_key(User, user_id))
+        if user is not None:
+            session.expire(user, ["point"])
+
+
+@event.listens_for(Session, "after_commit")
+def notify_committed_points(session):
+    """Pass points committed in the transaction to the ledger listeners"""
+    deltas = session.info.pop("point_deltas", None)
+    if deltas:
+        bind = session.bind
+        notify(getattr(bind, "engine", bind), deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_rolled_back_points(session):
+    session.info.pop("point_deltas", None)
@@ -0,0 +1,132 @@
+"""
+Credential service: bcrypt hashing and verification run in a pool of worker threads
+(bcrypt releases the GIL), so the UI thread is never blocked. Results are passed to
+callbacks scheduled on the Kivy clock, i.e. they run on the UI thread.
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .session import configure_rounds, hash_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[Any], None]
+Scheduler = Callable[[Callable[[], None]], None]
+
+
+class TooManyCredentialRequests(Exception):
+    """Raised when the limit of pending hash/verify requests is reached"""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Too many pending credential requests (limit {limit}).")
+        self.limit = limit
+
+
+def kivy_scheduler(function: Callable[[], None]) -> None:
+    """Run the function on the UI thread, in the next frame"""
+    from kivy.clock import Clock
+
+    Clock.schedule_once(lambda dt: function(), 0)
+
+
+class CredentialService:
+    """
+    'max_workers' bcrypt computations run at the same time. At most 'max_pending'
+    requests are accepted (running or queued), further ones are rejected with
+    TooManyCredentialRequests, so a flood of attempts can't queue unbounded work.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_pending: int = 4,
+        scheduler: Scheduler = kivy_scheduler,
+    ):
+        self.max_pending = max_pending
+        self.scheduler = scheduler
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="credentials"
+        )
+
+    def _submit(
+        self,
+        function: Callable[..., Any],
+        *args,
+        callback: Optional[Callback] = None,
+        error_callback: Optional[Callback] = None,
+    ) -> Future:
+        if not self._slots.acquire(blocking=False):
+            raise TooManyCredentialRequests(self.max_pending)
+        try:
+            future = self._executor.submit(self._run, function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(
+            lambda done: self._done(done, callback, error_callback)
+        )
+        return future
+
+    def _run(self, function: Callable[..., Any], *args) -> Any:
+        try:
+            return function(*args)
+        finally:
+            # free before the result is set, so the caller can submit again right away
+            self._slots.release()
+
+    def _done(
+        self,
+        future: Future,
+        callback: Optional[Callback],
+        error_callback: Optional[Callback],
+    ) -> None:
+        if future.cancelled():
+            # never started, so '_run' didn't free the slot
+            self._slots.release()
+            return
+        error = future.exception()
+        if error is not None:
+            if error_callback:
+                self.scheduler(lambda: error_callback(error))
+            else:
+                logger.error("Credential request failed", exc_info=error)
+        elif callback:
+            result = future.result()
+            self.scheduler(lambda: callback(result))
+
+    def hash(
+        self,
+        password: str,
+        callback: Optional[Callback] = None,
+        error_callback: Optional[Callback] = None,
+    ) -> Future:
+        """Hash the password, 'callback' gets the hash"""
+        return self._submit(
+            hash_password, password, callback=callback, error_callback=error_callback
+        )
+
+    def verify(
+        self,
+        stored_hash: str,
+        password: str,
+        callback: Optional[Callback] = None,
+        error_callback: Optional[Callback] = None,
+    ) -> Future:
+        """Check the password, 'callback' gets True when it matches"""
+        return self._submit(
+            verify_password,
+            stored_hash,
+            password,
+            callback=callback,
+            error_callback=error_callback,
+        )
+
+    def configure_rounds(self, callback: Optional[Callback] = None) -> Future:
+        """Load or calibrate the bcrypt cost in the background, e.g. at startup"""
+        return self._submit(configure_rounds, callback=callback)
+
+    def close(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -1,20 +1,114 @@
 import base64
+import statistics
+import time
+from typing import Optional
 
 import bcrypt
 
+from ..config.app_config import AppConfig
 
-def hash_password(password: str):
-    """The methods hash provided password and return hash password as a string"""
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode(), salt)
-    # convert to string
-    return base64.b64encode(hashed_password).decode()
+# Cost of bcrypt: every round doubles the time of hashing and verification
+DEFAULT_ROUNDS = 12
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+LOGIN_BUDGET = 0.25  # s, longest acceptable verification at login
+CONFIG_SECTION = "Security"
+
+_rounds = DEFAULT_ROUNDS
+
+
+def get_rounds() -> int:
+    return _rounds
+
+
+def set_rounds(rounds: int) -> None:
+    """Set the cost used for new hashes"""
+    global _rounds
+    if not MIN_ROUNDS <= rounds <= MAX_ROUNDS:
+        raise ValueError(f"bcrypt rounds must be between {MIN_ROUNDS} and {MAX_ROUNDS}")
+    _rounds = rounds
+
+
+def hash_password(password: str, rounds: Optional[int] = None):
+    """
+    The methods hash provided password and return hash password as a string.
+    The hash is stored as bcrypt produces it ('$2b$<rounds>$...'), with the cost inside.
+    """
+    salt = bcrypt.gensalt(rounds or _rounds)
+    return bcrypt.hashpw(password.encode(), salt).decode()
+
+
+def is_legacy_hash(stored_hash: str) -> bool:
+    """Hashes created before the cost calibration were additionally base64 encoded"""
+    return not stored_hash.startswith("$2")
+
+
+def _hash_bytes(stored_hash: str) -> bytes:
+    if is_legacy_hash(stored_hash):
+        return base64.b64decode(stored_hash)
+    return stored_hash.encode()
+
+
+def hash_rounds(stored_hash: str) -> int:
+    # '$2b$12$<salt and hash>'
+    return int(_hash_bytes(stored_hash).split(b"$")[2])
 
 
 def verify_password(stored_hash: str, password: str):
     """Checks that provided password matches with the stored password"""
-    stored_hash_bytes = base64.b64decode(stored_hash)
-    return bcrypt.checkpw(password.encode(), stored_hash_bytes)
+    return bcrypt.checkpw(password.encode(), _hash_bytes(stored_hash))
+
+
+def needs_rehash(stored_hash: str, rounds: Optional[int] = None) -> bool:
+    """The hash is in the legacy format or has other cost than the current one"""
+    return is_legacy_hash(stored_hash) or hash_rounds(stored_hash) != (
+        rounds or _rounds
+    )
+
+
+def measure_verification(rounds: int, samples: int = 3) -> float:
+    """Median time (s) of verifying a password hashed with the given cost"""
+    password = b"calibration"
+    stored_hash = bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+    times = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.checkpw(password, stored_hash)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def calibrate_rounds(
+    budget: float = LOGIN_BUDGET,
+    min_rounds: int = MIN_ROUNDS,
+    max_rounds: int = MAX_ROUNDS,
+) -> int:
+    """
+    The highest cost whose verification fits in the budget on this machine,
+    never lower than 'min_rounds'.
+    """
+    rounds = min_rounds
+    while rounds < max_rounds:
+        # the next round takes twice as long
+        if measure_verification(rounds) * 2 > budget:
+            break
+        rounds += 1
+    return rounds
+
+
+def configure_rounds() -> int:
+    """
+    Use the cost saved in the config file. The first start calibrates it under
+    the configured login budget and saves it in the local config file of this machine.
+    """
+    rounds = AppConfig.get(CONFIG_SECTION, "bcrypt_rounds")
+    if rounds:
+        set_rounds(int(rounds))
+        return _rounds
+    budget = int(AppConfig.get(CONFIG_SECTION, "login_budget_ms", LOGIN_BUDGET * 1000))
+    set_rounds(calibrate_rounds(budget / 1000))
+    AppConfig.save_local(CONFIG_SECTION, "bcrypt_rounds", str(_rounds))
+    return _rounds
 
 
 class UserSession:
@@ -0,0 +1,149 @@
+import pytest
+from sqlalchemy import update
+
+from src.db.audit import audit_sessions, replay_session
+from src.db.session import GameManager
+from src.games.math import ResultKeeper
+from src.games.mnemonic.associative_chaining import AssociativeChaining
+from src.models import ModelBase
+from src.models.enum_types import GameName, Language
+from src.models.games import AssociativeChangingSessionModel, ResultKeeperSessionModel
+from tests.games.test_replay import play_result_keeper
+
+
+@pytest.fixture
+def game_manager(tmp_path):
+    game_manager = GameManager(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    ModelBase.metadata.create_all(game_manager.db.engine)
+    user = game_manager.db.create_account("testuser", "password")
+    game_manager.load_session(user.id)
+    yield game_manager
+    game_manager.db.close()
+
+
+def record_result_keeper(game_manager, seed, wrong_steps=()):
+    result_keeper = ResultKeeper(1, seed=seed)
+    play_result_keeper(result_keeper, wrong_steps, steps=25)
+    game_manager.record_result(GameName.RESULT_KEEPER, result_keeper.get_stats())
+
+
+def record_associative_changing(
+    game_manager, seed, max_distance=0, seen=None, scheduler=None
+):
+    associative_chaining = AssociativeChaining(
+        1,
+        Language.EN,
+        seed=seed,
+        max_distance=max_distance,
+        seen=seen,
+        scheduler=scheduler,
+    )
+    game = associative_chaining.run()
+    words = next(game)
+    try:
+        game.send(words[:5] + [words[5][:-1] + "x", "-"])
+    except StopIteration:
+        pass
+    stats = associative_chaining.get_stats()
+    game_manager.record_result(
+        GameName.ASSOCIATIVE_CHANGING, {**stats, "memorization_time": 10}
+    )
+
+
+def set_column(game_manager, model, session_id, **values):
+    with game_manager.db.engine.begin() as connection:
+        connection.execute(update(model).where(model.id == session_id).values(values))
+
+
+class TestAudit:
+    def test_genuine_sessions_have_no_mismatches(self, game_manager):
+        for seed in range(5):
+            record_result_keeper(game_manager, seed, wrong_steps={seed})
+            record_associative_changing(game_manager, seed)
+
+        report = audit_sessions(game_manager.db.engine, workers=2, page_size=2)
+
+        assert report.checked == 10
+        assert report.mismatches == []
+
+    def test_fuzzy_sessions_are_replayed_with_their_max_distance(self, game_manager):
+        for seed in range(3):
+            record_associative_changing(game_manager, seed, max_distance=1)
+
+        report = audit_sessions(
+            game_manager.db.engine, [GameName.ASSOCIATIVE_CHANGING], workers=1
+        )
+
+        assert report.checked == 3
+        assert report.mismatches == []
+
+    def test_sessions_drawn_from_unseen_words_are_replayed(self, game_manager):
+        seen = game_manager.seen_words(Language.EN)
+        for seed in range(3):
+            record_associative_changing(game_manager, seed, seen=seen)
+
+        report = audit_sessions(
+            game_manager.db.engine, [GameName.ASSOCIATIVE_CHANGING], workers=1
+        )
+
+        assert report.checked == 3
+        assert report.not_replayable == 0
+        assert report.mismatches == []
+
+    def test_sessions_with_due_words_are_replayed(self, game_manager):
+        # the games of the GUI: unseen words mixed with the words due for a review
+        seen = game_manager.seen_words(Language.EN)
+        scheduler = game_manager.review_scheduler(Language.EN)
+        for seed in range(4):
+            record_associative_changing(
+                game_manager, seed, seen=seen, scheduler=scheduler
+            )
+
+        report = audit_sessions(
+            game_manager.db.engine, [GameName.ASSOCIATIVE_CHANGING], workers=1
+        )
+
+        assert report.checked == 4
+        assert report.not_replayable == 0
+        assert report.mismatches == []
+
+    def test_tampered_points_are_flagged(self, game_manager):
+        for seed in range(4):
+            record_result_keeper(game_manager, seed)
+        set_column(game_manager, ResultKeeperSessionModel, 3, points_earned=1000)
+
+        report = audit_sessions(game_manager.db.engine, workers=2, page_size=3)
+
+        assert [mismatch.session_id for mismatch in report.mismatches] == [3]
+        assert report.mismatches[0].points_earned == 1000
+        assert report.mismatches[0].replayed_points != 1000
+
+    def test_changed_words_are_flagged(self, game_manager):
+        record_associative_changing(game_manager, 1)
+        set_column(game_manager, AssociativeChangingSessionModel, 1, words="a ,b")
+
+        report = audit_sessions(
+            game_manager.db.engine, [GameName.ASSOCIATIVE_CHANGING], workers=1
+        )
+
+        assert len(report.mismatches) == 1
+        assert not report.mismatches[0].same_questions
+
+    def test_sessions_without_seed_are_counted(self, game_manager):
+        record_result_keeper(game_manager, 1)
+        record_result_keeper(game_manager, 2)
+        set_column(game_manager, ResultKeeperSessionModel, 1, seed=None)
+
+        report = audit_sessions(
+            game_manager.db.engine, [GameName.RESULT_KEEPER], workers=1
+        )
+
+        assert report.checked == 1
+        assert report.not_replayable == 1
+
+    def test_replay_session_of_unchanged_row(self):
+        result_keeper = ResultKeeper(1, seed=4)
+        play_result_keeper(result_keeper, steps=12)
+        row = {"id": 1, **result_keeper.get_stats()}
+
+        assert replay_session(GameName.RESULT_KEEPER, row) is None
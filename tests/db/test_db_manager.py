@@ -0,0 +1,70 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from src.db.db import DBManager, Operation
+from src.models import ModelBase
+from src.models.user import PointsModel, User
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DBManager(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    ModelBase.metadata.create_all(db.engine)
+    db.add_record(User, username="testuser", password="testpass")
+    yield db
+    db.close()
+
+
+class TestDBManagerSessions:
+    def test_every_thread_gets_own_session(self, db):
+        sessions = []
+
+        def get_session():
+            sessions.append(db.session())
+
+        thread = threading.Thread(target=get_session)
+        thread.start()
+        thread.join()
+
+        assert sessions[0] is not db.session()
+
+    def test_read_session_uses_read_only_connections(self, db):
+        with db.read_session() as session:
+            assert session.query(User).count() == 1
+            session.add(User(username="other", password="testpass"))
+            with pytest.raises(OperationalError):
+                session.flush()
+
+    def test_reads_run_concurrently_with_writes(self, db):
+        user = db.find_record(User, username="testuser")
+
+        def write(_):
+            db.enqueue(
+                Operation.add(PointsModel, user_id=user.id, point=1, category="")
+            )
+
+        def read(_):
+            with db.read_session() as session:
+                return session.query(PointsModel).count()
+
+        with ThreadPoolExecutor(8) as executor:
+            writes = [executor.submit(write, i) for i in range(50)]
+            reads = [executor.submit(read, i) for i in range(50)]
+            for future in writes + reads:
+                future.result()
+
+        with db.read_session() as session:
+            # 50 records and one for creating an account
+            assert session.query(PointsModel).count() == 51
+            assert session.get(User, user.id).point == 60
+
+    def test_in_memory_database_reads_from_writer(self):
+        db = DBManager("sqlite:///:memory:")
+        assert db.read_engine is None
+        ModelBase.metadata.create_all(db.engine)
+        with db.read_session() as session:
+            assert session.query(User).count() == 0
+        db.close()
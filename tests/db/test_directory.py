@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import event
+
+from src.db.db import DBManager, Operation
+from src.db.directory import UserDirectory, UserRow
+from src.models import ModelBase
+from src.models.enum_types import Language
+from src.models.user import User
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DBManager(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    ModelBase.metadata.create_all(db.engine)
+    db.add_record(User, username="testuser", password="testpass")
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def selects(db):
+    """Statements executed by the read-only connections"""
+    statements = []
+    event.listen(
+        db.read_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+class TestUserDirectory:
+    def test_get_returns_row_and_caches_it(self, db, selects):
+        first = db.users.get("testuser")
+        second = db.users.get("testuser")
+
+        assert isinstance(first, UserRow)
+        assert first == second
+        assert first.password == "testpass"
+        assert first.language == Language.EN
+        assert len(selects) == 1
+        assert (db.users.hits, db.users.misses) == (1, 1)
+
+    def test_missing_username_is_cached(self, db, selects):
+        assert not db.users.exists("unknown")
+        assert not db.users.exists("unknown")
+        assert len(selects) == 1
+
+    def test_missing_username_expires(self, db, selects):
+        directory = UserDirectory(db, negative_ttl=0)
+        directory.get("unknown")
+        directory.get("unknown")
+        assert len(selects) == 2
+
+    def test_create_account_invalidates_missing_username(self, db):
+        assert not db.users.exists("newuser")
+        db.create_account("newuser", "password")
+        assert db.users.exists("newuser")
+
+    def test_update_record_invalidates_user(self, db):
+        user = db.users.get("testuser")
+        db.update_record(User, user.id, {"language": Language.PL.value})
+        assert db.users.get("testuser").language == Language.PL
+
+    def test_queued_update_invalidates_user(self, db, tmp_path):
+        queued = DBManager(db.engine.url, journal_path=tmp_path / "db.journal")
+        try:
+            user = queued.users.get("testuser")
+            queued.enqueue(
+                Operation.update(User, user.id, {"language": Language.PL.value})
+            )
+            assert queued.flush(timeout=5)
+            assert queued.users.get("testuser").language == Language.PL
+        finally:
+            queued.close()
+
+    def test_least_recently_used_user_is_evicted(self, db):
+        directory = UserDirectory(db, maxsize=2)
+        for username in ("testuser", "a", "b"):
+            directory.get(username)
+
+        assert len(directory) == 2
+        directory.get("testuser")
+        assert directory.misses == 4
@@ -0,0 +1,302 @@
+import datetime
+
+import pytest
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from src.db.instrumentation import QueryInstrumentation
+from src.db.session import GameManager, HistoryFilter, UserSession
+from src.exceptions.database_exceptions import UserNotFoundException
+from src.games.mnemonic.associative_chaining import AssociativeChaining
+from src.models import ModelBase
+from src.models.enum_types import GameName, Language
+from src.models.games import (
+    AssociativeChangingReviewModel,
+    AssociativeChangingSeenModel,
+    AssociativeChangingSessionModel,
+    ResultKeeperModel,
+    ResultKeeperSessionModel,
+)
+from src.models.user import Login, PointsModel, User
+
+
+@pytest.fixture
+def game_manager(tmp_path):
+    game_manager = GameManager(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    ModelBase.metadata.create_all(game_manager.db.engine)
+    user = game_manager.db.create_account("testuser", "password")
+    game_manager.db.update_record(
+        ResultKeeperModel, user.result_keeper.id, {"level": 1}
+    )
+    game_manager.load_session(user.id)
+    yield game_manager
+    game_manager.db.close()
+
+
+def result_keeper_stats(started_level=1, finished_level=1, points_earned=5):
+    return {
+        "range_min": 0,
+        "range_max": 10,
+        "points_earned": points_earned,
+        "started_level": started_level,
+        "finished_level": finished_level,
+        "steps": 5,
+        "wrong_answers": 0,
+        "correct_answers": 5,
+        "duration": 60,
+    }
+
+
+class TestRecordResult:
+    def test_record_result_saves_session_and_points(self, game_manager):
+        user_session = game_manager.record_result(
+            GameName.RESULT_KEEPER, result_keeper_stats()
+        )
+
+        assert isinstance(user_session, UserSession)
+        assert user_session.point == 15
+        with Session(game_manager.db.engine) as session:
+            assert session.query(ResultKeeperSessionModel).count() == 1
+            assert session.query(PointsModel).count() == 2
+            assert session.get(User, user_session.id).point == 15
+
+    def test_record_result_updates_level_when_user_level_up(self, game_manager):
+        user_session = game_manager.record_result(
+            GameName.RESULT_KEEPER, result_keeper_stats(finished_level=3)
+        )
+
+        game_id = game_manager.get_id_game(GameName.RESULT_KEEPER)
+        assert user_session.stats[GameName.RESULT_KEEPER.value].level == 3
+        with Session(game_manager.db.engine) as session:
+            assert session.get(ResultKeeperModel, game_id).level == 3
+
+    def test_record_result_commits_once(self, game_manager):
+        commits = []
+        event.listen(game_manager.db.engine, "commit", lambda conn: commits.append(1))
+
+        game_manager.record_result(
+            GameName.RESULT_KEEPER, result_keeper_stats(finished_level=2)
+        )
+        assert len(commits) == 1
+
+    def test_record_result_rollbacks_everything_when_one_write_fails(
+        self, game_manager
+    ):
+        stats = result_keeper_stats()
+        del stats["steps"]
+        with pytest.raises(Exception):
+            game_manager.record_result(GameName.RESULT_KEEPER, stats)
+
+        with Session(game_manager.db.engine) as session:
+            assert session.query(PointsModel).count() == 1
+            assert session.query(ResultKeeperSessionModel).count() == 0
+
+    def test_record_result_requires_current_session(self, game_manager):
+        del game_manager.current_session
+        with pytest.raises(ValueError):
+            game_manager.record_result(GameName.RESULT_KEEPER, result_keeper_stats())
+
+
+def play_associative_chaining(game_manager, level=1):
+    associative_chaining = AssociativeChaining(
+        level,
+        Language.EN,
+        seen=game_manager.seen_words(Language.EN),
+        scheduler=game_manager.review_scheduler(Language.EN),
+    )
+    game = associative_chaining.run()
+    words = next(game)
+    with pytest.raises(StopIteration):
+        game.send(words)
+    game_manager.record_result(
+        GameName.ASSOCIATIVE_CHANGING,
+        {
+            **associative_chaining.get_stats(),
+            "duration": 60,
+            "memorization_time": 30,
+        },
+    )
+    return words
+
+
+class TestSeenWords:
+    def test_seen_words_are_read_once_per_session(self, game_manager):
+        seen = game_manager.seen_words(Language.EN)
+        assert game_manager.seen_words(Language.EN) is seen
+        assert game_manager.seen_words(Language.PL) is not seen
+
+    def test_seen_words_are_saved_with_result(self, game_manager):
+        words = play_associative_chaining(game_manager)
+        words += play_associative_chaining(game_manager, level=2)
+
+        with Session(game_manager.db.engine) as session:
+            chunks = session.query(AssociativeChangingSeenModel).all()
+        # 100 words fit in one chunk, the second game updates it
+        assert len(chunks) == 1
+        assert chunks[0].corpus == "en_noun"
+        assert not game_manager.seen_words(Language.EN).dirty
+
+        # the next session reads the saved words
+        game_manager.load_session(game_manager.current_session.id)
+        seen = game_manager.seen_words(Language.EN)
+        assert seen.seen == len(set(words)) == 21
+
+    def test_chunks_of_other_corpus_are_ignored(self, game_manager):
+        play_associative_chaining(game_manager)
+        with Session(game_manager.db.engine) as session:
+            session.query(AssociativeChangingSeenModel).update({"fingerprint": "old"})
+            session.commit()
+
+        game_manager.load_session(game_manager.current_session.id)
+        assert game_manager.seen_words(Language.EN).seen == 0
+
+
+class TestReviews:
+    def test_reviews_are_saved_with_result(self, game_manager):
+        scheduler = game_manager.review_scheduler(Language.EN)
+        assert game_manager.review_scheduler(Language.EN) is scheduler
+        words = play_associative_chaining(game_manager)
+
+        with Session(game_manager.db.engine) as session:
+            reviews = session.query(AssociativeChangingReviewModel).all()
+        assert sorted(review.word for review in reviews) == sorted(words)
+        assert {review.repetitions for review in reviews} == {1}
+        assert not scheduler.dirty
+
+        # the next session reads the saved reviews
+        game_manager.load_session(game_manager.current_session.id)
+        restored = game_manager.review_scheduler(Language.EN)
+        assert restored.reviews == scheduler.reviews
+
+    def test_reviews_are_updated_in_place(self, game_manager):
+        words = play_associative_chaining(game_manager)
+        # the words are due again in the next session
+        with Session(game_manager.db.engine) as session:
+            session.query(AssociativeChangingReviewModel).update(
+                {"due": datetime.datetime(2024, 1, 1)}
+            )
+            session.commit()
+        game_manager.load_session(game_manager.current_session.id)
+
+        play_associative_chaining(game_manager)
+
+        with Session(game_manager.db.engine) as session:
+            reviews = session.query(AssociativeChangingReviewModel).all()
+        assert len(reviews) == len({review.word for review in reviews})
+        # half of the second payload was due
+        assert (
+            sorted(review.repetitions for review in reviews if review.word in words)
+            == [1] * 5 + [2] * 5
+        )
+
+
+@pytest.fixture
+def history(game_manager):
+    """25 games of result keeper, every fifth pair finished at the same time"""
+    game_id = game_manager.get_id_game(GameName.RESULT_KEEPER)
+    start = datetime.datetime(2024, 1, 1)
+    with Session(game_manager.db.engine) as session:
+        for i in range(25):
+            session.add(
+                ResultKeeperSessionModel(
+                    result_keeper_id=game_id,
+                    finished_datetime=start + datetime.timedelta(days=i // 2),
+                    **result_keeper_stats(finished_level=i % 5 + 1),
+                )
+            )
+        session.commit()
+    return game_manager
+
+
+class TestHistory:
+    def test_pages_cover_history_newest_first(self, history):
+        ids, cursor = [], None
+        while True:
+            page = history.history(GameName.RESULT_KEEPER, limit=10, cursor=cursor)
+            ids.extend(game.id for game in page.sessions)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        with Session(history.db.engine) as session:
+            expected = [
+                game.id
+                for game in session.query(ResultKeeperSessionModel).order_by(
+                    ResultKeeperSessionModel.finished_datetime.desc(),
+                    ResultKeeperSessionModel.id.desc(),
+                )
+            ]
+        assert ids == expected
+        assert len(ids) == 25
+
+    def test_history_filters_levels_and_dates(self, history):
+        filters = HistoryFilter(
+            levels=(2, 3),
+            since=datetime.datetime(2024, 1, 3),
+            until=datetime.datetime(2024, 1, 10),
+        )
+        page = history.history(GameName.RESULT_KEEPER, limit=100, filters=filters)
+
+        assert page.sessions
+        assert not page.has_next
+        for game in page.sessions:
+            assert 2 <= game.finished_level <= 3
+            assert filters.since <= game.finished_datetime <= filters.until
+
+    def test_history_loads_words_only_on_request(self, game_manager):
+        with Session(game_manager.db.engine) as session:
+            session.add(
+                AssociativeChangingSessionModel(
+                    associative_changing_id=game_manager.get_id_game(
+                        GameName.ASSOCIATIVE_CHANGING
+                    ),
+                    points_earned=1,
+                    started_level=1,
+                    finished_level=1,
+                    wrong_answers=0,
+                    correct_answers=1,
+                    words="one two",
+                    user_answers="one two",
+                    amt_words=2,
+                    skip_answers=0,
+                    memorization_time=10,
+                )
+            )
+            session.commit()
+
+        page = game_manager.history(GameName.ASSOCIATIVE_CHANGING)
+        assert {"words", "user_answers"} <= inspect(page.sessions[0]).unloaded
+
+        page = game_manager.history(GameName.ASSOCIATIVE_CHANGING, with_content=True)
+        assert page.sessions[0].words == "one two"
+
+    def test_history_requires_positive_limit(self, game_manager):
+        with pytest.raises(ValueError):
+            game_manager.history(GameName.RESULT_KEEPER, limit=0)
+
+
+class TestLogin:
+    def test_login_reads_user_and_games_in_one_query(self, game_manager):
+        user_id = game_manager.current_session.id
+        del game_manager.current_session
+        instrumentation = QueryInstrumentation()
+        for engine in (game_manager.db.engine, game_manager.db.read_engine):
+            instrumentation.install(engine)
+
+        user_session = game_manager.login(user_id)
+
+        statements = [stats.statement for stats in instrumentation.stats()]
+        assert len([s for s in statements if s.startswith("SELECT")]) == 1
+        assert len([s for s in statements if s.startswith("INSERT")]) == 1
+        assert user_session.stats[GameName.RESULT_KEEPER.value].level == 1
+        assert user_session.stats[GameName.ASSOCIATIVE_CHANGING.value].id is not None
+
+    def test_login_saves_login(self, game_manager):
+        game_manager.login(game_manager.current_session.id)
+
+        with Session(game_manager.db.engine) as session:
+            assert session.query(Login).count() == 1
+
+    def test_login_raises_error_for_unknown_user(self, game_manager):
+        with pytest.raises(UserNotFoundException):
+            game_manager.login(100)
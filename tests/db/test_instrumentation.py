@@ -0,0 +1,98 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.db.db import DBManager, engine
+from src.db.instrumentation import INSTRUMENTATION, QueryInstrumentation
+from src.db.profiles import describe_engine
+from src.models import ModelBase
+from src.models.user import User
+
+
+@pytest.fixture
+def instrumentation():
+    return QueryInstrumentation(slow_query_threshold=0)
+
+
+@pytest.fixture
+def db(tmp_path, instrumentation):
+    db = DBManager(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    ModelBase.metadata.create_all(db.engine)
+    instrumentation.install(db.engine)
+    yield db
+    instrumentation.remove(db.engine)
+    db.close()
+
+
+class TestQueryInstrumentation:
+    def test_statements_are_counted_with_call_sites(self, db, instrumentation):
+        db.add_record(User, username="testuser", password="testpass")
+        for _ in range(3):
+            db.find_record(User, username="testuser")
+
+        select_stats = next(
+            s for s in instrumentation.stats() if s.statement.startswith("SELECT")
+        )
+        assert select_stats.count == 3
+        assert sum(select_stats.histogram) == 3
+        assert any("find_record" in site for site in select_stats.call_sites)
+
+    def test_rows_of_event_listeners_are_reported(self, db, instrumentation):
+        db.add_record(User, username="testuser", password="testpass")
+
+        update = next(
+            s
+            for s in instrumentation.stats()
+            if s.statement.startswith("UPDATE user_table")
+        )
+        assert update.rows == 1
+        assert any("update_point_in_user_model" in s for s in update.call_sites)
+
+    def test_slow_queries_have_plan(self, db, instrumentation):
+        db.find_record(User, username="testuser")
+
+        slow = instrumentation.slow_queries[-1]
+        assert "find_record" in slow.call_site
+        assert any("user_table" in step for step in slow.plan)
+
+    def test_dump_writes_json(self, db, instrumentation, tmp_path):
+        db.find_record(User, username="testuser")
+        path = tmp_path / "queries.json"
+        instrumentation.dump(path)
+
+        data = json.loads(path.read_text())
+        assert data["statements"][0]["count"] == 1
+        assert data["slow_queries"]
+
+    def test_removed_engine_is_not_recorded(self, instrumentation):
+        memory_engine = create_engine("sqlite://")
+        instrumentation.install(memory_engine)
+        instrumentation.remove(memory_engine)
+        with memory_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+        assert instrumentation.stats() == []
+
+    def test_failed_statement_leaves_no_start_time(self, instrumentation):
+        memory_engine = create_engine("sqlite://")
+        instrumentation.install(memory_engine)
+        with memory_engine.connect() as connection:
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM missing_table"))
+            assert connection.info["query_start"] == []
+
+            connection.execute(text("SELECT 1"))
+        instrumentation.remove(memory_engine)
+
+        assert [s.statement for s in instrumentation.stats()] == ["SELECT 1"]
+
+    def test_debug_profile_installs_instrumentation(self, tmp_path):
+        debug_engine = engine(f"sqlite:///{tmp_path / 'db.sqlite'}", "debug")
+        try:
+            assert describe_engine(debug_engine)["instrument"]
+            assert not debug_engine.echo
+        finally:
+            INSTRUMENTATION.remove(debug_engine)
+            INSTRUMENTATION.reset()
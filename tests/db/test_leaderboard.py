@@ -0,0 +1,212 @@
+import random
+import threading
+
+import pytest
+
+from src.db.db import Operation
+from src.db.leaderboard import IndexableSkipList, Leaderboard, LeaderboardService
+from src.db.session import GameManager
+from src.models import ModelBase
+from src.models.enum_types import GameName
+from src.models.games import ResultKeeperModel, ResultKeeperSessionModel
+from src.models.user import PointsModel, User
+
+
+@pytest.fixture
+def game_manager(tmp_path):
+    game_manager = GameManager(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    ModelBase.metadata.create_all(game_manager.db.engine)
+    session = game_manager.db.session
+    for username, point in (("first", 30), ("second", 20), ("third", 0)):
+        user = User(username=username, password="pass")
+        session.add(user)
+        session.commit()
+        game = ResultKeeperModel(
+            user_id=user.id, game_name=GameName.RESULT_KEEPER, level=1
+        )
+        session.add_all([game, PointsModel(user_id=user.id, point=point, category="")])
+        session.commit()
+        if point:
+            session.add(
+                ResultKeeperSessionModel(
+                    result_keeper_id=game.id,
+                    range_min=0,
+                    range_max=10,
+                    points_earned=point,
+                    started_level=1,
+                    finished_level=1,
+                    steps=5,
+                    wrong_answers=0,
+                    correct_answers=5,
+                    duration=60,
+                )
+            )
+            session.commit()
+    yield game_manager
+    game_manager.leaderboard.close()
+    game_manager.db.close()
+
+
+class TestIndexableSkipList:
+    def test_keeps_keys_sorted_and_indexed(self):
+        keys = random.Random(0).sample(range(10_000), 1_000)
+        skip_list = IndexableSkipList(seed=0)
+        for key in keys:
+            skip_list.insert(key)
+        for key in keys[::2]:
+            skip_list.remove(key)
+
+        expected = sorted(keys[1::2])
+        assert list(skip_list) == expected
+        assert len(skip_list) == len(expected)
+        assert [skip_list.index(key) for key in expected] == list(range(len(expected)))
+        assert skip_list.slice(100, 110) == expected[100:110]
+
+    def test_duplicate_and_missing_keys_raise_error(self):
+        skip_list = IndexableSkipList()
+        skip_list.insert(1)
+        with pytest.raises(KeyError):
+            skip_list.insert(1)
+        with pytest.raises(KeyError):
+            skip_list.remove(2)
+
+
+class TestLeaderboard:
+    def test_ties_are_ordered_by_user_id(self):
+        board = Leaderboard()
+        board.set_score(2, 10)
+        board.set_score(1, 10)
+        board.set_score(3, 20)
+
+        assert [entry.user_id for entry in board.top(3)] == [3, 1, 2]
+
+    def test_add_score_moves_user(self):
+        board = Leaderboard()
+        for user_id in range(1, 6):
+            board.set_score(user_id, user_id * 10)
+        board.add_score(1, 100)
+
+        assert board.rank(1) == 1
+        assert board.rank(5) == 2
+        assert board.rank(10) is None
+
+    def test_around_returns_neighbours(self):
+        board = Leaderboard()
+        for user_id in range(1, 11):
+            board.set_score(user_id, 100 - user_id)
+
+        entries = board.around(5, n=2)
+
+        assert [entry.rank for entry in entries] == [3, 4, 5, 6, 7]
+        assert [entry.rank for entry in board.around(1, n=2)] == [1, 2, 3]
+
+
+class TestLeaderboardService:
+    def test_boards_are_built_from_database(self, game_manager):
+        top = game_manager.leaderboard.top()
+
+        # every account starts with 10 points
+        assert [(e.username, e.score) for e in top] == [
+            ("first", 40),
+            ("second", 30),
+            ("third", 10),
+        ]
+        game_top = game_manager.leaderboard.top(game=GameName.RESULT_KEEPER)
+        assert [(e.username, e.score) for e in game_top] == [
+            ("first", 30),
+            ("second", 20),
+        ]
+
+    def test_committed_points_update_board(self, game_manager):
+        third = game_manager.db.find_record(User, username="third")
+        assert game_manager.leaderboard.rank(third.id) == 3
+
+        game_manager.db.enqueue(
+            Operation.add(PointsModel, user_id=third.id, point=100, category="test")
+        )
+
+        assert game_manager.leaderboard.rank(third.id) == 1
+
+    def test_new_user_is_added_with_username(self, game_manager):
+        game_manager.leaderboard.rebuild()
+        game_manager.db.add_record(User, username="new", password="pass")
+        user = game_manager.db.find_record(User, username="new")
+        game_manager.db.enqueue(
+            Operation.add(PointsModel, user_id=user.id, point=100, category="test")
+        )
+
+        assert game_manager.leaderboard.top(1)[0].username == "new"
+
+    def test_recorded_game_updates_game_board(self, game_manager):
+        third = game_manager.db.find_record(User, username="third")
+        game_manager.load_session(third.id)
+        game_manager.leaderboard.rebuild()
+
+        game_manager.record_result(
+            GameName.RESULT_KEEPER,
+            {
+                "range_min": 0,
+                "range_max": 10,
+                "points_earned": 50,
+                "started_level": 1,
+                "finished_level": 1,
+                "steps": 5,
+                "wrong_answers": 0,
+                "correct_answers": 5,
+                "duration": 60,
+            },
+        )
+
+        assert game_manager.leaderboard.rank(third.id, GameName.RESULT_KEEPER) == 1
+        assert game_manager.leaderboard.rank(third.id) == 1
+
+    def test_boards_are_built_in_background(self, game_manager):
+        first = game_manager.db.find_record(User, username="first")
+        ready = threading.Event()
+
+        game_manager.leaderboard.rebuild_in_background(ready.set)
+
+        assert ready.wait(timeout=5)
+        assert game_manager.leaderboard.ready
+        assert game_manager.leaderboard.rank(first.id) == 1
+
+    def test_points_committed_while_boards_are_read_are_counted(
+        self, game_manager, mocker
+    ):
+        third = game_manager.db.find_record(User, username="third")
+        read_boards = LeaderboardService._read_boards
+        writer = threading.Thread(
+            target=game_manager.db.enqueue,
+            args=[
+                Operation.add(PointsModel, user_id=third.id, point=100, category="test")
+            ],
+        )
+
+        def read_with_commit(service):
+            boards = read_boards(service)
+            # another thread commits points after the read, before the boards are used
+            writer.start()
+            writer.join(timeout=0.2)
+            return boards
+
+        mocker.patch.object(LeaderboardService, "_read_boards", read_with_commit)
+        game_manager.leaderboard.rebuild()
+        writer.join(timeout=5)
+
+        assert game_manager.leaderboard.around(third.id, n=0)[0].score == 110
+
+    def test_recalculated_points_update_board(self, game_manager):
+        third = game_manager.db.find_record(User, username="third")
+        game_manager.leaderboard.rebuild()
+        # a manual fix of the points, which skips the ledger
+        with game_manager.db.engine.begin() as connection:
+            connection.execute(
+                PointsModel.__table__.update()
+                .where(PointsModel.__table__.c.user_id == third.id)
+                .values(point=100)
+            )
+
+        game_manager.db.recalculate_points()
+
+        assert game_manager.leaderboard.around(third.id, n=0)[0].score == 200
+        assert game_manager.leaderboard.rank(third.id) == 1
@@ -0,0 +1,52 @@
+import pytest
+
+from src.db.db import engine
+from src.db.profiles import (
+    DEFAULT_PROFILE,
+    PROFILE_ENV,
+    PROFILES,
+    describe_engine,
+    get_profile,
+)
+
+
+class TestGetProfile:
+    def test_get_profile_by_name(self):
+        assert get_profile("kiosk") is PROFILES["kiosk"]
+
+    def test_get_profile_from_environment(self, monkeypatch):
+        monkeypatch.setenv(PROFILE_ENV, "bulk-import")
+        assert get_profile().name == "bulk-import"
+
+    def test_get_profile_default(self, monkeypatch, mocker):
+        monkeypatch.delenv(PROFILE_ENV, raising=False)
+        mocker.patch("src.db.profiles.AppConfig.get", return_value=None)
+        assert get_profile().name == DEFAULT_PROFILE
+
+    def test_get_profile_raises_error_for_unknown_profile(self):
+        with pytest.raises(ValueError):
+            get_profile("unknown")
+
+
+class TestEngineProfile:
+    @pytest.mark.parametrize("name", PROFILES)
+    def test_profile_disables_echo(self, tmp_path, name):
+        assert not engine(f"sqlite:///{tmp_path / 'db.sqlite'}", name).echo
+
+    def test_profile_pragmas_are_applied(self, tmp_path):
+        db_engine = engine(f"sqlite:///{tmp_path / 'db.sqlite'}", "kiosk")
+        settings = describe_engine(db_engine)
+
+        assert settings["profile"] == "kiosk"
+        assert settings["journal_mode"] == "wal"
+        # NORMAL
+        assert settings["synchronous"] == 1
+        assert settings["busy_timeout"] == PROFILES["kiosk"].busy_timeout
+        assert settings["mmap_size"] == PROFILES["kiosk"].mmap_size
+
+    def test_test_profile_keeps_journal_in_memory(self, tmp_path):
+        db_engine = engine(f"sqlite:///{tmp_path / 'db.sqlite'}", "test")
+        settings = describe_engine(db_engine)
+
+        assert settings["journal_mode"] == "memory"
+        assert settings["synchronous"] == 0
@@ -0,0 +1,117 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.db.provisioning import main, provision_accounts, read_accounts
+from src.models import ModelBase
+from src.models.enum_types import PointsCategory
+from src.models.games import AssociativeChangingModel, ResultKeeperModel
+from src.models.user import PointsModel, User
+from src.user.session import (
+    DEFAULT_ROUNDS,
+    MIN_ROUNDS,
+    get_rounds,
+    hash_rounds,
+    set_rounds,
+    verify_password,
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    ModelBase.metadata.create_all(engine)
+    return engine
+
+
+class TestProvisionAccounts:
+    def test_provision_accounts_creates_users_with_games_and_points(self, engine):
+        created, report = provision_accounts(
+            engine, ["anna", ("tom", "secret-password")], workers=2
+        )
+
+        assert report.created == 2
+        with Session(engine) as session:
+            users = session.query(User).order_by(User.username).all()
+            assert [user.username for user in users] == ["anna", "tom"]
+            for user in users:
+                assert user.point == PointsCategory.CREATE_ACCOUNT.value[1]
+                assert user.result_keeper.user_id == user.id
+                assert user.associative_changing.user_id == user.id
+            assert session.query(PointsModel).count() == 2
+            assert session.query(ResultKeeperModel).count() == 2
+            assert session.query(AssociativeChangingModel).count() == 2
+
+    def test_provision_accounts_returns_passwords_which_match_hashes(self, engine):
+        created, _ = provision_accounts(
+            engine, ["anna", ("tom", "secret-password")], workers=1
+        )
+
+        passwords = {account.username: account.password for account in created}
+        assert passwords["tom"] == "secret-password"
+        with Session(engine) as session:
+            for user in session.query(User):
+                assert verify_password(user.password, passwords[user.username])
+
+    def test_provision_accounts_skips_existing_and_duplicated_users(self, engine):
+        provision_accounts(engine, ["anna"], workers=1)
+        created, report = provision_accounts(engine, ["anna", "tom", "tom"], workers=1)
+
+        assert [account.username for account in created] == ["tom"]
+        assert report.skipped == ["anna"]
+        with Session(engine) as session:
+            assert session.query(User).count() == 2
+
+    def test_provision_accounts_in_many_batches(self, engine):
+        usernames = [f"student{i}" for i in range(7)]
+        created, _ = provision_accounts(engine, usernames, workers=2, batch_size=3)
+
+        assert [account.username for account in created] == usernames
+        assert len({account.id for account in created}) == 7
+
+
+class TestMain:
+    @pytest.fixture(autouse=True)
+    def rounds(self):
+        yield
+        set_rounds(DEFAULT_ROUNDS)
+
+    @pytest.fixture
+    def accounts(self, tmp_path):
+        path = tmp_path / "accounts.csv"
+        path.write_text("username,password\nanna,secret\n")
+        return path
+
+    def password_rounds(self, engine):
+        with Session(engine) as session:
+            return hash_rounds(session.query(User).one().password)
+
+    def test_accounts_are_hashed_with_configured_cost(self, engine, accounts, mocker):
+        # the cost calibrated on this machine and saved in the local config
+        mocker.patch(
+            "src.user.session.AppConfig.get",
+            side_effect=lambda section, key, fallback=None: (
+                str(MIN_ROUNDS) if key == "bcrypt_rounds" else fallback
+            ),
+        )
+
+        main([str(accounts), "--database-url", str(engine.url), "--workers", "1"])
+
+        assert self.password_rounds(engine) == get_rounds() == MIN_ROUNDS
+
+    def test_rounds_option_overrides_configured_cost(self, engine, accounts, mocker):
+        configure = mocker.patch("src.db.provisioning.configure_rounds")
+
+        main(
+            [str(accounts), "--database-url", str(engine.url), "--workers", "1"]
+            + ["--rounds", str(MIN_ROUNDS + 1)]
+        )
+
+        assert self.password_rounds(engine) == MIN_ROUNDS + 1
+        configure.assert_not_called()
+
+
+def test_read_accounts(tmp_path):
+    path = tmp_path / "accounts.csv"
+    path.write_text("username,password\nanna,\n tom ,secret\n,\n")
+    assert list(read_accounts(path)) == [("anna", None), ("tom", "secret")]
@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.db.query_plan import KNOWN_QUERIES, check_query_plans, explain
+from src.models import ModelBase
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+    ModelBase.metadata.create_all(engine)
+    return engine
+
+
+class TestQueryPlan:
+    def test_known_queries_use_indexes(self, engine):
+        assert check_query_plans(engine) == []
+
+    @pytest.mark.parametrize("name", KNOWN_QUERIES)
+    def test_known_queries_search_index(self, engine, name):
+        with engine.connect() as connection:
+            details = explain(connection, KNOWN_QUERIES[name]())
+        assert any(detail.startswith("SEARCH") for detail in details)
+
+    def test_missing_index_is_reported(self, engine):
+        with engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_points_table_user_id_saved_date"))
+
+        failed = {plan.name: plan for plan in check_query_plans(engine)}
+        assert "points of user by date" in failed
+        assert any(
+            "SCAN points_table" in p for p in failed["points total of user"].problems
+        )
@@ -0,0 +1,259 @@
+import json
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.db.db import Group, Operation, WriteBehindQueue, is_data_error
+from src.models import ModelBase
+from src.models.enum_types import GameName
+from src.models.games import ResultKeeperModel, ResultKeeperSessionModel
+from src.models.user import PointsModel, User
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """File database, the background writer uses its own connection"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    ModelBase.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def game(engine):
+    with Session(engine) as session:
+        user = User(username="testuser", password="testpass")
+        session.add(user)
+        session.commit()
+        game = ResultKeeperModel(
+            user_id=user.id, game_name=GameName.RESULT_KEEPER, level=1
+        )
+        session.add(game)
+        session.commit()
+        session.refresh(game)
+        return game
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return tmp_path / "db.journal"
+
+
+def game_operations(game, point=5, level=2):
+    return [
+        Operation.add(
+            ResultKeeperSessionModel,
+            result_keeper_id=game.id,
+            points_earned=point,
+            started_level=1,
+            finished_level=level,
+            wrong_answers=0,
+            correct_answers=1,
+            range_max=10,
+            steps=1,
+        ),
+        Operation.add(PointsModel, user_id=game.user_id, point=point, category="Game"),
+        Operation.update(ResultKeeperModel, game.id, {"level": level}),
+    ]
+
+
+class TestOperation:
+    def test_add_operation_keeps_default_values(self, game):
+        operation = Operation.add(PointsModel, user_id=1, point=5, category="Game")
+        assert operation.kind == "add"
+        assert "saved_date" in operation.fields
+        assert "id" not in operation.fields
+
+    def test_operation_survives_json_round_trip(self, game):
+        operation = game_operations(game)[0]
+        data = json.loads(json.dumps(operation.to_dict()))
+        assert Operation.from_dict(data) == operation
+
+    def test_upsert_updates_or_inserts_record(self, engine, game):
+        operations = [
+            Operation.upsert(
+                PointsModel, {"user_id": game.user_id, "category": "Game"}, {"point": p}
+            )
+            for p in (5, 7)
+        ]
+        operations = [
+            Operation.from_dict(json.loads(json.dumps(operation.to_dict())))
+            for operation in operations
+        ]
+        with Session(engine) as session:
+            for operation in operations:
+                operation.apply(session)
+            session.commit()
+            rows = session.query(PointsModel).filter_by(category="Game")
+            assert [points.point for points in rows] == [7]
+
+
+class TestWriteBehindQueue:
+    def test_flush_commits_all_queued_groups(self, engine, game, journal_path):
+        queue = WriteBehindQueue(sessionmaker(bind=engine), journal_path)
+        for _ in range(3):
+            queue.enqueue(game_operations(game))
+        assert queue.flush(timeout=5)
+
+        with Session(engine) as session:
+            assert session.query(ResultKeeperSessionModel).count() == 3
+            assert session.get(ResultKeeperModel, game.id).level == 2
+            # 10 points for account creation and 3 games
+            assert session.get(User, game.user_id).point == 25
+        queue.close()
+
+    def test_journal_is_empty_after_commit(self, engine, game, journal_path):
+        queue = WriteBehindQueue(sessionmaker(bind=engine), journal_path)
+        queue.enqueue(game_operations(game))
+        queue.close(timeout=5)
+        assert journal_path.read_text() == ""
+
+    def test_groups_left_in_journal_are_replayed(self, engine, game, journal_path):
+        ops = [operation.to_dict() for operation in game_operations(game)]
+        journal_path.write_text(json.dumps({"ops": ops}) + "\n" + '{"ops": [')
+
+        queue = WriteBehindQueue(sessionmaker(bind=engine), journal_path)
+        queue.close(timeout=5)
+
+        with Session(engine) as session:
+            assert session.query(ResultKeeperSessionModel).count() == 1
+        assert journal_path.read_text() == ""
+
+    def test_broken_group_is_rejected_without_blocking_others(
+        self, engine, game, journal_path
+    ):
+        queue = WriteBehindQueue(sessionmaker(bind=engine), journal_path)
+        queue.enqueue([Operation.update(ResultKeeperModel, game.id, {"unknown": 1})])
+        queue.enqueue(game_operations(game))
+        queue.close(timeout=5)
+
+        with Session(engine) as session:
+            assert session.query(ResultKeeperSessionModel).count() == 1
+        assert queue.rejected_path.exists()
+
+    def test_groups_are_retried_while_database_is_unavailable(
+        self, engine, game, journal_path, mocker
+    ):
+        commit = WriteBehindQueue._commit
+        failures = iter([True] * 3)
+
+        def locked_commit(queue, groups):
+            if next(failures, False):
+                raise OperationalError("COMMIT", {}, Exception("database is locked"))
+            commit(queue, groups)
+
+        mocker.patch.object(WriteBehindQueue, "_commit", locked_commit)
+        queue = WriteBehindQueue(
+            sessionmaker(bind=engine), journal_path, retry_delay=0.01
+        )
+        queue.enqueue(game_operations(game))
+        queue.enqueue(game_operations(game))
+        while queue.pending:
+            queue.flush(timeout=5)
+        queue.close(timeout=5)
+
+        with Session(engine) as session:
+            assert session.query(ResultKeeperSessionModel).count() == 2
+        assert not queue.rejected_path.exists()
+
+    def test_groups_left_when_database_is_unavailable_are_replayed(
+        self, engine, game, journal_path, mocker
+    ):
+        mocker.patch.object(
+            WriteBehindQueue,
+            "_commit",
+            side_effect=OperationalError("COMMIT", {}, Exception("disk I/O error")),
+        )
+        queue = WriteBehindQueue(sessionmaker(bind=engine), journal_path)
+        queue.enqueue(game_operations(game))
+        assert not queue.flush(timeout=5)
+        queue.close(timeout=5)
+        mocker.stopall()
+
+        queue = WriteBehindQueue(sessionmaker(bind=engine), journal_path)
+        queue.close(timeout=5)
+
+        with Session(engine) as session:
+            assert session.query(ResultKeeperSessionModel).count() == 1
+        assert not queue.rejected_path.exists()
+
+    @pytest.mark.parametrize(
+        "error, rejected",
+        [
+            (OperationalError("COMMIT", {}, Exception("database is locked")), False),
+            (OSError("No space left on device"), False),
+            (ValueError("Invalid operation: drop"), True),
+        ],
+    )
+    def test_only_data_errors_reject_groups(self, error, rejected):
+        assert is_data_error(error) is rejected
+
+    def test_failing_callback_doesnt_stop_writer(self, engine, game, journal_path):
+        committed = []
+
+        def on_commit(operations):
+            committed.append(operations)
+            raise RuntimeError("callback failed")
+
+        queue = WriteBehindQueue(
+            sessionmaker(bind=engine), journal_path, batch_size=1, on_commit=on_commit
+        )
+        queue.enqueue([Operation.update(ResultKeeperModel, game.id, {"unknown": 1})])
+        for _ in range(2):
+            queue.enqueue(game_operations(game))
+            assert queue.flush(timeout=5)
+        queue.close(timeout=5)
+
+        with Session(engine) as session:
+            assert session.query(ResultKeeperSessionModel).count() == 2
+        # the rejected group isn't passed to the callback
+        assert [
+            [operation.kind for operation in operations] for operations in committed
+        ] == [["add", "add", "update"]] * 2
+
+    def test_enqueue_after_close_raises_error(self, engine, journal_path):
+        queue = WriteBehindQueue(sessionmaker(bind=engine), journal_path)
+        queue.close()
+        with pytest.raises(RuntimeError):
+            queue.enqueue([Operation.add(PointsModel, user_id=1, point=1, category="")])
+
+    def test_group_committed_before_crash_is_applied_once(
+        self, engine, game, journal_path, mocker
+    ):
+        queue = WriteBehindQueue(sessionmaker(bind=engine), journal_path)
+        # crash after the commit, before the journal acknowledges the group
+        mocker.patch.object(queue, "_acknowledge")
+        queue.enqueue(game_operations(game))
+        queue.close(timeout=5)
+        assert len(journal_path.read_text().splitlines()) == 1
+
+        queue = WriteBehindQueue(sessionmaker(bind=engine), journal_path)
+        queue.close(timeout=5)
+
+        with Session(engine) as session:
+            assert session.query(ResultKeeperSessionModel).count() == 1
+            assert session.query(PointsModel).filter_by(category="Game").count() == 1
+            assert session.get(User, game.user_id).point == 15
+        assert journal_path.read_text() == ""
+
+    def test_acknowledged_groups_are_not_replayed(self, engine, game, journal_path):
+        groups = [Group(game_operations(game)) for _ in range(2)]
+        lines = [group.to_dict() for group in groups] + [{"ack": [groups[0].id]}]
+        journal_path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+        queue = WriteBehindQueue(sessionmaker(bind=engine), journal_path)
+        queue.close(timeout=5)
+
+        with Session(engine) as session:
+            assert session.query(ResultKeeperSessionModel).count() == 1
+
+    def test_only_enqueue_waits_for_fsync(self, engine, game, journal_path, mocker):
+        queue = WriteBehindQueue(sessionmaker(bind=engine), journal_path, batch_size=1)
+        fsync = mocker.spy(os, "fsync")
+        for _ in range(3):
+            queue.enqueue(game_operations(game))
+            queue.flush(timeout=5)
+        queue.close(timeout=5)
+        assert fsync.call_count == 3
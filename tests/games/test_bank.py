@@ -0,0 +1,118 @@
+import pytest
+
+from src.games.math.bank import (
+    BankCursor,
+    BankedChains,
+    PuzzleBank,
+    build_bank,
+    cursor_path,
+    open_bank,
+    range_size,
+)
+from src.games.math.result_keeper import ResultKeeper
+
+from .test_chain import assert_valid_chain
+
+
+@pytest.fixture(scope="module")
+def bank_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("bank") / "result_keeper.bank"
+    build_bank(path, levels=[1, 2, 5], chains_per_level=500, seed=0)
+    return path
+
+
+@pytest.fixture
+def bank(bank_path):
+    with PuzzleBank(bank_path) as bank:
+        yield bank
+
+
+class TestPuzzleBank:
+    def test_bank_has_chains_of_every_start(self, bank):
+        assert bank.levels == [1, 2, 5]
+        for level in bank.levels:
+            for start in range(range_size(level) + 1):
+                assert bank.count(level, start) > 0
+
+    def test_chains_are_valid(self, bank):
+        for level in bank.levels:
+            size = range_size(level)
+            for start in range(size + 1):
+                for index in range(bank.count(level, start)):
+                    numbers, chars = bank.chain(level, start, index)
+                    assert numbers[0] == start
+                    assert_valid_chain(numbers, chars, size)
+
+    def test_levels_have_the_requested_number_of_chains(self, bank):
+        for level in bank.levels:
+            chains = sum(
+                bank.count(level, start) for start in range(range_size(level) + 1)
+            )
+            assert chains >= 500
+
+    def test_missing_level_and_start_have_no_chains(self, bank):
+        assert 3 not in bank
+        assert bank.count(3, 0) == 0
+        assert bank.count(1, range_size(1) + 1) == 0
+        with pytest.raises(IndexError):
+            bank.chain(3, 0, 0)
+
+    def test_open_bank_returns_none_when_bank_is_missing(self, tmp_path):
+        assert open_bank(tmp_path / "missing.bank") is None
+
+    def test_invalid_file_raises_error(self, tmp_path):
+        path = tmp_path / "invalid.bank"
+        path.write_bytes(b"x" * 100)
+        with pytest.raises(ValueError):
+            PuzzleBank(path)
+
+
+class TestBankCursor:
+    def test_chains_dont_repeat_until_all_are_drawn(self, bank, tmp_path):
+        chains = BankedChains(bank, BankCursor(1, tmp_path / "cursor.json"))
+        count = bank.count(2, 7)
+        drawn = [chains.draw(2, 7) for _ in range(count)]
+
+        assert len({tuple(numbers + chars) for numbers, chars in drawn}) == count
+
+    def test_position_is_saved_per_user(self, bank, tmp_path):
+        path = tmp_path / "cursor.json"
+        cursor = BankCursor(1, path)
+        first = BankedChains(bank, cursor).draw(1, 3)
+        cursor.save()
+
+        assert BankCursor(1, path).positions == {"1:3": 1}
+        assert BankCursor(2, path).positions == {}
+        # the next draw continues after the saved position
+        assert BankedChains(bank, BankCursor(1, path)).draw(1, 3) != first
+
+    def test_cursor_is_saved_next_to_bank(self, bank):
+        assert cursor_path(bank.path) == str(bank.path.with_suffix(".cursor.json"))
+
+
+class TestResultKeeperWithBank:
+    def test_chain_is_drawn_from_bank(self, bank, mocker):
+        generate_chain = mocker.patch("src.games.math.result_keeper.generate_chain")
+        result_keeper = ResultKeeper(2, bank=BankedChains(bank, BankCursor(1, None)))
+        result_keeper.create_payload([4])
+
+        chars = result_keeper._set_math_char()
+
+        assert result_keeper.payload[0] == 4
+        assert_valid_chain(result_keeper.payload, chars, result_keeper.range_size)
+        generate_chain.assert_not_called()
+
+    def test_level_missing_in_bank_is_generated_live(self, bank):
+        result_keeper = ResultKeeper(3, bank=BankedChains(bank, BankCursor(1, None)))
+        result_keeper.create_payload()
+
+        chars = result_keeper._set_math_char()
+
+        assert_valid_chain(result_keeper.payload, chars, result_keeper.range_size)
+
+    def test_game_with_banked_chains_is_not_replayable(self, bank):
+        result_keeper = ResultKeeper(2, bank=BankedChains(bank, BankCursor(1, None)))
+        result_keeper.create_payload()
+        result_keeper._set_math_char()
+
+        assert result_keeper.get_stats()["seed"] is None
@@ -0,0 +1,120 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.games.math.batch import generate_chains, valid_chains
+from src.games.math.chain import OPERATIONS, generate_chain, range_size
+
+from .test_chain import assert_valid_chain, baseline_chain, step_frequencies
+
+
+def is_valid_chain(numbers, chars, size):
+    try:
+        assert_valid_chain(numbers, chars, size)
+    except (AssertionError, ZeroDivisionError):
+        return False
+    return True
+
+
+class TestGenerateChains:
+    @pytest.mark.parametrize("level", [1, 2, 10, 50, 200])
+    def test_chains_are_valid(self, level):
+        size = range_size(level)
+        batch = generate_chains(level, 5000, seed=level)
+
+        assert batch.numbers.shape == (5000, 10)
+        assert batch.operations.shape == (5000, 9)
+        assert valid_chains(batch.numbers, batch.operations, size).all()
+        for numbers, chars in list(batch)[:300]:
+            assert_valid_chain(numbers, chars, size)
+
+    def test_same_seed_gives_same_chains(self):
+        first = generate_chains(5, 100, seed=7)
+        second = generate_chains(5, 100, seed=7)
+
+        assert np.array_equal(first.numbers, second.numbers)
+        assert np.array_equal(first.operations, second.operations)
+
+    def test_chains_start_with_given_starts(self):
+        batch = generate_chains(1, 3, seed=0, starts=[0, 5, 10])
+        assert batch.numbers[:, 0].tolist() == [0, 5, 10]
+        assert batch.chain(1)[0][0] == 5
+
+    @pytest.mark.parametrize("operations", [["+"], ["-"], ["*"], ["/"], ["+", "-"]])
+    def test_chain_ends_for_single_operations(self, operations):
+        # the start at the top of the range leaves no operand for "+" but 0
+        batch = generate_chains(1, 200, seed=0, starts=10, operations=operations)
+
+        for numbers, chars in batch:
+            assert set(chars) <= set(operations)
+            assert_valid_chain(numbers, chars, 10)
+
+    @pytest.mark.parametrize("level", [1, 50])
+    def test_distribution_is_the_same_as_baseline(self, level):
+        size = range_size(level)
+        rng = random.Random(level)
+        starts = [rng.randint(0, size) for _ in range(4000)]
+
+        baseline = step_frequencies(
+            [baseline_chain(start, size, rng) for start in starts], size
+        )
+        batch = step_frequencies(generate_chains(level, 4000, seed=level), size)
+
+        assert batch == pytest.approx(baseline, abs=0.015)
+
+    @pytest.mark.parametrize("operations", [["/"], ["*", "/"], ["+", "/"]])
+    def test_redrawn_operands_are_the_valid_ones(self, operations):
+        # the operand is drawn again for most of the steps
+        batch = generate_chains(2, 4000, seed=3, operations=operations)
+        rng = random.Random(3)
+        baseline = [
+            baseline_chain(start, 15, rng, operations)
+            for start in batch.numbers[:, 0].tolist()
+        ]
+
+        assert valid_chains(batch.numbers, batch.operations, 15).all()
+        assert step_frequencies(batch, 15) == pytest.approx(
+            step_frequencies(baseline, 15), abs=0.015
+        )
+
+    @pytest.mark.parametrize(
+        "kwargs", [{"starts": 11}, {"starts": -1}, {"operations": ["%"]}, {"n": -1}]
+    )
+    def test_invalid_arguments_raise_error(self, kwargs):
+        with pytest.raises(ValueError):
+            generate_chains(**{"level": 1, "n": 10, **kwargs})
+
+
+class TestValidChains:
+    def test_mask_matches_scalar_rules(self):
+        # random numbers and operations, most of the chains break some rule
+        rng = random.Random(0)
+        numbers = [
+            [rng.randint(0, 10)] + [rng.randint(0, 12) for _ in range(3)]
+            for _ in range(2000)
+        ]
+        chars = [[rng.choice(OPERATIONS) for _ in range(3)] for _ in range(2000)]
+        operations = [[OPERATIONS.index(char) for char in row] for row in chars]
+
+        mask = valid_chains(np.array(numbers), np.array(operations), 10)
+
+        expected = [is_valid_chain(n, c, 10) for n, c in zip(numbers, chars)]
+        assert mask.tolist() == expected
+        assert 0 < sum(expected) < len(expected)
+
+    def test_chains_of_scalar_generator_are_valid(self):
+        rng = random.Random(1)
+        chains = [generate_chain(rng.randint(0, 55), 55, rng=rng) for _ in range(200)]
+        numbers = np.array([numbers for numbers, _ in chains])
+        operations = np.array(
+            [[OPERATIONS.index(c) for c in chars] for _, chars in chains]
+        )
+
+        assert valid_chains(numbers, operations, 55).all()
+
+    def test_start_out_of_range_is_invalid(self):
+        numbers = np.array([[11, 1], [10, 1]])
+        operations = np.array([[1], [1]])
+
+        assert valid_chains(numbers, operations, 10).tolist() == [False, True]
@@ -0,0 +1,150 @@
+import random
+from collections import Counter
+
+import pytest
+
+from src.games.math.chain import (
+    OPERATIONS,
+    apply,
+    divisor_table,
+    generate_chain,
+    operands,
+    range_size,
+    redraw_operands,
+)
+
+
+def assert_valid_chain(numbers, chars, range_size):
+    result = numbers[0]
+    for number, char in zip(numbers[1:], chars, strict=True):
+        if char == "/":
+            assert number != 0 and result % number == 0
+        result = apply(result, number, char)
+        assert 0 <= result <= range_size
+
+
+def baseline_chain(start, range_size, rng, operations=OPERATIONS):
+    """The chain of the former retry loop of ResultKeeper._set_math_char"""
+    payload = [start] + [rng.randint(0, range_size) for _ in range(9)]
+    chars, result, i, left = [], start, 1, list(operations)
+    while i < 10:
+        if not left:
+            left = list(operations)
+            payload[i] = rng.randint(1, range_size)
+            continue
+        char = rng.choice(left)
+        number = payload[i]
+        if char == "/" and (number == 0 or result % number):
+            left.remove(char)
+        elif 0 <= apply(result, number, char) <= range_size:
+            chars.append(char)
+            result = apply(result, number, char)
+            i += 1
+            left = list(operations)
+        else:
+            left.remove(char)
+    return payload, chars
+
+
+def step_frequencies(chains, range_size):
+    """Shares of the operations, of the trivial steps and of the operand deciles"""
+    steps = [
+        (number, char)
+        for numbers, chars in chains
+        for number, char in zip(numbers[1:], chars)
+    ]
+    operations = Counter(char for _, char in steps)
+    deciles = Counter(number * 10 // (range_size + 1) for number, _ in steps)
+    trivial = sum(
+        number == 0 or (char in "*/" and number == 1) for number, char in steps
+    )
+    return (
+        [operations[char] / len(steps) for char in OPERATIONS]
+        + [trivial / len(steps)]
+        + [deciles[decile] / len(steps) for decile in range(10)]
+    )
+
+
+class TestDivisorTable:
+    def test_divisors_of_numbers(self):
+        table = divisor_table(12)
+        assert table[12] == (1, 2, 3, 4, 6, 12)
+        assert table[7] == (1, 7)
+        assert table[0] == tuple(range(1, 13))
+
+
+class TestOperands:
+    @pytest.mark.parametrize("operation", OPERATIONS)
+    @pytest.mark.parametrize("result", [0, 1, 7, 12, 30])
+    def test_every_operand_keeps_result_in_range(self, operation, result):
+        for operand in operands(result, operation, 30):
+            assert 0 <= apply(result, operand, operation) <= 30
+            if operation == "/":
+                assert result % operand == 0
+
+
+class TestGenerateChain:
+    @pytest.mark.parametrize("level", [1, 2, 10, 50, 200])
+    def test_chains_are_valid(self, level):
+        range_size = 5 + 5 * level
+        rng = random.Random(level)
+        for _ in range(200):
+            start = rng.randint(0, range_size)
+            numbers, chars = generate_chain(start, range_size, rng=rng)
+
+            assert len(numbers) == 10
+            assert len(chars) == 9
+            assert numbers[0] == start
+            assert_valid_chain(numbers, chars, range_size)
+
+    @pytest.mark.parametrize("operations", [["+"], ["-"], ["*"], ["/"], ["+", "-"]])
+    def test_chain_ends_for_single_operations(self, operations):
+        # the start at the top of the range leaves no operand for "+" but 0
+        numbers, chars = generate_chain(10, 10, operations=operations)
+
+        assert set(chars) <= set(operations)
+        assert_valid_chain(numbers, chars, 10)
+
+    def test_every_operation_is_used(self):
+        rng = random.Random(0)
+        chars = set()
+        for _ in range(50):
+            chars.update(generate_chain(rng.randint(0, 10), 10, rng=rng)[1])
+        assert chars == set(OPERATIONS)
+
+    @pytest.mark.parametrize(
+        "level, operations", [(1, OPERATIONS), (50, OPERATIONS), (2, ["*", "/"])]
+    )
+    def test_distribution_is_the_same_as_baseline(self, level, operations):
+        size = range_size(level)
+        rng = random.Random(level)
+        starts = [rng.randint(0, size) for _ in range(4000)]
+
+        baseline = step_frequencies(
+            [baseline_chain(start, size, rng, operations) for start in starts], size
+        )
+        chains = step_frequencies(
+            [generate_chain(start, size, 10, operations, rng) for start in starts],
+            size,
+        )
+
+        assert chains == pytest.approx(baseline, abs=0.015)
+
+    def test_redraw_operands_are_the_valid_ones(self):
+        for result in range(31):
+            end, extra = redraw_operands(result, 30)
+            valid = [
+                number
+                for number in range(1, 31)
+                if any(
+                    0 <= apply(result, number, char) <= 30
+                    and (char != "/" or result % number == 0)
+                    for char in OPERATIONS
+                )
+            ]
+            assert list(range(1, end + 1)) + list(extra) == valid
+
+    @pytest.mark.parametrize("start, operations", [(11, OPERATIONS), (0, ["%"])])
+    def test_invalid_arguments_raise_error(self, start, operations):
+        with pytest.raises(ValueError):
+            generate_chain(start, 10, operations=operations)
@@ -0,0 +1,225 @@
+import os
+import random
+import tracemalloc
+import unicodedata
+from collections import Counter
+
+import pytest
+
+from src.games.mnemonic import corpus as corpus_module
+from src.games.mnemonic.associative_chaining import DATA_PATH, AssociativeChaining
+from src.games.mnemonic.corpus import (
+    Corpus,
+    clear_corpora,
+    compile_corpus,
+    compiled_path,
+    load_corpus,
+    normalize,
+    read_words,
+    reservoir_sample,
+    sample_words,
+)
+from src.models.enum_types import Language
+
+
+@pytest.fixture
+def word_file(tmp_path):
+    path = tmp_path / "words"
+    path.write_text("Cat\ntree\n\n  book \ncat\nżółw\ntree\n", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    clear_corpora()
+    yield tmp_path / "cache"
+    clear_corpora()
+
+
+class TestCorpus:
+    def test_normalize(self):
+        assert normalize("  Żółw \n") == "żółw"
+        assert normalize(unicodedata.normalize("NFD", "żółw")) == "żółw"
+
+    def test_words_are_normalized_and_unique(self, word_file, tmp_path):
+        compile_corpus(word_file, tmp_path / "compiled")
+        corpus = Corpus(tmp_path / "compiled")
+
+        assert list(corpus) == ["cat", "tree", "book", "żółw"]
+        assert len(corpus) == 4
+        assert corpus[3] == "żółw"
+        corpus.close()
+
+    def test_sample_gives_different_words(self, word_file, tmp_path):
+        compile_corpus(word_file, tmp_path / "compiled")
+        corpus = Corpus(tmp_path / "compiled")
+
+        sample = corpus.sample(3, random.Random(1))
+
+        assert len(set(sample)) == 3
+        assert set(sample) <= set(corpus)
+        assert sample == corpus.sample(3, random.Random(1))
+        with pytest.raises(ValueError):
+            corpus.sample(5)
+        corpus.close()
+
+    def test_words_are_sorted_in_many_runs(self, tmp_path, mocker):
+        mocker.patch.object(corpus_module, "RUN_SIZE", 7)
+        mocker.patch.object(corpus_module, "MERGE_BLOCK", 3)
+        rng = random.Random(6)
+        path = tmp_path / "words"
+        path.write_text("\n".join(f"w{rng.randrange(40)}" for _ in range(200)))
+        compile_corpus(path, tmp_path / "compiled")
+        corpus = Corpus(tmp_path / "compiled")
+
+        assert list(corpus) == list(dict.fromkeys(read_words(path)))
+        corpus.close()
+
+    def test_words_with_the_same_hash_are_kept(self, word_file, tmp_path, mocker):
+        # all the words collide
+        mocker.patch.object(corpus_module, "_word_hash", lambda data: 0)
+        compile_corpus(word_file, tmp_path / "compiled")
+        corpus = Corpus(tmp_path / "compiled")
+
+        assert list(corpus) == ["cat", "tree", "book", "żółw"]
+        corpus.close()
+
+    def test_memory_of_compiling_doesnt_depend_on_corpus_size(self, tmp_path, mocker):
+        mocker.patch.object(corpus_module, "RUN_SIZE", 1000)
+        mocker.patch.object(corpus_module, "MERGE_BLOCK", 10)
+        rng = random.Random(7)
+        path = tmp_path / "large"
+        path.write_text(
+            "\n".join(f"word{rng.randrange(10**6)}" for _ in range(3 * 10**4))
+        )
+
+        tracemalloc.start()
+        try:
+            compile_corpus(path, tmp_path / "compiled")
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        corpus = Corpus(tmp_path / "compiled")
+
+        assert list(corpus) == list(dict.fromkeys(read_words(path)))
+        # the words alone take more than 1 MB in memory
+        assert peak < 400_000
+        corpus.close()
+
+    @pytest.mark.parametrize("content", [b"", b"BBWORDS1", b"not a corpus" * 10])
+    def test_invalid_file_raises_error(self, tmp_path, content):
+        path = tmp_path / "compiled"
+        path.write_bytes(content or b"\0")
+        with pytest.raises(ValueError):
+            Corpus(path)
+
+
+class TestLoadCorpus:
+    def test_corpus_is_loaded_once(self, word_file, cache_dir, mocker):
+        compile = mocker.spy(corpus_module, "compile_corpus")
+
+        corpus = load_corpus(word_file, cache_dir)
+
+        assert load_corpus(word_file, cache_dir) is corpus
+        assert compiled_path(word_file, cache_dir).exists()
+        assert compile.call_count == 1
+
+    def test_compiled_file_is_reused_by_other_processes(
+        self, word_file, cache_dir, mocker
+    ):
+        load_corpus(word_file, cache_dir)
+        # a new process has no loaded corpora
+        clear_corpora()
+        compile = mocker.spy(corpus_module, "compile_corpus")
+
+        assert list(load_corpus(word_file, cache_dir)) == [
+            "cat",
+            "tree",
+            "book",
+            "żółw",
+        ]
+        compile.assert_not_called()
+
+    def test_corpus_is_rebuilt_when_file_changes(self, word_file, cache_dir):
+        load_corpus(word_file, cache_dir)
+        word_file.write_text("dog\n", encoding="utf-8")
+        stat = word_file.stat()
+        os.utime(word_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert list(load_corpus(word_file, cache_dir)) == ["dog"]
+
+    @pytest.mark.parametrize("language", list(Language))
+    def test_shipped_corpora_have_enough_words(self, language):
+        corpus = load_corpus(DATA_PATH / f"{language.value.lower()}_noun")
+
+        assert len(corpus) >= AssociativeChaining(200, language).size
+        assert "" not in set(corpus)
+
+
+class TestSampling:
+    def test_reservoir_sample_gives_different_words(self):
+        words = [f"w{i % 50}" for i in range(1000)]
+        sample = reservoir_sample(words, 20, random.Random(1))
+
+        assert len(set(sample)) == 20
+        assert set(sample) <= set(words)
+        assert sample == reservoir_sample(words, 20, random.Random(1))
+        assert reservoir_sample(words, 0) == []
+        with pytest.raises(ValueError):
+            reservoir_sample(words, 51)
+
+    def test_reservoir_sample_is_uniform(self):
+        rng = random.Random(2)
+        counts = Counter(
+            word
+            for _ in range(4000)
+            for word in reservoir_sample((str(i) for i in range(20)), 5, rng)
+        )
+        # every word is expected 1000 times
+        assert len(counts) == 20
+        assert all(850 < count < 1150 for count in counts.values())
+
+    def test_words_are_streamed_when_corpus_cant_be_compiled(
+        self, word_file, cache_dir, mocker
+    ):
+        # the cache directory can't be created
+        cache_dir.write_text("")
+        compiled = mocker.spy(Corpus, "sample")
+
+        sample = sample_words(word_file, 4, random.Random(3), cache_dir)
+
+        assert sorted(sample) == ["book", "cat", "tree", "żółw"]
+        compiled.assert_not_called()
+
+    @pytest.mark.parametrize("language", list(Language))
+    def test_both_samplings_of_shipped_corpora(self, language, cache_dir):
+        path = DATA_PATH / f"{language.value.lower()}_noun"
+        words = set(read_words(path))
+
+        for sample in (
+            sample_words(path, 100, random.Random(4), cache_dir),
+            reservoir_sample(read_words(path), 100, random.Random(4)),
+        ):
+            assert len(set(sample)) == 100
+            assert set(sample) <= words
+
+    def test_memory_of_sampling_doesnt_depend_on_corpus_size(self, tmp_path, cache_dir):
+        rng = random.Random(5)
+        path = tmp_path / "large"
+        path.write_text(
+            "\n".join(f"word{rng.randrange(10**6)}" for _ in range(10**5))
+        )
+        corpus = load_corpus(path, cache_dir)
+        assert list(corpus)[:3] == list(dict.fromkeys(read_words(path)))[:3]
+
+        tracemalloc.start()
+        try:
+            for sample in (
+                lambda: corpus.sample(100, rng),
+                lambda: reservoir_sample(read_words(path), 100, rng),
+            ):
+                tracemalloc.reset_peak()
+                sample()
+                assert tracemalloc.get_traced_memory()[1] < 100_000
+        finally:
+            tracemalloc.stop()
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from src.games.mnemonic.fuzzy import (
+    Pattern,
+    deletions,
+    fold,
+    levenshtein,
+    one_edit_halves,
+)
+
+
+def reference_distance(a, b):
+    row = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        previous, row[0] = row[:], i
+        for j, char_b in enumerate(b, 1):
+            row[j] = min(
+                previous[j] + 1, row[j - 1] + 1, previous[j - 1] + (char_a != char_b)
+            )
+    return row[-1]
+
+
+def random_word(rng, alphabet="abc", max_length=9):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+
+
+class TestFold:
+    @pytest.mark.parametrize(
+        "word, expected",
+        [
+            ("żółw", "zolw"),
+            ("źdźbło", "zdzblo"),
+            ("łódź", "lodz"),
+            ("café", "cafe"),
+            ("straße", "strasse"),
+            ("tree", "tree"),
+        ],
+    )
+    def test_fold(self, word, expected):
+        assert fold(word) == expected
+
+
+class TestLevenshtein:
+    @pytest.mark.parametrize(
+        "a, b, expected",
+        [("", "", 0), ("", "abc", 3), ("kitten", "sitting", 3), ("zolw", "zółw", 2)],
+    )
+    def test_distance(self, a, b, expected):
+        assert levenshtein(a, b) == levenshtein(b, a) == expected
+
+    def test_distance_is_same_as_reference(self):
+        rng = random.Random(4)
+        for _ in range(3000):
+            a, b = random_word(rng), random_word(rng)
+            assert levenshtein(a, b) == reference_distance(a, b)
+
+    def test_distance_over_limit_is_none(self):
+        rng = random.Random(5)
+        for _ in range(3000):
+            a, b = random_word(rng), random_word(rng)
+            max_distance = rng.randint(0, 3)
+            expected = reference_distance(a, b)
+            assert levenshtein(a, b, max_distance) == (
+                expected if expected <= max_distance else None
+            )
+
+    def test_long_words(self):
+        rng = random.Random(6)
+        a = random_word(rng, "abcd", 200)
+        b = random_word(rng, "abcd", 200)
+        assert Pattern(a).distance(b) == reference_distance(a, b)
+
+
+class TestDeletions:
+    def test_deletions(self):
+        assert deletions("abc", 1) == {"abc", "bc", "ac", "ab"}
+        assert deletions("ab", 2) == {"ab", "a", "b", ""}
+
+    def test_close_words_share_deletions(self):
+        rng = random.Random(7)
+        for _ in range(2000):
+            a, b = random_word(rng), random_word(rng)
+            max_distance = rng.randint(1, 2)
+            if reference_distance(a, b) <= max_distance:
+                assert deletions(a, max_distance) & deletions(b, max_distance)
+
+
+class TestOneEditHalves:
+    def test_halves(self):
+        assert list(one_edit_halves("abcd")) == [
+            ("a", "cd"),
+            ("ab", "cd"),
+            ("ab", "bcd"),
+        ]
+
+    def test_close_words_share_a_half(self):
+        rng = random.Random(8)
+        for _ in range(2000):
+            a, b = random_word(rng), random_word(rng)
+            if reference_distance(a, b) <= 1:
+                first, last = b[: len(b) // 2], b[len(b) // 2 :]
+                assert any(
+                    first == first_half or last == last_half
+                    for first_half, last_half in one_edit_halves(a)
+                )
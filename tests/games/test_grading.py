@@ -0,0 +1,234 @@
+import random
+
+import pytest
+
+from src.games.mnemonic import associative_chaining as associative_chaining_module
+from src.games.mnemonic.associative_chaining import AssociativeChaining, Color
+from src.games.mnemonic.fuzzy import levenshtein
+from src.games.mnemonic.grading import AnswerKey, Grade
+from src.models.enum_types import Language
+
+PAYLOAD = ["a", "b", "c", "d"]
+GREEN = AssociativeChaining.CORRECT_ANSWER_COLOR
+YELLOW = AssociativeChaining.GOOD_ANSWER_COLOR
+RED = AssociativeChaining.BAD_ANSWER_COLOR
+
+
+def grades(answers, payload=PAYLOAD):
+    return [grade for _, grade in AnswerKey(payload).grade(answers).grades]
+
+
+class TestAnswerKey:
+    def test_grades_of_answers(self):
+        assert grades(["a", "c", "x", "-"]) == [
+            Grade.CORRECT,
+            Grade.GOOD,
+            Grade.WRONG,
+            Grade.SKIPPED,
+        ]
+
+    def test_missing_and_extra_answers(self):
+        assert (
+            grades(["a", "b"]) == [Grade.CORRECT, Grade.CORRECT] + [Grade.MISSING] * 2
+        )
+        assert grades(PAYLOAD + ["a", "x"]) == [Grade.CORRECT] * 4 + [Grade.WRONG] * 2
+
+    def test_answers_are_normalized(self):
+        grading = AnswerKey(["żółw"]).grade([" Żółw "])
+        assert grading.grades == [("żółw", Grade.CORRECT)]
+
+    def test_repeated_answer_is_good_once(self):
+        assert grades(["c", "c", "x", "x"]) == [
+            Grade.GOOD,
+            Grade.WRONG,
+            Grade.WRONG,
+            Grade.WRONG,
+        ]
+        assert grades(["b", "b", "b", "x"]) == [
+            Grade.WRONG,
+            Grade.CORRECT,
+            Grade.WRONG,
+            Grade.WRONG,
+        ]
+
+    def test_answer_in_place_is_matched_before_others(self):
+        # the first "c" mustn't take the word answered at its position
+        assert grades(["c", "x", "c", "x"]) == [
+            Grade.WRONG,
+            Grade.WRONG,
+            Grade.CORRECT,
+            Grade.WRONG,
+        ]
+
+    def test_repeated_word_of_payload(self):
+        assert grades(["b", "a", "x", "a"], ["a", "a", "b", "c"]) == [
+            Grade.GOOD,
+            Grade.CORRECT,
+            Grade.WRONG,
+            Grade.GOOD,
+        ]
+
+    def test_fuzzy_matching_is_off_by_default(self):
+        assert grades(["zolw", "ołowek"], ["żółw", "ołówek"]) == [Grade.WRONG] * 2
+
+    def test_nearly_correct_answers(self):
+        payload = ["żółw", "ołówek", "krzesło", "okno"]
+        assert [
+            grade
+            for _, grade in AnswerKey(payload, max_distance=1)
+            .grade(["zolw", "olowek", "kszesło", "okienko"])
+            .grades
+        ] == [Grade.NEARLY_CORRECT] * 3 + [Grade.WRONG]
+
+    def test_nearly_good_answers(self):
+        payload = ["żółw", "ołówek", "krzesło", "okno"]
+        answer_key = AnswerKey(payload, max_distance=2)
+        assert [
+            grade
+            for _, grade in answer_key.grade(["okienko", "krzeslo", "zolw", "x"]).grades
+        ] == [Grade.WRONG, Grade.NEARLY_GOOD, Grade.NEARLY_GOOD, Grade.WRONG]
+
+    def test_exact_answers_are_matched_before_fuzzy_ones(self):
+        answer_key = AnswerKey(["cat", "car"], max_distance=1)
+        # "cat" at the second position takes the word from the nearly correct "cas"
+        assert [grade for _, grade in answer_key.grade(["cas", "cat"]).grades] == [
+            Grade.NEARLY_GOOD,
+            Grade.GOOD,
+        ]
+        assert [grade for _, grade in answer_key.grade(["cas", "cax"]).grades] == [
+            Grade.NEARLY_CORRECT,
+            Grade.NEARLY_CORRECT,
+        ]
+
+    def test_nearest_word_is_taken(self):
+        answer_key = AnswerKey(["x", "abcd", "abxy"], max_distance=2)
+        # "abcx" takes "abcd", so "abxz" can't be nearly correct anymore
+        assert [grade for _, grade in answer_key.grade(["abcx", "abxz"]).grades] == [
+            Grade.NEARLY_GOOD,
+            Grade.NEARLY_GOOD,
+            Grade.MISSING,
+        ]
+
+    def test_words_one_edit_away_are_found(self):
+        rng = random.Random(9)
+        words = [
+            "".join(rng.choice("abc") for _ in range(rng.randint(1, 6)))
+            for _ in range(40)
+        ]
+        answer_key = AnswerKey(words, max_distance=1)
+        for _ in range(500):
+            answer = "".join(rng.choice("abc") for _ in range(rng.randint(0, 7)))
+            expected = {word for word in words if levenshtein(word, answer) <= 1}
+            assert set(answer_key._words_within_one(answer)) == expected
+
+    def test_recalled_words(self):
+        grading = AnswerKey(["żółw", "okno", "kot", "pies"], max_distance=1).grade(
+            ["żółw", "kot", "okmo", "x"]
+        )
+        assert grading.recalled == {
+            "żółw": Grade.CORRECT,
+            "kot": Grade.GOOD,
+            "okno": Grade.NEARLY_GOOD,
+        }
+
+    def test_negative_max_distance_raises_error(self):
+        with pytest.raises(ValueError):
+            AnswerKey(PAYLOAD, max_distance=-1)
+
+    def test_grade_many(self):
+        gradings = AnswerKey(PAYLOAD).grade_many([PAYLOAD, ["x"]])
+        assert [grading.count(Grade.CORRECT) for grading in gradings] == [4, 0]
+        assert gradings[1].count(Grade.MISSING) == 3
+
+
+class TestCheckAnswer:
+    def test_answers_without_repeats_are_graded_like_before(self):
+        """Same colors and points as the scan of the payload for every answer"""
+        rng = random.Random(3)
+        words = [f"w{i}" for i in range(30)]
+        for _ in range(200):
+            payload = rng.sample(words, 10)
+            answers = rng.sample(words + ["-"] * 3, rng.randint(0, 14))
+            associative_chaining = AssociativeChaining(2, Language.EN)
+            associative_chaining.payload = payload
+
+            result = associative_chaining.check_answer(answers)
+
+            expected_points = 0
+            for position, answer in enumerate(answers):
+                if position < len(payload) and answer == payload[position]:
+                    expected_points += 4
+                    assert result[position][1] == GREEN
+                elif position < len(payload) and answer in payload:
+                    expected_points += 2
+                    assert result[position][1] == YELLOW
+                else:
+                    if position >= len(payload) or answer != "-":
+                        expected_points -= 2
+                    assert result[position][1] == RED
+            assert associative_chaining.points.points == expected_points
+            assert len(result) == max(len(answers), len(payload))
+
+    def test_repeated_answers_earn_points_once(self):
+        associative_chaining = AssociativeChaining(1, Language.EN)
+        associative_chaining.payload = ["a", "b", "c"]
+
+        associative_chaining.check_answer(["b", "b", "b"])
+
+        assert associative_chaining.points.points == 2 - 1 - 1
+        assert associative_chaining.points.correct_answers == 1
+        assert associative_chaining.level == 1
+
+    def test_index_is_built_once_per_payload(self, mocker):
+        answer_key = mocker.spy(associative_chaining_module, "AnswerKey")
+        associative_chaining = AssociativeChaining(1, Language.EN)
+        associative_chaining.payload = PAYLOAD
+
+        associative_chaining.check_answers([PAYLOAD] * 5)
+        associative_chaining.check_answer(PAYLOAD)
+        assert answer_key.call_count == 1
+
+        associative_chaining.payload = ["a"]
+        associative_chaining.check_answer(["a"])
+        assert answer_key.call_count == 2
+
+    def test_check_answers_gives_points_of_every_player(self):
+        associative_chaining = AssociativeChaining(1, Language.EN)
+        associative_chaining.payload = PAYLOAD
+
+        results = associative_chaining.check_answers(
+            [PAYLOAD, ["b", "a", "-", "x"], []]
+        )
+
+        assert [result.points.points for result in results] == [8, 1, 0]
+        assert [result.skip_answers for result in results] == [0, 1, 0]
+        assert results[2].points.wrong_answer == 4
+        assert results[1].result[0] == ("b", YELLOW)
+        # the game itself isn't played
+        assert associative_chaining.points.points == 0
+        assert associative_chaining.level == 1
+
+    def test_nearly_correct_answers_get_half_points(self):
+        associative_chaining = AssociativeChaining(3, Language.PL, max_distance=1)
+        associative_chaining.payload = ["żółw", "ołówek", "okno"]
+
+        result = associative_chaining.check_answer(["zolw", "okmo", "olowek"])
+
+        assert [color for _, color in result] == [
+            Color.LIGHT_GREEN.value,
+            Color.LIGHT_YELLOW.value,
+            Color.LIGHT_YELLOW.value,
+        ]
+        assert associative_chaining.points.points == 3 + 1 + 1
+        assert associative_chaining.points.partial_answers == 3
+        # nearly correct answers don't level up
+        assert associative_chaining.level == 3
+
+    @pytest.mark.parametrize("level", [1, 50, 91])
+    def test_all_correct_answers_level_up(self, level):
+        associative_chaining = AssociativeChaining(level, Language.EN, seed=1)
+        associative_chaining.create_payload()
+
+        associative_chaining.check_answer(list(associative_chaining.payload))
+
+        assert associative_chaining.level == level + 1
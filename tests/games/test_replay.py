@@ -0,0 +1,133 @@
+from src.games.math import ResultKeeper
+from src.games.math.chain import apply
+from src.games.mnemonic.associative_chaining import AssociativeChaining
+from src.games.replay import (
+    parse_answers,
+    parse_user_answers,
+    replay_associative_changing,
+    replay_result_keeper,
+)
+from src.models.enum_types import Language
+
+
+def play_result_keeper(result_keeper, wrong_steps=(), steps=40):
+    """Answer like a player who is wrong at the given steps, return the questions"""
+    game = result_keeper.run()
+    question, _ = next(game)
+    questions = [question]
+    value = None
+    for step in range(steps):
+        tokens = question.split()
+        if len(tokens) == 4:
+            # the first question: "a + b = "
+            value, tokens = int(tokens[0]), tokens[1:]
+        expected = apply(value, int(tokens[1]), tokens[0])
+        try:
+            _, correct = game.send(expected + 1 if step in wrong_steps else expected)
+        except StopIteration:
+            break
+        if correct:
+            value = expected
+            question, _ = next(game)
+            questions.append(question)
+    return questions
+
+
+class TestSeededEngines:
+    def test_same_seed_gives_same_chains(self):
+        chains = []
+        for _ in range(2):
+            result_keeper = ResultKeeper(3, seed=5)
+            result_keeper.create_payload()
+            chains.append((result_keeper._set_math_char(), result_keeper.payload))
+        assert chains[0] == chains[1]
+
+    def test_same_seed_gives_same_words(self):
+        payloads = []
+        for _ in range(2):
+            associative_chaining = AssociativeChaining(4, Language.EN, seed=5)
+            associative_chaining.create_payload()
+            payloads.append(associative_chaining.payload)
+        assert payloads[0] == payloads[1]
+
+    def test_new_seed_is_drawn_when_missing(self):
+        assert ResultKeeper(1).seed != ResultKeeper(1).seed
+
+    def test_stats_contain_seed_and_answers(self):
+        result_keeper = ResultKeeper(1, seed=3)
+        play_result_keeper(result_keeper, wrong_steps={2}, steps=5)
+
+        stats = result_keeper.get_stats()
+        assert stats["seed"] == 3
+        assert len(parse_answers(stats["answers"])) == 5
+
+
+class TestReplay:
+    def test_result_keeper_replay_gives_same_questions_and_points(self):
+        result_keeper = ResultKeeper(2, seed=11)
+        questions = play_result_keeper(result_keeper, wrong_steps={3, 14})
+        stats = result_keeper.get_stats()
+
+        replay = replay_result_keeper(2, 11, parse_answers(stats["answers"]))
+
+        assert replay.questions == questions
+        assert replay.points_earned == stats["points_earned"]
+        assert replay.finished_level == stats["finished_level"] > 2
+
+    def test_replay_of_lost_game(self):
+        result_keeper = ResultKeeper(1, seed=2)
+        play_result_keeper(result_keeper, wrong_steps={4, 5, 6, 7})
+        stats = result_keeper.get_stats()
+
+        replay = replay_result_keeper(1, 2, parse_answers(stats["answers"]))
+
+        assert result_keeper.lives_left == 0
+        assert replay.points_earned == stats["points_earned"]
+
+    def test_associative_changing_replay_gives_same_words_and_points(self):
+        associative_chaining = AssociativeChaining(1, Language.EN, seed=8)
+        game = associative_chaining.run()
+        words = next(game)
+        answers = words[:4] + ["-", "unknown"] + words[7:3:-1]
+        try:
+            game.send(answers)
+        except StopIteration:
+            pass
+        stats = associative_chaining.get_stats()
+
+        replay = replay_associative_changing(
+            1, 8, Language.EN, parse_user_answers(stats["user_answers"])
+        )
+
+        assert replay.questions == words
+        assert replay.points_earned == stats["points_earned"]
+
+    def test_replay_of_fuzzy_game_gives_same_points(self):
+        associative_chaining = AssociativeChaining(
+            1, Language.EN, seed=8, max_distance=1
+        )
+        game = associative_chaining.run()
+        words = next(game)
+        # one-letter typos get part of the points only with the fuzzy matching
+        answers = [word[:-1] + "x" for word in words[:5]] + words[5:]
+        try:
+            game.send(answers)
+        except StopIteration:
+            pass
+        stats = associative_chaining.get_stats()
+
+        replay = replay_associative_changing(
+            1,
+            8,
+            Language.EN,
+            parse_user_answers(stats["user_answers"]),
+            stats["max_distance"],
+        )
+
+        assert stats["max_distance"] == 1
+        assert replay.points_earned == stats["points_earned"]
+        assert replay.points_earned != (
+            replay_associative_changing(
+                1, 8, Language.EN, parse_user_answers(stats["user_answers"])
+            ).points_earned
+        )
@@ -1,7 +1,12 @@
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
 import pytest
 
+from src.games.math.chain import chain_result
 from src.games.math.result_keeper import Points, ResultKeeper
 
+from .test_replay import play_result_keeper
+
 
 class TestResultKeeper:
     def test_initialize_game_state(self):
@@ -53,3 +58,59 @@ class TestResultKeeper:
         assert len(math_chars) == 9
         # should contain only + and -
         assert all(op in ["+", "-"] for op in math_chars)
+
+
+class ManualExecutor(Executor):
+    """Runs the submitted calls only when asked"""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.calls.append((future, fn, args))
+        return future
+
+    def run_all(self):
+        for future, fn, args in self.calls:
+            if not future.done():
+                future.set_result(fn(*args))
+
+
+class TestPrefetch:
+    def test_next_round_is_generated_for_both_levels(self):
+        executor = ManualExecutor()
+        result_keeper = ResultKeeper(3, seed=1, executor=executor)
+        chars = result_keeper._set_math_char()
+
+        end = chain_result(result_keeper.payload, chars)
+        assert [args for _, _, args in executor.calls] == [(1, 3, end), (1, 4, end)]
+
+    @pytest.mark.parametrize("level_up", [False, True])
+    def test_prefetched_chain_is_the_same_as_generated_one(self, level_up, mocker):
+        executor = ManualExecutor()
+        prefetching = ResultKeeper(3, seed=1, executor=executor)
+        plain = ResultKeeper(3, seed=1)
+        for result_keeper in (prefetching, plain):
+            chars = result_keeper._set_math_char()
+            end = chain_result(result_keeper.payload, chars)
+            result_keeper.level += level_up
+            result_keeper.create_payload([end])
+        executor.run_all()
+        generated = mocker.spy(prefetching, "_chain")
+
+        chars = prefetching._set_math_char()
+        plain_chars = plain._set_math_char()
+
+        assert (prefetching.payload, chars) == (plain.payload, plain_chars)
+        # taken from the executor, not generated again
+        assert generated.call_count == 0
+
+    def test_game_with_prefetch_is_replayed_without_it(self):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            result_keeper = ResultKeeper(2, seed=6, executor=executor)
+            questions = play_result_keeper(result_keeper, wrong_steps={12})
+
+        assert (
+            play_result_keeper(ResultKeeper(2, seed=6), wrong_steps={12}) == questions
+        )
@@ -0,0 +1,167 @@
+import datetime
+import heapq
+
+import pytest
+
+from src.games.mnemonic.associative_chaining import AssociativeChaining
+from src.games.mnemonic.grading import AnswerKey
+from src.games.mnemonic.scheduler import (
+    EASE,
+    MIN_EASE,
+    NOT_RECALLED,
+    Review,
+    ReviewScheduler,
+    sm2,
+)
+from src.games.replay import (
+    parse_due_words,
+    parse_user_answers,
+    replay_associative_changing,
+)
+from src.models.enum_types import Language
+
+NOW = datetime.datetime(2026, 1, 1, 12)
+
+
+def scheduler_with_due_words(count, now=NOW):
+    """Words w0, w1, ... due one minute after another, the first the longest overdue"""
+    return ReviewScheduler.from_reviews(
+        Review(
+            word=f"w{i}",
+            due=now - datetime.timedelta(minutes=count - i),
+            interval=1,
+            repetitions=1,
+        )
+        for i in range(count)
+    )
+
+
+class TestSm2:
+    def test_intervals_grow_with_good_recalls(self):
+        review = Review(word="cat", due=NOW)
+        intervals = []
+        for _ in range(4):
+            review = sm2(review, 5, NOW)
+            intervals.append(review.interval)
+
+        assert intervals[:3] == [1, 6, round(6 * (EASE + 0.2))]
+        assert intervals[3] > intervals[2]
+        assert review.due == NOW + datetime.timedelta(days=intervals[3])
+
+    @pytest.mark.parametrize("quality, ease", [(5, EASE + 0.1), (4, EASE), (3, 2.36)])
+    def test_ease_follows_quality(self, quality, ease):
+        assert sm2(Review(word="cat", due=NOW), quality, NOW).ease == pytest.approx(
+            ease
+        )
+
+    def test_forgotten_word_starts_again(self):
+        review = Review(word="cat", due=NOW, ease=MIN_EASE, interval=30, repetitions=5)
+        review = sm2(review, NOT_RECALLED, NOW)
+
+        assert (review.interval, review.repetitions) == (1, 0)
+        assert review.ease == MIN_EASE
+
+
+class TestReviewScheduler:
+    def test_due_words_longest_overdue_first(self):
+        scheduler = scheduler_with_due_words(5)
+        scheduler.reviews["later"] = Review(word="later", due=NOW)
+        scheduler = ReviewScheduler.from_reviews(scheduler.reviews.values())
+
+        assert scheduler.due_words(3, NOW) == ["w0", "w1", "w2"]
+        assert scheduler.due_words(10, NOW - datetime.timedelta(seconds=1)) == [
+            "w3",
+            "w4",
+        ]
+
+    def test_picking_due_words_pops_only_them(self, mocker):
+        scheduler = scheduler_with_due_words(20_000)
+        pop = mocker.spy(heapq, "heappop")
+
+        assert len(scheduler.due_words(50, NOW)) == 50
+        assert pop.call_count == 50
+
+    def test_reviewed_words_move_in_queue(self):
+        scheduler = scheduler_with_due_words(3)
+        grading = AnswerKey(["w0", "w1"]).grade(["w0", "x"])
+
+        scheduler.review(["w0", "w1"], grading, NOW)
+
+        assert scheduler.reviews["w0"].interval == 6
+        assert scheduler.reviews["w1"].repetitions == 0
+        assert scheduler.dirty == {"w0", "w1"}
+        # w1 is due again tomorrow, w0 in six days
+        tomorrow = NOW + datetime.timedelta(days=1)
+        assert scheduler.due_words(5, tomorrow) == ["w2", "w1"]
+        assert scheduler.due_words(5, tomorrow) == []
+
+    def test_new_words_are_tracked(self):
+        scheduler = ReviewScheduler()
+        grading = AnswerKey(["a", "b"]).grade(["b", "a"])
+
+        scheduler.review(["a", "b"], grading, NOW)
+
+        assert len(scheduler) == 2
+        assert [review.interval for review in scheduler.dirty_reviews()] == [1, 1]
+        scheduler.mark_saved()
+        assert not scheduler.dirty
+
+
+class TestAssociativeChainingWithScheduler:
+    def test_payload_mixes_due_and_fresh_words(self):
+        scheduler = ReviewScheduler.from_reviews(
+            Review(word=word, due=NOW) for word in ("cat", "dog", "tree", "book")
+        )
+        associative_chaining = AssociativeChaining(5, Language.EN, scheduler=scheduler)
+        associative_chaining.create_payload()
+        payload = associative_chaining.payload
+
+        assert len(payload) == len(set(payload)) == associative_chaining.size
+        # all the due words fit in half of the payload
+        assert {"cat", "dog", "tree", "book"} <= set(payload)
+
+    def test_game_with_due_words_is_replayed(self):
+        scheduler = scheduler_with_due_words(30)
+        associative_chaining = AssociativeChaining(
+            1, Language.EN, seed=4, scheduler=scheduler
+        )
+        game = associative_chaining.run()
+        words = next(game)
+        try:
+            game.send(words[:6] + ["-"])
+        except StopIteration:
+            pass
+        stats = associative_chaining.get_stats()
+
+        replay = replay_associative_changing(
+            1,
+            stats["seed"],
+            Language.EN,
+            parse_user_answers(stats["user_answers"]),
+            due_words=parse_due_words(stats["due_words"]),
+        )
+
+        assert parse_due_words(stats["due_words"]) == [f"w{i}" for i in range(5)]
+        assert replay.questions == words
+        assert replay.points_earned == stats["points_earned"]
+
+    def test_due_words_take_at_most_half_of_payload(self):
+        scheduler = scheduler_with_due_words(30)
+        associative_chaining = AssociativeChaining(1, Language.EN, scheduler=scheduler)
+        associative_chaining.create_payload()
+
+        due = set(associative_chaining.payload) & set(scheduler.reviews)
+        assert len(due) == 5
+        assert len(associative_chaining.payload) == 10
+
+    def test_every_word_of_payload_is_reviewed(self):
+        scheduler = ReviewScheduler()
+        associative_chaining = AssociativeChaining(1, Language.EN, scheduler=scheduler)
+        associative_chaining.create_payload()
+        payload = associative_chaining.payload
+
+        associative_chaining.check_answer(payload[:5])
+
+        assert set(scheduler.reviews) == set(payload)
+        assert {scheduler.reviews[word].repetitions for word in payload[:5]} == {1}
+        assert {scheduler.reviews[word].repetitions for word in payload[5:]} == {0}
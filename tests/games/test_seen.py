@@ -0,0 +1,124 @@
+import random
+
+import pytest
+
+from src.games.mnemonic.associative_chaining import AssociativeChaining
+from src.games.mnemonic.seen import CHUNK_BITS, MIN_UNSEEN, SeenWords
+from src.games.replay import (
+    parse_user_answers,
+    parse_word_ids,
+    replay_associative_changing,
+)
+from src.models.enum_types import Language
+
+
+class CountingRandom(random.Random):
+    def __init__(self, seed):
+        super().__init__(seed)
+        self.draws = 0
+
+    def randrange(self, *args):
+        self.draws += 1
+        return super().randrange(*args)
+
+
+class TestSeenWords:
+    def test_mark(self):
+        seen = SeenWords(3000)
+        seen.mark([0, 7, 8, 2999, 7])
+
+        assert [word_id in seen for word_id in (0, 1, 7, 8, 2999)] == [
+            True,
+            False,
+            True,
+            True,
+            True,
+        ]
+        assert seen.seen == 4
+        assert seen.dirty == {0, 2999 // CHUNK_BITS}
+
+    def test_sample_avoids_seen_words(self):
+        seen = SeenWords(1000)
+        seen.mark(range(0, 1000, 2))
+        rng = CountingRandom(1)
+
+        sample = seen.sample_ids(100, rng)
+
+        assert len(set(sample)) == 100
+        assert all(word_id % 2 for word_id in sample)
+        # half of the words is unseen: about 2 draws per word
+        assert rng.draws < 400
+
+    def test_seen_words_are_forgotten_when_few_are_left(self):
+        seen = SeenWords(100)
+        seen.mark(range(60))
+        seen.mark_saved()
+
+        sample = seen.sample_ids(20, random.Random(2))
+
+        assert 100 - 60 - 20 < 100 * MIN_UNSEEN
+        assert seen.seen == 0
+        assert seen.dirty == {0}
+        assert len(set(sample)) == 20
+
+    def test_whole_corpus_can_be_sampled(self):
+        seen = SeenWords(10)
+        seen.mark([1])
+        assert sorted(seen.sample_ids(10, random.Random(3))) == list(range(10))
+        with pytest.raises(ValueError):
+            seen.sample_ids(11)
+
+    def test_saved_chunks_are_restored(self):
+        seen = SeenWords(5000)
+        seen.mark([3, 1500, 4999])
+        chunks = seen.dirty_chunks()
+        seen.mark_saved()
+
+        restored = SeenWords(5000, chunks)
+
+        assert restored.bits == seen.bits
+        assert restored.seen == 3
+        assert not seen.dirty and not restored.dirty
+
+    def test_chunks_of_other_size_are_left_out(self):
+        seen = SeenWords(5000)
+        seen.mark([4999])
+        assert SeenWords(4000, seen.dirty_chunks()).seen == 0
+
+
+class TestAssociativeChainingWithSeenWords:
+    def test_payload_avoids_seen_words(self):
+        seen = SeenWords(100)
+        words = set()
+        for _ in range(3):
+            associative_chaining = AssociativeChaining(1, Language.EN, seen=seen)
+            associative_chaining.create_payload()
+            words.update(associative_chaining.payload)
+
+        assert len(words) == 30
+        assert seen.seen == 30
+
+    def test_game_with_seen_words_is_replayed_from_word_ids(self):
+        seen = SeenWords(100)
+        seen.mark(range(40))
+        associative_chaining = AssociativeChaining(1, Language.EN, seed=3, seen=seen)
+        game = associative_chaining.run()
+        words = next(game)
+        try:
+            game.send(words[:6] + ["-"])
+        except StopIteration:
+            pass
+        stats = associative_chaining.get_stats()
+
+        replay = replay_associative_changing(
+            1,
+            stats["seed"],
+            Language.EN,
+            parse_user_answers(stats["user_answers"]),
+            word_ids=parse_word_ids(stats["word_ids"]),
+        )
+
+        assert replay.questions == words
+        assert replay.points_earned == stats["points_earned"]
+        # the replay doesn't draw from the seen words of the user
+        assert seen.seen == 50
@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from src.user.credentials import CredentialService, TooManyCredentialRequests
+from src.user.session import hash_password, verify_password
+
+
+@pytest.fixture
+def service():
+    # callbacks run on the worker thread instead of the Kivy clock
+    service = CredentialService(max_workers=1, max_pending=1, scheduler=lambda f: f())
+    yield service
+    service.close()
+
+
+def wait_for_callback(submit):
+    results = []
+    done = threading.Event()
+
+    def callback(result):
+        results.append(result)
+        done.set()
+
+    submit(callback)
+    assert done.wait(timeout=30)
+    return results[0]
+
+
+class TestCredentialService:
+    def test_hash_passes_hash_to_callback(self, service):
+        password_hash = wait_for_callback(
+            lambda callback: service.hash("password", callback=callback)
+        )
+        assert verify_password(password_hash, "password")
+
+    @pytest.mark.parametrize("password, expected", [("password", True), ("x", False)])
+    def test_verify_passes_result_to_callback(self, service, password, expected):
+        stored_hash = hash_password("password")
+        verified = wait_for_callback(
+            lambda callback: service.verify(stored_hash, password, callback=callback)
+        )
+        assert verified is expected
+
+    def test_errors_are_passed_to_error_callback(self, service):
+        error = wait_for_callback(
+            lambda callback: service.verify(
+                "not a hash", "password", error_callback=callback
+            )
+        )
+        assert isinstance(error, Exception)
+
+    def test_requests_over_limit_are_rejected(self, service):
+        future = service.hash("password")
+        with pytest.raises(TooManyCredentialRequests):
+            service.hash("password")
+
+        future.result()
+        # the slot is free again
+        service.hash("password").result()
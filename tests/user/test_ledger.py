@@ -0,0 +1,106 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from src.models import ModelBase
+from src.models.ledger import recalculate_points
+from src.models.user import PointsModel, User
+
+
+@pytest.fixture(scope="function")
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+    ModelBase.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture(scope="function")
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def users(session):
+    """Two users, each one gets 10 points for creating an account"""
+    users = [User(username=name, password="testpass") for name in ("anna", "tom")]
+    session.add_all(users)
+    session.commit()
+    return users
+
+
+@pytest.fixture
+def user_updates(engine):
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE user_table"):
+            statements.append(parameters)
+
+    return statements
+
+
+class TestPointsLedger:
+    def test_single_point_record_updates_user(self, session, users):
+        session.add(PointsModel(user_id=users[0].id, point=5, category="Game"))
+        session.commit()
+
+        assert users[0].point == 15
+        assert users[1].point == 10
+
+    def test_records_of_one_flush_are_aggregated(self, session, users, user_updates):
+        for user in users:
+            for point in (1, 2, 3):
+                session.add(PointsModel(user_id=user.id, point=point, category="Game"))
+        session.commit()
+
+        # one UPDATE per user instead of one per record
+        assert len(user_updates) == 2
+        assert [user.point for user in users] == [16, 16]
+
+    def test_deleted_record_is_subtracted(self, session, users):
+        record = PointsModel(user_id=users[0].id, point=5, category="Game")
+        session.add(record)
+        session.commit()
+        session.delete(record)
+        session.commit()
+
+        assert users[0].point == 10
+
+    def test_user_point_is_refreshed_without_commit(self, session, users):
+        session.add(PointsModel(user_id=users[0].id, point=5, category="Game"))
+        session.flush()
+
+        assert users[0].point == 15
+
+
+class TestRecalculatePoints:
+    def test_recalculate_points_rebuilds_all_users(self, engine, session, users):
+        with engine.begin() as connection:
+            connection.execute(User.__table__.update().values(point=999))
+            recalculate_points(connection)
+        session.expire_all()
+
+        assert [user.point for user in users] == [10, 10]
+
+    def test_recalculate_points_only_for_given_users(self, engine, session, users):
+        with engine.begin() as connection:
+            connection.execute(User.__table__.update().values(point=999))
+            deltas = recalculate_points(connection, [users[0].id])
+        session.expire_all()
+
+        assert [user.point for user in users] == [10, 999]
+        assert deltas == {users[0].id: -989}
+
+    def test_recalculate_points_resets_users_without_records(
+        self, engine, session, users
+    ):
+        session.query(PointsModel).filter_by(user_id=users[1].id).delete()
+        session.commit()
+        with engine.begin() as connection:
+            connection.execute(User.__table__.update().values(point=999))
+            recalculate_points(connection)
+        session.expire_all()
+
+        assert [user.point for user in users] == [10, 0]
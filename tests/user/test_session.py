@@ -1,3 +1,5 @@
+import base64
+from configparser import ConfigParser
 from string import (
     ascii_letters,
     ascii_lowercase,
@@ -8,9 +10,23 @@ from string import (
     punctuation,
 )
 
+import bcrypt
 import pytest
 
-from src.user.session import hash_password, verify_password
+from src.config.app_config import AppConfig
+from src.user.session import (
+    DEFAULT_ROUNDS,
+    MAX_ROUNDS,
+    MIN_ROUNDS,
+    calibrate_rounds,
+    configure_rounds,
+    get_rounds,
+    hash_password,
+    hash_rounds,
+    needs_rehash,
+    set_rounds,
+    verify_password,
+)
 
 
 class TestHashPassword:
@@ -71,3 +87,66 @@ class TestVerifyPassword:
         password = "password"
         hashed_password = hash_password(password)
         assert not verify_password(hashed_password, "new_one")
+
+    def test_verify_password_accepts_legacy_base64_hash(self):
+        legacy_hash = base64.b64encode(
+            bcrypt.hashpw(b"password", bcrypt.gensalt(MIN_ROUNDS))
+        ).decode()
+        assert verify_password(legacy_hash, "password")
+        assert not verify_password(legacy_hash, "new_one")
+
+
+class TestRounds:
+    def test_hash_is_stored_raw_with_cost(self):
+        hashed_password = hash_password("password", rounds=MIN_ROUNDS)
+        assert hashed_password.startswith(f"$2b${MIN_ROUNDS}$")
+        assert hash_rounds(hashed_password) == MIN_ROUNDS
+
+    def test_needs_rehash_for_other_cost_or_legacy_hash(self):
+        hashed_password = hash_password("password", rounds=MIN_ROUNDS)
+        legacy_hash = base64.b64encode(hashed_password.encode()).decode()
+
+        assert not needs_rehash(hashed_password, rounds=MIN_ROUNDS)
+        assert needs_rehash(hashed_password, rounds=MIN_ROUNDS + 1)
+        assert needs_rehash(legacy_hash, rounds=MIN_ROUNDS)
+
+    def test_set_rounds_rejects_cost_out_of_range(self):
+        with pytest.raises(ValueError):
+            set_rounds(MIN_ROUNDS - 1)
+
+    def test_calibrate_rounds_picks_highest_cost_under_budget(self, mocker):
+        # 1 ms for the minimal cost, doubled with every round
+        mocker.patch(
+            "src.user.session.measure_verification",
+            side_effect=lambda rounds: 0.001 * 2 ** (rounds - MIN_ROUNDS),
+        )
+        assert calibrate_rounds(0.01) == MIN_ROUNDS + 3
+        assert calibrate_rounds(0.0001) == MIN_ROUNDS
+        assert calibrate_rounds(100) == MAX_ROUNDS
+
+    def test_configure_rounds_saves_calibrated_cost(self, mocker):
+        mocker.patch(
+            "src.user.session.AppConfig.get",
+            side_effect=lambda section, key, fallback=None: fallback,
+        )
+        save = mocker.patch("src.user.session.AppConfig.save_local")
+        mocker.patch("src.user.session.calibrate_rounds", return_value=MIN_ROUNDS)
+        try:
+            assert configure_rounds() == MIN_ROUNDS
+            assert get_rounds() == MIN_ROUNDS
+            save.assert_called_once_with("Security", "bcrypt_rounds", str(MIN_ROUNDS))
+        finally:
+            set_rounds(DEFAULT_ROUNDS)
+
+    def test_calibrated_cost_stays_out_of_shared_config(self, tmp_path, monkeypatch):
+        shared = tmp_path / "config.ini"
+        shared.write_text("[Security]\nlogin_budget_ms = 250\n")
+        monkeypatch.setattr(AppConfig, "CONFIG_FILE", str(shared))
+        monkeypatch.setattr(AppConfig, "LOCAL_CONFIG_FILE", str(tmp_path / "local.ini"))
+        monkeypatch.setattr(AppConfig, "config", ConfigParser())
+
+        AppConfig.save_local("Security", "bcrypt_rounds", "10")
+
+        assert shared.read_text() == "[Security]\nlogin_budget_ms = 250\n"
+        assert AppConfig.get("Security", "bcrypt_rounds") == "10"
+        assert AppConfig.get("Security", "login_budget_ms") == "250"